@@ -0,0 +1,4 @@
+# First Party Library
+from peru_dnie.cli import main
+
+main()
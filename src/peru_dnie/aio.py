@@ -0,0 +1,208 @@
+# Standard Library
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, ContextManager, List, Sequence, TypeVar, Union
+
+# Third Party Library
+from attrs import define, field
+
+# First Party Library
+from peru_dnie.apdu import APDUResponse, Command
+from peru_dnie.card import SmartCard
+from peru_dnie.commands.certificate import Certificate, extract_certificate
+from peru_dnie.commands.signature import sign_digest
+from peru_dnie.constants import CertificateType
+from peru_dnie.context import Context
+from peru_dnie.exceptions import CardError, OperationCancelled
+from peru_dnie.i18n import t
+
+T = TypeVar("T")
+
+
+@define
+class _CancellableCard(SmartCard):
+    """Card refusing to send the next APDU once its operation is cancelled"""
+
+    card: SmartCard = field(kw_only=True)
+    cancelled: threading.Event = field(factory=threading.Event)
+
+    def transmit(self, command: Command) -> APDUResponse:
+        if self.cancelled.is_set():
+            raise OperationCancelled(t["errors"]["operation_cancelled"])
+        return self.card.transmit(command)
+
+    def atr(self) -> bytes:
+        return self.card.atr()
+
+    def reader(self) -> str:
+        return self.card.reader()
+
+    def transaction(self) -> ContextManager[None]:
+        return self.card.transaction()
+
+
+@define
+class AsyncContext:
+    """Asyncio interface to the card of a `Context`
+
+    Blocking card operations run on an executor with a single thread owned by
+    this card, so they never block the event loop and never overlap. A
+    cancelled operation stops before its next APDU.
+    """
+
+    ctx: Context
+    _executor: ThreadPoolExecutor = field(init=False)
+    _card: Union[_CancellableCard, None] = field(init=False, default=None)
+    _lock: Union[asyncio.Lock, None] = field(init=False, default=None)
+
+    def __attrs_post_init__(self) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="peru_dnie_card"
+        )
+
+        if self.ctx.card is not None:
+            self._card = _CancellableCard(self.ctx.card.connection, card=self.ctx.card)
+            self.ctx.card = self._card
+
+    async def run(self, job: Callable[[Context], T]) -> T:
+        """Run a blocking `job` with the card, waiting for its turn"""
+        # Created here so it belongs to the running loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        cancelled = threading.Event()
+        loop = asyncio.get_running_loop()
+
+        async with self._lock:
+            future = loop.run_in_executor(self._executor, self._call, job, cancelled)
+            try:
+                return await future
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+    async def transmit(self, command: Command) -> APDUResponse:
+        return await self.run(lambda ctx: ctx.transmit(command))
+
+    async def sign_digest(self, digest: bytes) -> bytes:
+        return await self.run(lambda ctx: sign_digest(ctx, digest))
+
+    async def sign_bytes(self, input_bytes: bytes) -> bytes:
+        """Sign bytes, hashing them on the default executor"""
+        if self.ctx.hash_func is None:
+            raise ValueError("A hash function is needed for a signature.")
+
+        loop = asyncio.get_running_loop()
+        digest = await loop.run_in_executor(None, self.ctx.hash_func, input_bytes)
+
+        return await self.sign_digest(digest)
+
+    async def extract_certificate(self, cert_type: CertificateType) -> Certificate:
+        return await self.run(lambda ctx: extract_certificate(ctx, cert_type))
+
+    def close(self) -> None:
+        """Stop the card thread once its pending operations are done"""
+        self._executor.shutdown(wait=False)
+
+    async def __aenter__(self) -> "AsyncContext":
+        return self
+
+    async def __aexit__(self, *_: Any) -> None:
+        self.close()
+
+    def _call(self, job: Callable[[Context], T], cancelled: threading.Event) -> T:
+        if cancelled.is_set():
+            raise OperationCancelled(t["errors"]["operation_cancelled"])
+
+        if self._card is not None:
+            self._card.cancelled = cancelled
+
+        return job(self.ctx)
+
+
+@define
+class AsyncCardPool:
+    """Spread async operations over several cards
+
+    Each operation runs on the next idle card. A card failing with
+    `CardError` leaves the pool and the operation is retried on another card,
+    up to `max_attempts` times.
+    """
+
+    contexts: Sequence[AsyncContext]
+    max_attempts: int = 3
+    # Idle cards, None once no card is left
+    _idle: Union["asyncio.Queue[Union[AsyncContext, None]]", None] = field(
+        init=False, default=None
+    )
+    _alive: List[AsyncContext] = field(init=False, factory=list)
+
+    def __attrs_post_init__(self) -> None:
+        self._alive = list(self.contexts)
+
+    async def run(self, job: Callable[[Context], T]) -> T:
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            for alive in self._alive:
+                self._idle.put_nowait(alive)
+
+        if not self._alive:
+            raise CardError(t["errors"]["no_cards_available"])
+
+        attempt = 1
+        while True:
+            actx = await self._idle.get()
+            if actx is None:
+                # Wake up the next waiter too
+                self._idle.put_nowait(None)
+                raise CardError(t["errors"]["no_cards_available"])
+
+            try:
+                result = await actx.run(job)
+            except CardError:
+                self._retire(actx)
+                if attempt >= self.max_attempts:
+                    raise
+                attempt += 1
+                continue
+            except BaseException:
+                self._idle.put_nowait(actx)
+                raise
+
+            self._idle.put_nowait(actx)
+            return result
+
+    async def sign_digest(self, digest: bytes) -> bytes:
+        return await self.run(lambda ctx: sign_digest(ctx, digest))
+
+    async def sign_bytes(self, input_bytes: bytes) -> bytes:
+        hash_func = self.contexts[0].ctx.hash_func
+        if hash_func is None:
+            raise ValueError("A hash function is needed for a signature.")
+
+        loop = asyncio.get_running_loop()
+        digest = await loop.run_in_executor(None, hash_func, input_bytes)
+
+        return await self.sign_digest(digest)
+
+    async def extract_certificate(self, cert_type: CertificateType) -> Certificate:
+        return await self.run(lambda ctx: extract_certificate(ctx, cert_type))
+
+    def close(self) -> None:
+        for actx in self.contexts:
+            actx.close()
+
+    async def __aenter__(self) -> "AsyncCardPool":
+        return self
+
+    async def __aexit__(self, *_: Any) -> None:
+        self.close()
+
+    def _retire(self, actx: AsyncContext) -> None:
+        if actx in self._alive:
+            self._alive.remove(actx)
+        actx.close()
+
+        if not self._alive and self._idle is not None:
+            self._idle.put_nowait(None)
@@ -1,21 +1,33 @@
 # Standard Library
-from typing import Sequence, Union
+from typing import List, Sequence, Union
 
 # Third Party Library
-from attrs import define
+from attrs import define, field, frozen
 
 # First Party Library
 from peru_dnie.i18n import t
 
 ByteLike = Union[Sequence[int], bytes, bytearray]
 
+# Largest Lc and Le values of short and extended APDUs (ISO 7816-4)
+SHORT_MAX_LC = 0xFF
+SHORT_MAX_LE = 0x100
+EXTENDED_MAX_LC = 0xFFFF
+EXTENDED_MAX_LE = 0x10000
+
 
 class APDUError(Exception):
     """Error due from APDU transactions"""
 
 
-@define
+@frozen
 class APDUCommand:
+    """Immutable APDU command, serialized once when created
+
+    Commands that do not change (e.g. `SELECT_PKI_APP_CMD`) are module
+    constants, so they are validated and serialized only at import.
+    """
+
     ins: int
     p1: int
     p2: int
@@ -23,6 +35,8 @@ class APDUCommand:
     data: Union[bytes, None] = None
     le: Union[int, None] = None
     cla: int = 0x00
+    _serialized: bytes = field(init=False, eq=False, repr=False)
+    _serialized_list: List[int] = field(init=False, eq=False, repr=False)
 
     def __attrs_post_init__(self):
         if self.data is None and self.lc is not None:
@@ -31,23 +45,141 @@ class APDUCommand:
         elif self.data is not None and self.lc != len(self.data):
             raise ValueError(t["errors"]["lc_must_length"])
 
+        if self.lc is not None and not 0 < self.lc <= EXTENDED_MAX_LC:
+            raise ValueError(t["errors"]["lc_out_of_range"])
+
+        if self.le is not None and not 0 <= self.le <= EXTENDED_MAX_LE:
+            raise ValueError(t["errors"]["le_out_of_range"])
+
+        serialized = self._build()
+        object.__setattr__(self, "_serialized", serialized)
+        object.__setattr__(self, "_serialized_list", list(serialized))
+
+    @property
+    def extended(self) -> bool:
+        """Whether Lc or Le do not fit in a short APDU"""
+        return (self.lc is not None and self.lc > SHORT_MAX_LC) or (
+            self.le is not None and self.le > SHORT_MAX_LE
+        )
+
     def serialize(self) -> bytes:
-        command = bytes([self.cla, self.ins, self.p1, self.p2])
+        return self._serialized
+
+    def as_list(self) -> List[int]:
+        """Serialized command as the list of ints pyscard expects, do not modify"""
+        return self._serialized_list
+
+    def _build(self) -> bytes:
+        command = bytearray([self.cla, self.ins, self.p1, self.p2])
+        extended = self.extended
 
         if self.lc is not None and self.data is not None:
-            command += self.lc.to_bytes(length=1, byteorder="big") + self.data
+            if extended:
+                command += b"\x00" + self.lc.to_bytes(length=2, byteorder="big")
+            else:
+                command += self.lc.to_bytes(length=1, byteorder="big")
+            command += self.data
 
         if self.le is not None:
-            command += self.le.to_bytes(length=1, byteorder="big")
+            # Maximum Le is encoded as zero
+            if extended:
+                le = self.le % EXTENDED_MAX_LE
+                if self.lc is None:
+                    command += b"\x00"
+                command += le.to_bytes(length=2, byteorder="big")
+            else:
+                command += (self.le % SHORT_MAX_LE).to_bytes(length=1, byteorder="big")
 
-        return command
+        return bytes(command)
+
+
+@define
+class APDUTemplate:
+    """Command with a field of its data rewritten in place before each use
+
+    Loops sending the same command with a changing value (e.g. the offset of
+    the certificate reads) write it with `set_field` instead of creating a new
+    command per iteration.
+    """
+
+    command: APDUCommand
+    data_offset: int
+    size: int
+    _data_start: int = field(init=False)
+    _buffer: bytearray = field(init=False)
+    _list: List[int] = field(init=False)
+
+    def __attrs_post_init__(self) -> None:
+        data = self.command.data if self.command.data is not None else b""
+        if not 0 <= self.data_offset <= len(data) - self.size:
+            raise ValueError(t["errors"]["template_field_out_of_range"])
+
+        # CLA INS P1 P2 and the one or three bytes of Lc
+        self._data_start = 4 + (3 if self.command.extended else 1)
+        self._buffer = bytearray(self.command.serialize())
+        self._list = list(self._buffer)
+
+    @property
+    def cla(self) -> int:
+        return self.command.cla
+
+    @property
+    def ins(self) -> int:
+        return self.command.ins
+
+    @property
+    def p1(self) -> int:
+        return self.command.p1
+
+    @property
+    def p2(self) -> int:
+        return self.command.p2
+
+    @property
+    def lc(self) -> Union[int, None]:
+        return self.command.lc
+
+    @property
+    def le(self) -> Union[int, None]:
+        return self.command.le
+
+    @property
+    def data(self) -> bytes:
+        end = self._data_start + len(self.command.data or b"")
+        return bytes(self._buffer[self._data_start : end])
+
+    def set_field(self, value: int) -> None:
+        """Write `value` big endian in the field"""
+        start = self._data_start + self.data_offset
+        for idx in range(start + self.size - 1, start - 1, -1):
+            byte = value & 0xFF
+            self._buffer[idx] = byte
+            self._list[idx] = byte
+            value >>= 8
+
+    def serialize(self) -> bytes:
+        return bytes(self._buffer)
+
+    def as_list(self) -> List[int]:
+        """Serialized command as the list of ints pyscard expects, do not modify"""
+        return self._list
+
+
+Command = Union[APDUCommand, APDUTemplate]
+
+# Response payloads are views over the buffer received from the reader
+ResponseData = Union[bytes, memoryview]
+
+
+def _data_repr(data: Union[ResponseData, None]) -> str:
+    return repr(data if data is None else bytes(data))
 
 
 @define
 class APDUResponse:
     sw1: int
     sw2: int
-    data: Union[bytes, None] = None
+    data: Union[ResponseData, None] = field(default=None, repr=_data_repr)
 
     @property
     def ok(self):
@@ -0,0 +1,119 @@
+# Standard Library
+import hashlib
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Final, List, Tuple, Union
+
+# Third Party Library
+from attrs import define
+
+DEFAULT_CACHE_DIR: Final = (
+    Path(os.getenv("XDG_CACHE_HOME", Path.home() / ".cache")) / "peru_dnie"
+)
+
+# Certificates are ~1.5 KB, so this keeps the files of thousands of cards
+DEFAULT_CACHE_MAX_BYTES: Final = 16 * 1024 * 1024
+
+_CHECKSUM_SIZE: Final = hashlib.sha256().digest_size
+
+
+def card_identity(atr: bytes, identifier: Union[bytes, memoryview]) -> str:
+    """Cache key of a card from its ATR and a card-unique identifier"""
+    return hashlib.sha256(bytes([len(atr)]) + atr + identifier).hexdigest()
+
+
+def reader_identity(reader: str) -> str:
+    """Cache key for the settings of a reader"""
+    return "reader-" + hashlib.sha256(reader.encode()).hexdigest()
+
+
+def get_cache_dir() -> Path:
+    force_dir = os.getenv("PERUDNIE_CACHE_DIR", None)
+    if force_dir is not None:
+        return Path(force_dir)
+
+    return DEFAULT_CACHE_DIR
+
+
+@define
+class CardFileCache:
+    """On-disk cache for read-only card files (e.g. public certificates)
+
+    Every card gets its own directory named after its `card_identity`. Entries
+    carry a checksum and are discarded if corrupted. When the cache grows over
+    `max_bytes`, the least recently used cards are evicted.
+    """
+
+    directory: Path
+    max_bytes: int = DEFAULT_CACHE_MAX_BYTES
+
+    def get(self, card_id: str, name: str) -> Union[bytes, None]:
+        entry = self.directory / card_id / name
+
+        try:
+            content = entry.read_bytes()
+        except OSError:
+            return None
+
+        checksum, data = content[:_CHECKSUM_SIZE], content[_CHECKSUM_SIZE:]
+        if hashlib.sha256(data).digest() != checksum:
+            entry.unlink(missing_ok=True)
+            return None
+
+        # Directory modification time tracks the last use of the card
+        os.utime(entry.parent)
+
+        return data
+
+    def put(self, card_id: str, name: str, data: Union[bytes, bytearray]) -> None:
+        card_dir = self.directory / card_id
+        card_dir.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temporary file first so readers never see partial entries
+        fd, tmp_name = tempfile.mkstemp(dir=card_dir, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as tmp_file:
+            tmp_file.write(hashlib.sha256(data).digest() + data)
+        os.replace(tmp_name, card_dir / name)
+        os.utime(card_dir)
+
+        self.evict(keep=card_id)
+
+    def invalidate(self, card_id: Union[str, None] = None) -> None:
+        """Remove the entries of one card, or of all cards"""
+        if card_id is None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+        else:
+            shutil.rmtree(self.directory / card_id, ignore_errors=True)
+
+    def size(self) -> int:
+        return sum(size for _, _, size in self._cards())
+
+    def evict(self, keep: Union[str, None] = None) -> None:
+        """Remove least recently used cards until the cache fits `max_bytes`"""
+        cards = sorted(self._cards())
+        total = sum(size for _, _, size in cards)
+
+        for _, card_dir, size in cards:
+            if total <= self.max_bytes:
+                break
+            if card_dir.name == keep:
+                continue
+
+            shutil.rmtree(card_dir, ignore_errors=True)
+            total -= size
+
+    def _cards(self) -> List[Tuple[float, Path, int]]:
+        if not self.directory.is_dir():
+            return []
+
+        cards = []
+        for card_dir in self.directory.iterdir():
+            if not card_dir.is_dir():
+                continue
+
+            size = sum(f.stat().st_size for f in card_dir.iterdir() if f.is_file())
+            cards.append((card_dir.stat().st_mtime, card_dir, size))
+
+        return cards
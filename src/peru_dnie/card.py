@@ -1,18 +1,92 @@
 # Standard Library
 from abc import ABC, abstractmethod
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, ContextManager, Final, Set, Union
 
 # Third Party Library
-from attrs import define
-from smartcard.pcsc.PCSCReader import PCSCCardConnection
+from attrs import define, field
 
 # First Party Library
-from peru_dnie.apdu import APDUCommand, APDUResponse
+from peru_dnie.apdu import APDUResponse, Command
+
+if TYPE_CHECKING:
+    # Third Party Library
+    from smartcard.pcsc.PCSCReader import PCSCCardConnection
 
 
 @define
 class SmartCard(ABC):
-    connection: PCSCCardConnection
+    connection: "PCSCCardConnection"
 
     @abstractmethod
-    def transmit(self, command: APDUCommand) -> APDUResponse:
+    def transmit(self, command: Command) -> APDUResponse:
         pass
+
+    def atr(self) -> bytes:
+        return bytes(self.connection.getATR())
+
+    def reader(self) -> str:
+        return str(self.connection.getReader())
+
+    def transaction(self) -> ContextManager[None]:
+        """Keep other applications off the card, when the card supports it"""
+        return nullcontext()
+
+
+_SELECT_INS: Final = 0xA4
+_VERIFY_INS: Final = 0x20
+_MSE_INS: Final = 0x22
+
+# SELECT P1: by DF name (application) or EF under the current DF
+_SELECT_BY_NAME: Final = 0x04
+_SELECT_EF: Final = 0x02
+
+# Execution and checking errors, except wrong length (67XX, 6CXX) which the
+# card rejects before doing anything, e.g. while negotiating the read size
+_INVALIDATING_SW1: Final = frozenset(range(0x64, 0x70)) - {0x67, 0x6C}
+
+
+@define
+class CardState:
+    """What is known to be selected and verified on the card
+
+    Updated from the exchanges of `Context.transmit` so commands that would
+    not change anything can be skipped. Anything unexpected (an error status
+    word, a failed exchange, a new card) forgets everything.
+    """
+
+    application: Union[bytes, None] = None
+    selected_file: Union[bytes, None] = None
+    security_environment: Union[bytes, None] = None
+    verified_pins: Set[int] = field(factory=set)
+
+    def reset(self) -> None:
+        self.application = None
+        self.selected_file = None
+        self.security_environment = None
+        self.verified_pins.clear()
+
+    def update(self, command: Command, response: APDUResponse) -> None:
+        if response.sw1 in _INVALIDATING_SW1:
+            self.reset()
+            return
+
+        if not response.ok:
+            return
+
+        ins = command.ins
+        if ins == _SELECT_INS:
+            if command.p1 == _SELECT_BY_NAME:
+                # A new application starts a new security context
+                self.reset()
+                self.application = command.data
+            elif command.p1 == _SELECT_EF:
+                self.selected_file = command.data
+            else:
+                self.reset()
+
+        elif ins == _VERIFY_INS:
+            self.verified_pins.add(command.p2)
+
+        elif ins == _MSE_INS:
+            self.security_environment = command.serialize()
@@ -1,11 +1,21 @@
+# Standard Library
+from typing import List
+
 # Third Party Library
 from rich.prompt import IntPrompt
-from rich.status import Status
 
 # First Party Library
+from peru_dnie.commands.general import needs_card_id, read_card_id
 from peru_dnie.context import Context
+from peru_dnie.exceptions import CardError
 from peru_dnie.i18n import t
-from peru_dnie.pyscard import PyscardSmartCard, get_dnie_connection, get_readers
+from peru_dnie.pyscard import (
+    PyscardSmartCard,
+    get_dnie_connection,
+    get_dnie_connections,
+    get_readers,
+)
+from peru_dnie.tracing import span
 
 
 def select_reader(ctx: Context):
@@ -18,12 +28,44 @@ def select_reader(ctx: Context):
         ctx.cli.console.print(f"[blue]{idx + 1}.[/] {reader}")
 
 
-def initialize_smart_card(ctx: Context):
-    spinner = Status(t["init"]["waiting_dnie"], console=ctx.cli.console)
-    spinner.start()
+def initialize_smart_card(ctx: Context) -> None:
+    with ctx.cli.status(t["init"]["waiting_dnie"]):
+        ctx.card = PyscardSmartCard(connection=get_dnie_connection())
+        with span("connect"):
+            ctx.card.connection.connect()
+
+        ctx.card_id = read_card_id(ctx) if needs_card_id(ctx) else None
+
+    ctx.cli.print(t["init"]["found_dnie"])
+
+
+def initialize_smart_cards(ctx: Context) -> List[Context]:
+    """Connect to the DNIe in every reader, one context per card
+
+    The new contexts share the settings of `ctx`.
+    """
+    contexts = [
+        Context(
+            hash_func=ctx.hash_func,
+            card=PyscardSmartCard(connection=connection),
+            cli=ctx.cli,
+            cache=ctx.cache,
+            metrics=ctx.metrics,
+            signature_store=ctx.signature_store,
+            card_queue=ctx.card_queue,
+            pin_provider=ctx.pin_provider,
+            recorded_exchanges=ctx.recorded_exchanges,
+        )
+        for connection in get_dnie_connections()
+    ]
+
+    for card_ctx in contexts:
+        if needs_card_id(card_ctx):
+            card_ctx.card_id = read_card_id(card_ctx)
+
+    if not contexts:
+        raise CardError(t["errors"]["dnie_not_found"])
 
-    ctx.card = PyscardSmartCard(connection=get_dnie_connection())
-    ctx.card.connection.connect()
+    ctx.cli.print(t["init"]["found_dnies"].format(len(contexts)))
 
-    spinner.stop()
-    ctx.cli.console.print(t["init"]["found_dnie"])
+    return contexts
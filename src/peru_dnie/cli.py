@@ -1,25 +1,43 @@
 # Standard Library
-from argparse import ArgumentParser
+from argparse import ArgumentParser, Namespace
 from pathlib import Path
-from typing import get_args
+from typing import TYPE_CHECKING, Dict, List, Union, get_args
 
 # First Party Library
-from peru_dnie.card_init import initialize_smart_card
-from peru_dnie.commands.certificate import extract_certificate_to_file
-from peru_dnie.commands.signature import sign_file
-from peru_dnie.context import Context
-from peru_dnie.hashes import HashFunction, HashTypes
+from peru_dnie.constants import (
+    CARD_QUEUE_TIMEOUT,
+    DEFAULT_HASH_WORKERS,
+    DEFAULT_MAX_IN_FLIGHT_BYTES,
+    HashTypes,
+)
 from peru_dnie.i18n import t
+from peru_dnie.tracing import span, start_tracing, stop_tracing
 
+if TYPE_CHECKING:
+    # Standard Library
+    from argparse import _SubParsersAction
 
-def register_sign_parser(subparsers):
+    # First Party Library
+    from peru_dnie.commands.signature import ComputeSignature
+    from peru_dnie.coordination import CardQueue
+    from peru_dnie.metrics import ApduMetrics
+    from peru_dnie.simulator import TraceExchange
+    from peru_dnie.store import SignatureStore
+
+    Subparsers = _SubParsersAction[ArgumentParser]
+
+# Modules depending on rich, pyscard or the card are imported by the
+# subcommand that needs them, so the CLI starts fast.
+
+
+def register_sign_parser(subparsers: "Subparsers") -> ArgumentParser:
     sign_parser = subparsers.add_parser(
         "sign",
         help=t["cli"]["sign"]["sign_help"],
     )
     sign_parser.add_argument(
         "input_file",
-        type=Path,
+        nargs="+",
         help=t["cli"]["sign"]["input_file_help"],
     )
     sign_parser.add_argument(
@@ -33,16 +51,79 @@ def register_sign_parser(subparsers):
         choices=get_args(HashTypes),
         help=t["cli"]["sign"]["hash_algorithm_help"],
     )
+    sign_parser.add_argument(
+        "--hash-workers",
+        type=int,
+        default=DEFAULT_HASH_WORKERS,
+        help=t["cli"]["sign"]["hash_workers_help"],
+    )
+    sign_parser.add_argument(
+        "--hash-memory",
+        type=int,
+        default=DEFAULT_MAX_IN_FLIGHT_BYTES // (1024 * 1024),
+        help=t["cli"]["sign"]["hash_memory_help"],
+    )
+    sign_parser.add_argument(
+        "--all-readers",
+        action="store_true",
+        help=t["cli"]["sign"]["all_readers_help"],
+    )
+    sign_parser.add_argument(
+        "--suffix",
+        help=t["cli"]["sign"]["suffix_help"],
+    )
+    sign_parser.add_argument(
+        "--format",
+        default="raw",
+        choices=["raw", "cms", "merkle"],
+        help=t["cli"]["sign"]["format_help"],
+    )
+    return sign_parser
+
+
+def register_sign_digest_parser(subparsers: "Subparsers") -> ArgumentParser:
+    sign_digest_parser = subparsers.add_parser(
+        "sign-digest",
+        help=t["cli"]["sign_digest"]["sign_digest_help"],
+    )
+    digest_group = sign_digest_parser.add_mutually_exclusive_group(required=True)
+    digest_group.add_argument(
+        "--digest",
+        help=t["cli"]["sign_digest"]["digest_help"],
+    )
+    digest_group.add_argument(
+        "--digest-file",
+        type=Path,
+        help=t["cli"]["sign_digest"]["digest_file_help"],
+    )
+    digest_group.add_argument(
+        "--manifest",
+        type=Path,
+        help=t["cli"]["sign_digest"]["manifest_help"],
+    )
+    sign_digest_parser.add_argument(
+        "output_file",
+        type=Path,
+        nargs="?",
+        help=t["cli"]["sign_digest"]["output_file_help"],
+    )
+    sign_digest_parser.add_argument(
+        "--hash-algorithm",
+        default="sha256",
+        choices=get_args(HashTypes),
+        help=t["cli"]["sign"]["hash_algorithm_help"],
+    )
+    return sign_digest_parser
 
 
-def register_extract_certificate_parser(subparsers):
+def register_extract_certificate_parser(subparsers: "Subparsers") -> None:
     certificate_parser = subparsers.add_parser(
         "extract",
         help=t["cli"]["extract"]["extract_help"],
     )
     certificate_parser.add_argument(
         "certificate_type",
-        choices=["signature", "encryption", "authentication"],
+        choices=["signature", "encryption", "authentication", "all"],
         type=str,
         help=t["cli"]["extract"]["certificate_type_help"],
     )
@@ -51,43 +132,562 @@ def register_extract_certificate_parser(subparsers):
         type=Path,
         help=t["cli"]["extract"]["output_file_help"],
     )
+    certificate_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=t["cli"]["extract"]["no_cache_help"],
+    )
+    certificate_parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help=t["cli"]["extract"]["refresh_help"],
+    )
 
 
-def main():
-    parser = ArgumentParser(
-        prog="dniectl",
-        description=t["cli"]["program_description"],
+def register_serve_parser(subparsers: "Subparsers") -> None:
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help=t["cli"]["serve"]["serve_help"],
+    )
+    serve_parser.add_argument(
+        "--monitor",
+        action="store_true",
+        help=t["cli"]["serve"]["monitor_help"],
+    )
+    serve_parser.add_argument(
+        "--socket",
+        type=Path,
+        help=t["cli"]["serve"]["socket_help"],
+    )
+    serve_parser.add_argument(
+        "--hash-algorithm",
+        default="sha256",
+        choices=get_args(HashTypes),
+        help=t["cli"]["sign"]["hash_algorithm_help"],
     )
 
-    subparsers = parser.add_subparsers(
-        dest="command",
-        help=t["cli"]["available_tasks"],
+
+def register_verify_parser(subparsers: "Subparsers") -> None:
+    verify_parser = subparsers.add_parser(
+        "verify",
+        help=t["cli"]["verify"]["verify_help"],
+    )
+    verify_parser.add_argument(
+        "certificate",
+        type=Path,
+        help=t["cli"]["verify"]["certificate_help"],
+    )
+    verify_parser.add_argument(
+        "input_file",
+        nargs="+",
+        help=t["cli"]["verify"]["input_file_help"],
+    )
+    verify_parser.add_argument(
+        "--signatures",
+        type=Path,
+        help=t["cli"]["verify"]["signatures_help"],
+    )
+    verify_parser.add_argument(
+        "--suffix",
+        help=t["cli"]["verify"]["suffix_help"],
+    )
+    verify_parser.add_argument(
+        "--format",
+        default="raw",
+        choices=["raw", "merkle"],
+        help=t["cli"]["verify"]["format_help"],
+    )
+    verify_parser.add_argument(
+        "--hash-algorithm",
+        default="sha256",
+        choices=get_args(HashTypes),
+        help=t["cli"]["sign"]["hash_algorithm_help"],
+    )
+    verify_parser.add_argument(
+        "--hash-workers",
+        type=int,
+        default=DEFAULT_HASH_WORKERS,
+        help=t["cli"]["sign"]["hash_workers_help"],
     )
 
-    register_sign_parser(subparsers)
-    register_extract_certificate_parser(subparsers)
 
-    args = parser.parse_args()
+def register_clear_cache_parser(subparsers: "Subparsers") -> None:
+    subparsers.add_parser(
+        "clear-cache",
+        help=t["cli"]["clear_cache"]["clear_cache_help"],
+    )
+
+
+def run_sign(
+    args: Namespace,
+    metrics: Union["ApduMetrics", None],
+    recorded_exchanges: Union[List["TraceExchange"], None],
+) -> None:
+    with span("imports"):
+        from functools import partial
 
-    if args.command == "sign":
-        ctx = Context(hash_func=HashFunction(name=args.hash_algorithm))
+        from peru_dnie.cache import CardFileCache, get_cache_dir
+        from peru_dnie.card_init import initialize_smart_card, initialize_smart_cards
+        from peru_dnie.commands.certificate import extract_certificate
+        from peru_dnie.commands.general import RememberedPin
+        from peru_dnie.commands.signature import (
+            compute_cms_signature,
+            prepare_signature,
+            sign_file,
+            sign_files,
+            sign_files_merkle,
+            sign_files_with_pool,
+            stored_or_compute_signature,
+        )
+        from peru_dnie.constants import CertificateType
+        from peru_dnie.context import Context
+        from peru_dnie.hashes import HashFunction
+        from peru_dnie.pipeline import (
+            HashingEngine,
+            collect_input_files,
+            signature_output_files,
+        )
+        from peru_dnie.pool import CardPool
+
+    cms = args.format == "cms"
+    merkle = args.format == "merkle"
+    hash_func = HashFunction(name=args.hash_algorithm)
+    signature_store = open_signature_store(args)
+    # CMS signatures embed the signing certificate and stored signatures are
+    # keyed by it, so it is cached between runs
+    ctx = Context(
+        hash_func=hash_func,
+        metrics=metrics,
+        cache=(
+            CardFileCache(get_cache_dir())
+            if cms or signature_store is not None
+            else None
+        ),
+        signature_store=signature_store,
+        card_queue=open_card_queue(args),
+        recorded_exchanges=recorded_exchanges,
+    )
+    input_file = args.input_file
+
+    def card_compute(card_ctx: Context) -> "ComputeSignature":
+        if not cms:
+            return stored_or_compute_signature
+        # Once per card, embedded in every signature
+        certificate = bytes(extract_certificate(card_ctx, CertificateType.SIGNATURE))
+        return partial(compute_cms_signature, certificate=certificate)
+
+    single_file = len(input_file) == 1 and (
+        input_file[0] == "-" or Path(input_file[0]).is_file()
+    )
+
+    if single_file and not merkle:
         initialize_smart_card(ctx)
 
         sign_file(
             ctx,
-            input_file=args.input_file,
+            input_file=Path(input_file[0]),
             output_file=args.output_file,
+            compute=card_compute(ctx),
         )
+        return
+
+    suffix = args.suffix
+    if suffix is None:
+        suffix = {"raw": ".sig", "cms": ".p7s", "merkle": ".proof"}[args.format]
 
-    elif args.command == "extract":
-        ctx = Context()
+    engine = HashingEngine(
+        hash_func,
+        workers=args.hash_workers,
+        max_in_flight_bytes=args.hash_memory * 1024 * 1024,
+    )
+
+    if single_file:
+        # A Merkle tree of one file, the proof goes to the output file
+        jobs = [(Path(input_file[0]), args.output_file)]
+    else:
+        # Several inputs: the output is a directory for the signatures
+        jobs = signature_output_files(
+            collect_input_files(input_file),
+            args.output_file,
+            suffix,
+        )
+        args.output_file.mkdir(parents=True, exist_ok=True)
+
+    # A single card signature for all the files
+    if merkle:
         initialize_smart_card(ctx)
+        sign_files_merkle(ctx, jobs, engine=engine)
+        return
 
-        extract_certificate_to_file(
-            ctx,
-            output_file=args.output_file,
-            certificate_type=args.certificate_type,
+    if not args.all_readers:
+        initialize_smart_card(ctx)
+        sign_files(ctx, jobs, engine=engine, compute=card_compute(ctx))
+        return
+
+    # Every card signs with its own key, and its own certificate for CMS
+    card_computes: Dict[int, "ComputeSignature"] = {}
+
+    def prepare_card(card_ctx: Context) -> None:
+        if card_ctx.card is not None:
+            reader = card_ctx.card.reader()
+            ctx.cli.console.print(t["init"]["preparing_reader"].format(reader))
+        card_computes[id(card_ctx)] = card_compute(card_ctx)
+        with card_ctx.exclusive():
+            prepare_signature(card_ctx)
+
+    def compute(card_ctx: Context, digest: bytes) -> bytes:
+        with card_ctx.exclusive():
+            # Again if another process used the card since the last signature
+            prepare_signature(card_ctx)
+            return card_computes[id(card_ctx)](card_ctx, digest)
+
+    contexts = initialize_smart_cards(ctx)
+    for card_ctx in contexts:
+        # Asked here by `prepare_card`, the workers reuse it
+        card_ctx.pin_provider = RememberedPin(card_ctx.cli, card_ctx.pin_provider)
+
+    pool = CardPool(contexts, initializer=prepare_card)
+    with pool:
+        sign_files_with_pool(pool, jobs, engine=engine, compute=compute)
+
+    for stats, utilisation in pool.report():
+        ctx.cli.console.print(
+            t["init"]["reader_usage"].format(
+                stats.reader, stats.jobs, stats.failures, utilisation
+            )
         )
 
+
+def run_sign_digest(
+    args: Namespace,
+    metrics: Union["ApduMetrics", None],
+    recorded_exchanges: Union[List["TraceExchange"], None],
+) -> None:
+    with span("imports"):
+        import sys
+
+        from peru_dnie.cache import CardFileCache, get_cache_dir
+        from peru_dnie.card_init import initialize_smart_card
+        from peru_dnie.commands.signature import (
+            parse_digest,
+            read_digest_manifest,
+            sign_digests,
+        )
+        from peru_dnie.context import Context
+        from peru_dnie.hashes import HashFunction
+
+    if args.manifest is not None:
+        jobs = read_digest_manifest(args.manifest)
+    elif args.digest is not None:
+        jobs = [(parse_digest(args.digest), args.output_file)]
+    elif str(args.digest_file) == "-":
+        jobs = [(sys.stdin.buffer.read(), args.output_file)]
+    else:
+        jobs = [(args.digest_file.read_bytes(), args.output_file)]
+
+    hash_func = HashFunction(name=args.hash_algorithm)
+    for digest, _ in jobs:
+        hash_func.check_digest(digest)
+
+    signature_store = open_signature_store(args)
+    ctx = Context(
+        hash_func=hash_func,
+        metrics=metrics,
+        # Stored signatures are keyed by the cached signing certificate
+        cache=CardFileCache(get_cache_dir()) if signature_store is not None else None,
+        signature_store=signature_store,
+        card_queue=open_card_queue(args),
+        recorded_exchanges=recorded_exchanges,
+    )
+    initialize_smart_card(ctx)
+
+    sign_digests(ctx, jobs)
+
+
+def run_extract(
+    args: Namespace,
+    metrics: Union["ApduMetrics", None],
+    recorded_exchanges: Union[List["TraceExchange"], None],
+) -> None:
+    with span("imports"):
+        from peru_dnie.cache import CardFileCache, get_cache_dir
+        from peru_dnie.card_init import initialize_smart_card
+        from peru_dnie.commands.certificate import (
+            extract_all_certificates_to_dir,
+            extract_certificate_to_file,
+        )
+        from peru_dnie.context import Context
+
+    cache = None if args.no_cache else CardFileCache(get_cache_dir())
+    ctx = Context(
+        cache=cache,
+        metrics=metrics,
+        card_queue=open_card_queue(args),
+        recorded_exchanges=recorded_exchanges,
+    )
+    initialize_smart_card(ctx)
+
+    if args.refresh and cache is not None and ctx.card_id is not None:
+        cache.invalidate(ctx.card_id)
+
+    if args.certificate_type == "all":
+        extract_all_certificates_to_dir(ctx, output_dir=args.output_file)
+        return
+
+    extract_certificate_to_file(
+        ctx,
+        output_file=args.output_file,
+        certificate_type=args.certificate_type,
+    )
+
+
+def run_serve(
+    args: Namespace,
+    metrics: Union["ApduMetrics", None],
+    recorded_exchanges: Union[List["TraceExchange"], None],
+) -> None:
+    with span("imports"):
+        from peru_dnie.cache import CardFileCache, get_cache_dir
+        from peru_dnie.card_init import initialize_smart_card
+        from peru_dnie.commands.general import RememberedPin
+        from peru_dnie.context import Context
+        from peru_dnie.hashes import HashFunction
+        from peru_dnie.server import DEFAULT_SOCKET_PATH, SigningServer
+
+    socket_path = args.socket if args.socket is not None else DEFAULT_SOCKET_PATH
+    ctx = Context(
+        hash_func=HashFunction(name=args.hash_algorithm),
+        cache=CardFileCache(get_cache_dir()),
+        metrics=metrics,
+        signature_store=open_signature_store(args),
+        card_queue=open_card_queue(args),
+        recorded_exchanges=recorded_exchanges,
+    )
+    # Asked by `server.prepare`, the request threads verify the PIN again
+    # without a console after a card reset
+    ctx.pin_provider = RememberedPin(ctx.cli, ctx.pin_provider)
+
+    monitor = None
+    if args.monitor:
+        from peru_dnie.monitor import DnieMonitor
+
+        monitor = DnieMonitor()
+        monitor.start()
     else:
-        parser.print_help()
+        initialize_smart_card(ctx)
+
+    server = SigningServer(ctx, socket_path, monitor=monitor)
+    try:
+        server.prepare()
+        ctx.cli.console.print(t["serve"]["listening"].format(socket_path))
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if monitor is not None:
+            monitor.stop()
+
+
+def run_verify(args: Namespace) -> None:
+    with span("imports"):
+        from peru_dnie.cli_config import CLI_CONFIG
+        from peru_dnie.hashes import HashFunction
+        from peru_dnie.merkle import check_proof_file
+        from peru_dnie.pipeline import HashingEngine, collect_input_files
+        from peru_dnie.verify import (
+            certificate_public_key,
+            check_signature,
+            load_certificate,
+            signature_files,
+            verify_files,
+        )
+
+    merkle = args.format == "merkle"
+    suffix = args.suffix
+    if suffix is None:
+        suffix = ".proof" if merkle else ".sig"
+
+    public_key = certificate_public_key(load_certificate(args.certificate))
+    jobs = signature_files(
+        collect_input_files(args.input_file),
+        suffix,
+        args.signatures,
+    )
+    engine = HashingEngine(
+        HashFunction(name=args.hash_algorithm),
+        workers=args.hash_workers,
+    )
+
+    valid = invalid = 0
+    check = check_proof_file if merkle else check_signature
+    for result in verify_files(public_key, jobs, engine, check):
+        if result.valid:
+            valid += 1
+            CLI_CONFIG.console.print(t["verify"]["valid"].format(result.input_file))
+        else:
+            invalid += 1
+            CLI_CONFIG.console.print(
+                t["verify"]["invalid"].format(result.input_file, result.reason)
+            )
+
+    CLI_CONFIG.console.print(t["verify"]["summary"].format(valid, invalid))
+    if invalid:
+        raise SystemExit(1)
+
+
+def run_clear_cache(args: Namespace) -> None:
+    from peru_dnie.cache import CardFileCache, get_cache_dir
+
+    CardFileCache(get_cache_dir()).invalidate()
+
+
+def open_signature_store(args: Namespace) -> Union["SignatureStore", None]:
+    """Store of the signatures already made, if asked to use one"""
+    if args.signature_store is None:
+        return None
+
+    from peru_dnie.cache import get_cache_dir
+    from peru_dnie.store import SignatureStore, get_store_path
+
+    if args.signature_store is True:
+        return SignatureStore(get_store_path(get_cache_dir()))
+
+    return SignatureStore(Path(args.signature_store))
+
+
+def open_card_queue(args: Namespace) -> Union["CardQueue", None]:
+    """Queue shared with other processes using the same readers"""
+    if args.no_queue:
+        return None
+
+    from peru_dnie.coordination import CardQueue
+
+    return CardQueue(timeout=args.queue_timeout)
+
+
+def write_metrics(
+    metrics: "ApduMetrics", output_file: Path, metrics_format: str
+) -> None:
+    if metrics_format == "prometheus":
+        output_file.write_text(metrics.to_prometheus())
+    else:
+        output_file.write_text(metrics.to_json())
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        prog="dniectl",
+        description=t["cli"]["program_description"],
+    )
+
+    parser.add_argument(
+        "--metrics",
+        type=Path,
+        help=t["cli"]["metrics_help"],
+    )
+    parser.add_argument(
+        "--metrics-format",
+        default="json",
+        choices=["json", "prometheus"],
+        help=t["cli"]["metrics_format_help"],
+    )
+
+    parser.add_argument(
+        "--signature-store",
+        nargs="?",
+        const=True,
+        metavar="FILE",
+        help=t["cli"]["signature_store_help"],
+    )
+    parser.add_argument(
+        "--queue-timeout",
+        type=float,
+        default=CARD_QUEUE_TIMEOUT,
+        metavar="SECONDS",
+        help=t["cli"]["queue_timeout_help"],
+    )
+    parser.add_argument(
+        "--no-queue",
+        action="store_true",
+        help=t["cli"]["no_queue_help"],
+    )
+    parser.add_argument(
+        "--trace",
+        dest="trace_file",
+        type=Path,
+        metavar="FILE",
+        help=t["cli"]["trace_help"],
+    )
+    parser.add_argument(
+        "--record-trace",
+        type=Path,
+        help=t["cli"]["record_trace_help"],
+    )
+
+    subparsers = parser.add_subparsers(
+        dest="command",
+        help=t["cli"]["available_tasks"],
+    )
+
+    sign_parser = register_sign_parser(subparsers)
+    sign_digest_parser = register_sign_digest_parser(subparsers)
+    register_extract_certificate_parser(subparsers)
+    register_serve_parser(subparsers)
+    register_verify_parser(subparsers)
+    register_clear_cache_parser(subparsers)
+
+    args = parser.parse_args()
+    # Shared by every card, so all of them end up in the same file
+    recorded_exchanges: Union[List["TraceExchange"], None] = (
+        [] if args.record_trace is not None else None
+    )
+
+    if args.trace_file is not None:
+        start_tracing()
+
+    metrics = None
+    if args.metrics is not None:
+        from peru_dnie.metrics import ApduMetrics
+
+        metrics = ApduMetrics()
+
+    try:
+        with span(args.command or "help"):
+            if args.command == "sign":
+                # The leaves of the tree are files hashed by path
+                if args.format == "merkle" and "-" in args.input_file:
+                    sign_parser.error(t["errors"]["merkle_stdin"])
+                run_sign(args, metrics, recorded_exchanges)
+
+            elif args.command == "sign-digest":
+                if args.manifest is None and args.output_file is None:
+                    sign_digest_parser.error(t["errors"]["digest_output_needed"])
+                run_sign_digest(args, metrics, recorded_exchanges)
+
+            elif args.command == "extract":
+                run_extract(args, metrics, recorded_exchanges)
+
+            elif args.command == "serve":
+                run_serve(args, metrics, recorded_exchanges)
+
+            elif args.command == "verify":
+                run_verify(args)
+
+            elif args.command == "clear-cache":
+                run_clear_cache(args)
+
+            else:
+                parser.print_help()
+    finally:
+        if metrics is not None:
+            write_metrics(metrics, args.metrics, args.metrics_format)
+
+        if recorded_exchanges is not None:
+            from peru_dnie.simulator import save_trace
+
+            save_trace(args.record_trace, recorded_exchanges)
+
+        tracer = stop_tracing()
+        if tracer is not None:
+            tracer.save(args.trace_file)
@@ -1,15 +1,56 @@
 # Standard Library
-from typing import Final
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Any, ContextManager, Final, Union
 
 # Third Party Library
 from attrs import define
-from rich.console import Console
+
+if TYPE_CHECKING:
+    # Third Party Library
+    from rich.console import Console
 
 
 @define
 class CliConfig:
-    console: Final = Console(color_system="truecolor")
-    DEBUG: Final = False
+    """Console where the commands report progress and ask for input
+
+    rich is only imported when something is shown. When not `interactive`,
+    nothing is shown or asked, e.g. for library use.
+    """
+
+    _console: Union["Console", None] = None
+    interactive: bool = True
+    DEBUG: bool = False
+
+    @property
+    def console(self) -> "Console":
+        if self._console is None:
+            from rich.console import Console
+
+            self._console = Console(color_system="truecolor")
+
+        return self._console
+
+    def print(self, message: str) -> None:
+        if self.interactive:
+            self.console.print(message)
+
+    def status(self, message: str) -> ContextManager[Any]:
+        """Spinner shown while the block runs"""
+        if not self.interactive:
+            return nullcontext()
+
+        from rich.status import Status
+
+        return Status(message, console=self.console)
+
+    def ask_password(self, message: str) -> str:
+        from rich.prompt import Prompt
+
+        return Prompt.ask(message, password=True, console=self.console)
 
 
 CLI_CONFIG: Final = CliConfig()
+
+# Shows and asks nothing
+HEADLESS_CONFIG: Final = CliConfig(interactive=False)
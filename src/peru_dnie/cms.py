@@ -0,0 +1,104 @@
+"""CMS (PKCS#7) detached signatures, RFC 5652
+
+The card signs the DER encoded signed attributes, which hold the digest of
+the document, so a `.p7s` is built from the document digest, the signing
+certificate and one card signature.
+"""
+
+# Standard Library
+from datetime import datetime, timezone
+from typing import Final, Union
+
+# First Party Library
+from peru_dnie import der
+from peru_dnie.hashes import HashFunction
+
+ID_DATA: Final = "1.2.840.113549.1.7.1"
+ID_SIGNED_DATA: Final = "1.2.840.113549.1.7.2"
+ID_CONTENT_TYPE: Final = "1.2.840.113549.1.9.3"
+ID_MESSAGE_DIGEST: Final = "1.2.840.113549.1.9.4"
+ID_SIGNING_TIME: Final = "1.2.840.113549.1.9.5"
+RSA_ENCRYPTION: Final = "1.2.840.113549.1.1.1"
+
+HASH_ALGORITHM_OIDS: Final = {
+    "sha224": "2.16.840.1.101.3.4.2.4",
+    "sha256": "2.16.840.1.101.3.4.2.1",
+    "sha384": "2.16.840.1.101.3.4.2.2",
+    "sha512": "2.16.840.1.101.3.4.2.3",
+}
+
+
+def algorithm_identifier(dotted_oid: str) -> bytes:
+    return der.sequence(der.oid(dotted_oid), der.null())
+
+
+def signed_attributes(
+    hash_func: HashFunction,
+    digest: bytes,
+    signing_time: Union[datetime, None] = None,
+) -> bytes:
+    """DER SET OF the signed attributes, the data the card signs
+
+    Holds the content type, the document `digest` and the signing time.
+    """
+    if signing_time is None:
+        signing_time = datetime.now(timezone.utc)
+
+    hash_func.check_digest(digest)
+
+    return der.set_of(
+        der.sequence(der.oid(ID_CONTENT_TYPE), der.set_of(der.oid(ID_DATA))),
+        der.sequence(der.oid(ID_SIGNING_TIME), der.set_of(der.timestamp(signing_time))),
+        der.sequence(der.oid(ID_MESSAGE_DIGEST), der.set_of(der.octet_string(digest))),
+    )
+
+
+def issuer_and_serial_number(certificate: bytes) -> bytes:
+    """IssuerAndSerialNumber identifying the signer by its certificate"""
+    tbs_certificate = der.elements(certificate)[0]
+    fields = der.elements(tbs_certificate)
+
+    # Skip the optional version, [0] EXPLICIT
+    if fields[0][0] == 0xA0:
+        fields = fields[1:]
+
+    serial_number, _, issuer = fields[:3]
+
+    return der.sequence(issuer, serial_number)
+
+
+def signed_data(
+    hash_func: HashFunction,
+    certificate: bytes,
+    attributes: bytes,
+    signature: bytes,
+) -> bytes:
+    """ContentInfo with a detached SignedData
+
+    `attributes` are the `signed_attributes` the card made `signature` of.
+    """
+    digest_algorithm = algorithm_identifier(HASH_ALGORITHM_OIDS[hash_func.name])
+
+    # The signed attributes are [0] IMPLICIT in the SignerInfo
+    _, start, end = der.read_tlv(attributes)
+    implicit_attributes = der.context(0, attributes[start:end])
+
+    signer_info = der.sequence(
+        der.integer(1),
+        issuer_and_serial_number(certificate),
+        digest_algorithm,
+        implicit_attributes,
+        algorithm_identifier(RSA_ENCRYPTION),
+        der.octet_string(signature),
+    )
+
+    content = der.sequence(
+        der.integer(1),
+        der.set_of(digest_algorithm),
+        # Detached: the content type without the content
+        der.sequence(der.oid(ID_DATA)),
+        der.context(0, certificate),
+        der.set_of(signer_info),
+    )
+
+    return der.sequence(der.oid(ID_SIGNED_DATA), der.context(0, content))
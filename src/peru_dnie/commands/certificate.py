@@ -1,120 +1,369 @@
 # Standard Library
 from pathlib import Path
+from typing import Dict, Final, Tuple, Union
 
 # Third Party Library
-from rich.status import Status
 
 # First Party Library
-from peru_dnie.apdu import APDUCommand, APDUError
+from peru_dnie import der
+from peru_dnie.apdu import (
+    SHORT_MAX_LE,
+    APDUCommand,
+    APDUError,
+    APDUResponse,
+    APDUTemplate,
+    ResponseData,
+)
+from peru_dnie.cache import reader_identity
 from peru_dnie.constants import CERTIFICATE_FILE_ID, CertificateType
 from peru_dnie.context import Context
+from peru_dnie.exceptions import CardError
 from peru_dnie.i18n import t
+from peru_dnie.tracing import traced
 
 # Local Modules
-from .general import SELECT_PKI_APP_CMD
+from .general import select_pki_app
 
+# Le values tried when reading certificates, largest first, until the reader
+# and card accept one. Values over 256 need extended APDUs.
+READ_CHUNK_SIZES: Final = (0x1000, 0x0800, 0x0400, 0xFF)
 
-def extract_encryption_certificate(ctx: Context) -> bytes:
+# SW1 values telling that the requested length is not supported
+LENGTH_ERROR_SW1: Final = (0x67, 0x6C)
+
+# SW1 telling that the card has SW2 more response bytes for GET RESPONSE
+MORE_DATA_SW1: Final = 0x61
+
+READ_CHUNK_SIZE_ENTRY: Final = "read_chunk_size"
+
+SELECT_CERTIFICATE_CMDS: Final = {
+    cert_type: APDUCommand(
+        cla=0x00,
+        ins=0xA4,
+        p1=0x02,
+        p2=0x04,
+        lc=0x02,
+        data=bytes(file_id),
+    )
+    for cert_type, file_id in CERTIFICATE_FILE_ID.items()
+}
+
+# Certificates read from the card are returned in the buffer they were read
+# into, cached ones as bytes
+Certificate = Union[bytes, bytearray]
+
+# Chunk size accepted by each reader, by reader name
+_reader_chunk_sizes: Dict[str, int] = {}
+
+
+def extract_encryption_certificate(ctx: Context) -> Certificate:
     """Get encryption x509 certificate from DNIe"""
     return extract_certificate(ctx, CertificateType.ENCRYPTION)
 
 
-def extract_auth_certificate(ctx: Context) -> bytes:
+def extract_auth_certificate(ctx: Context) -> Certificate:
     """Get authentication x509 certificate from DNIe"""
     return extract_certificate(ctx, CertificateType.AUTHENTICATION)
 
 
-def extract_signature_certificate(ctx: Context) -> bytes:
+def extract_signature_certificate(ctx: Context) -> Certificate:
     return extract_certificate(ctx, CertificateType.SIGNATURE)
 
 
-def extract_certificate(ctx: Context, cert_type: CertificateType) -> bytes:
-    """Get x509 certificate from DNIe"""
+@traced("extract_certificate")
+def extract_certificate(ctx: Context, cert_type: CertificateType) -> Certificate:
+    """Get x509 certificate from DNIe
 
-    # Open PKI app
-    r = ctx.transmit(SELECT_PKI_APP_CMD)
+    The certificate is served from `ctx.cache` when it was already read from
+    the same card.
+    """
 
-    if ctx.cli.DEBUG:
-        print("Select PKI: '{r:!r}'")
+    cached = cached_certificate(ctx, cert_type)
+    if cached is not None:
+        ctx.cli.print(t["certificates"]["from_cache"])
+        return cached
 
-    if not r.ok:
-        raise APDUError(t["errors"]["could_not_select_pki"].format(repr(r)))
+    with ctx.exclusive():
+        certificate = read_certificate(ctx, cert_type)
+
+    cache_certificate(ctx, cert_type, certificate)
+
+    return certificate
+
+
+def cached_certificate(
+    ctx: Context, cert_type: CertificateType
+) -> Union[Certificate, None]:
+    """Certificate of the card of `ctx` in `ctx.cache`, if it was read before"""
+    if ctx.cache is None or ctx.card_id is None:
+        return None
+
+    return ctx.cache.get(ctx.card_id, _certificate_cache_name(cert_type))
+
+
+def cache_certificate(
+    ctx: Context, cert_type: CertificateType, certificate: Certificate
+) -> None:
+    if ctx.cache is not None and ctx.card_id is not None:
+        ctx.cache.put(ctx.card_id, _certificate_cache_name(cert_type), certificate)
+
+
+def read_certificate(ctx: Context, cert_type: CertificateType) -> Certificate:
+    """Read a certificate file from the card, in chunks"""
+
+    # Open PKI app
+    select_pki_app(ctx)
 
     # Select certificate
-    select_certificate_cmd = APDUCommand(
-        cla=0x00,
-        ins=0xA4,
-        p1=0x02,
-        p2=0x04,
-        lc=0x02,
-        data=bytes(CERTIFICATE_FILE_ID[cert_type]),
-    )
+    select_certificate(ctx, cert_type)
+
+    with ctx.cli.status(t["certificates"]["reading_cert"]):
+        certificate = _read_selected_file(ctx)
+
+    ctx.cli.print(t["certificates"]["success"])
+
+    return certificate
+
+
+def _read_selected_file(ctx: Context) -> bytearray:
+    """Read the selected file until the card reports its end"""
+    reader = _reader_name(ctx)
+    chunk_sizes = get_read_chunk_sizes(ctx, reader)
+
+    # Allocated once the first chunk tells the certificate size
+    output_certificate: Union[bytearray, None] = None
+    offset = 0
+    read_cert_apdu_command = read_certificate_template(chunk_sizes[0])
+    while True:
+        read_cert_apdu_command.set_field(offset)
+
+        try:
+            r = ctx.transmit(read_cert_apdu_command)
+        except CardError:
+            # Readers without extended APDU support may fail the exchange
+            if len(chunk_sizes) == 1:
+                raise
+            chunk_sizes = chunk_sizes[1:]
+            read_cert_apdu_command = read_certificate_template(chunk_sizes[0])
+            continue
+
+        if r.sw1 == MORE_DATA_SW1:
+            r = _get_response(ctx, r)
+
+        if len(chunk_sizes) > 1 and r.sw1 in LENGTH_ERROR_SW1:
+            chunk_sizes = chunk_sizes[1:]
+            read_cert_apdu_command = read_certificate_template(chunk_sizes[0])
+            continue
+
+        if len(chunk_sizes) > 1:
+            # First successful read, keep using this chunk size
+            chunk_sizes = chunk_sizes[:1]
+            set_read_chunk_size(ctx, reader, chunk_sizes[0])
+
+        if r.data is None:
+            raise APDUError(t["errors"]["could_not_read_cert"].format(repr(r)))
+
+        if ctx.cli.DEBUG:
+            print("-------------------")
+            print(f"Response '{r!r}'")
+            print("  ", "Data", bytes(r.data))
+            print("  ", "Offset:", hex(offset))
+            print("-------------------\n")
+
+        # Break if Status Word is found
+        if (r.sw1, r.sw2) == (0x62, 0x82):
+            if r.data:
+                chunk = _read_response_value(r.data)
+                if output_certificate is None:
+                    output_certificate = _certificate_buffer(chunk)
+                offset = _write_chunk(output_certificate, offset, chunk)
+            break
+
+        if not r.ok:
+            raise APDUError(t["errors"]["wrong_while_reading"].format(repr(r)))
+
+        chunk = _read_response_value(r.data)
+        if not chunk:
+            raise APDUError(t["errors"]["wrong_while_reading"].format(repr(r)))
+
+        if output_certificate is None:
+            output_certificate = _certificate_buffer(chunk)
+        offset = _write_chunk(output_certificate, offset, chunk)
+
+    if output_certificate is None:
+        return bytearray()
+
+    # Shorter than announced if the card stopped early
+    del output_certificate[offset:]
+    return output_certificate
+
+
+def extract_all_certificates(ctx: Context) -> Dict[CertificateType, Certificate]:
+    """Get every x509 certificate of the DNIe in a single card session
+
+    Certificates in `ctx.cache` are served from it. The card is only used for
+    the missing ones: the PKI app is selected once and each certificate file
+    is read in turn on the same connection.
+    """
+
+    certificates: Dict[CertificateType, Certificate] = {}
+    missing = []
+    for cert_type in CertificateType:
+        cached = cached_certificate(ctx, cert_type)
+        if cached is None:
+            missing.append(cert_type)
+        else:
+            ctx.cli.print(t["certificates"]["from_cache"])
+            certificates[cert_type] = cached
+
+    if missing:
+        with ctx.exclusive():
+            select_pki_app(ctx)
+
+            for cert_type in missing:
+                certificate = read_certificate(ctx, cert_type)
+                cache_certificate(ctx, cert_type, certificate)
+                certificates[cert_type] = certificate
+
+    return {cert_type: certificates[cert_type] for cert_type in CertificateType}
+
+
+@traced("select_certificate")
+def select_certificate(ctx: Context, cert_type: CertificateType) -> None:
+    """Select the certificate file, unless it is already selected"""
+    select_certificate_cmd = SELECT_CERTIFICATE_CMDS[cert_type]
+    if ctx.card_state.selected_file == select_certificate_cmd.data:
+        return
+
     r = ctx.transmit(select_certificate_cmd)
 
     if ctx.cli.DEBUG:
-        print(f"Select ({cert_type}) certificate APDU response: '{r:!r}'")
+        print(f"Select ({cert_type}) certificate APDU response: '{r!r}'")
 
     if not r.ok:
         raise APDUError(t["errors"]["could_not_select_cert"].format(repr(r)))
 
-    read_cert_apdu_command = APDUCommand(
+
+def read_certificate_command(offset: int, le: int) -> APDUCommand:
+    """READ BINARY (odd INS) of `le` bytes at `offset` of the selected file"""
+    return APDUCommand(
         cla=0x00,
         ins=0xB1,
         p1=0x00,
         p2=0x00,
         lc=0x04,
-        data=bytes([0x54, 0x02, 0x00, 0x00]),
-        le=0xFF,
+        data=bytes([0x54, 0x02]) + offset.to_bytes(length=2, byteorder="big"),
+        le=le,
     )
 
-    if read_cert_apdu_command.data is None:
-        raise TypeError(
-            f"Read certificate data APDU must have a data field '{read_cert_apdu_command:!r}'"
+
+def get_response_command(le: int) -> APDUCommand:
+    """GET RESPONSE of `le` bytes the card keeps for the previous command"""
+    return APDUCommand(cla=0x00, ins=0xC0, p1=0x00, p2=0x00, le=le)
+
+
+def read_certificate_template(le: int) -> APDUTemplate:
+    """`read_certificate_command` with the offset written by `set_field`"""
+    return APDUTemplate(read_certificate_command(0, le), data_offset=2, size=2)
+
+
+def get_read_chunk_sizes(ctx: Context, reader: Union[str, None]) -> Tuple[int, ...]:
+    """Chunk sizes to try, starting from the one known to work with `reader`"""
+    chunk_size = _reader_chunk_sizes.get(reader) if reader is not None else None
+
+    if chunk_size is None and reader is not None and ctx.cache is not None:
+        cached = ctx.cache.get(reader_identity(reader), READ_CHUNK_SIZE_ENTRY)
+        if cached is not None:
+            chunk_size = int.from_bytes(cached, byteorder="big")
+            _reader_chunk_sizes[reader] = chunk_size
+
+    if chunk_size is None:
+        return READ_CHUNK_SIZES
+
+    return (chunk_size,) + tuple(s for s in READ_CHUNK_SIZES if s < chunk_size)
+
+
+def set_read_chunk_size(
+    ctx: Context, reader: Union[str, None], chunk_size: int
+) -> None:
+    if reader is None or _reader_chunk_sizes.get(reader) == chunk_size:
+        return
+
+    _reader_chunk_sizes[reader] = chunk_size
+
+    if ctx.cache is not None:
+        ctx.cache.put(
+            reader_identity(reader),
+            READ_CHUNK_SIZE_ENTRY,
+            chunk_size.to_bytes(length=4, byteorder="big"),
         )
 
-    spinner = Status(t["certificates"]["reading_cert"], console=ctx.cli.console)
-    spinner.start()
 
-    output_certificate = b""
-    success = False
-    while True:
-        r = ctx.transmit(read_cert_apdu_command)
+def _get_response(ctx: Context, r: APDUResponse) -> APDUResponse:
+    """Complete a response the card announced as longer with SW1 0x61"""
+    data = bytearray(r.data or b"")
+    while r.sw1 == MORE_DATA_SW1:
+        # SW2 of zero stands for 256 bytes
+        r = ctx.transmit(get_response_command(r.sw2 or SHORT_MAX_LE))
+        data += r.data or b""
 
-        if r.data is None:
-            raise APDUError(t["errors"]["could_not_read_cert"].format(repr(r)))
+    return APDUResponse(sw1=r.sw1, sw2=r.sw2, data=bytes(data))
 
-        # First two bytes are the tag. Third byte is length (should be 0xe4).
-        # See TLV frame.
-        output_certificate += r.data[3:]
 
-        if ctx.cli.DEBUG:
-            print("-------------------")
-            print(f"Response '{r:!r}'")
-            print("  ", "Data", r.data)
-            print("  ", "Offset:", [hex(j) for j in read_cert_apdu_command.data])
-            print("-------------------\n")
+def _certificate_cache_name(cert_type: CertificateType) -> str:
+    return f"certificate_{cert_type.name.lower()}"
 
-        # Break if Status Word is found
-        if (r.sw1, r.sw2) == (0x62, 0x82):
-            success = True
-            break
 
-        if r.data[0] != 0x53 or not r.ok:
-            raise APDUError(t["errors"]["wrong_while_reading"].format(repr(r)))
+def _reader_name(ctx: Context) -> Union[str, None]:
+    if ctx.card is None:
+        return None
 
-        # Update reading command with new offset
-        offset = int.from_bytes(read_cert_apdu_command.data[2:]) + 0xE4
-        offset = offset.to_bytes(length=2, byteorder="big")
-        read_cert_apdu_command.data = read_cert_apdu_command.data[:2] + offset
+    return ctx.card.reader()
 
-    if success:
-        spinner.stop()
-        ctx.cli.console.print(t["certificates"]["success"])
-    else:
-        ctx.cli.console.print(t["certificates"]["failed"])
-        raise SystemExit()
 
-    return output_certificate
+def _certificate_buffer(first_chunk: ResponseData) -> bytearray:
+    """Buffer for the certificate, sized from the DER header of its first chunk
+
+    Data that is not a DER SEQUENCE gets an empty buffer that grows instead.
+    """
+    if first_chunk[:1] != bytes([der.SEQUENCE]):
+        return bytearray()
+
+    try:
+        _, start, length = der.read_header(first_chunk)
+    except der.DERError:
+        return bytearray()
+
+    return bytearray(max(start + length, len(first_chunk)))
+
+
+def _write_chunk(buffer: bytearray, offset: int, chunk: ResponseData) -> int:
+    """Copy `chunk` into `buffer` at `offset`, return the next offset
+
+    The slice assignment overwrites preallocated bytes in place and only
+    extends the buffer past its end.
+    """
+    end = offset + len(chunk)
+    buffer[offset:end] = chunk
+    return end
+
+
+def _read_response_value(data: ResponseData) -> memoryview:
+    """Value of the discretionary data object (tag 0x53) of a read response
+
+    A view over the response, not a copy.
+    """
+    if len(data) < 2 or data[0] != 0x53:
+        raise APDUError(t["errors"]["could_not_read_cert"].format(data.hex()))
+
+    # BER length: one byte, or 0x8N followed by N length bytes
+    length = data[1]
+    header = 2
+    if length & 0x80:
+        header += length & 0x7F
+        length = int.from_bytes(data[2:header], byteorder="big")
+
+    return memoryview(data)[header : header + length]
 
 
 def extract_certificate_to_file(
@@ -133,4 +382,15 @@ def extract_certificate_to_file(
         raise TypeError(t["errors"]["certificate_not_supported"])
 
     output_file.write_bytes(certificate)
-    ctx.cli.console.print(t["certificates"]["wrote_cert"].format(output_file.name))
+    ctx.cli.print(t["certificates"]["wrote_cert"].format(output_file.name))
+
+
+def extract_all_certificates_to_dir(ctx: Context, *, output_dir: Path) -> None:
+    """Write every certificate as `<type>.der` once all of them are read"""
+    certificates = extract_all_certificates(ctx)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for cert_type, certificate in certificates.items():
+        output_file = output_dir / f"{cert_type.name.lower()}.der"
+        output_file.write_bytes(certificate)
+        ctx.cli.print(t["certificates"]["wrote_cert"].format(output_file.name))
@@ -1,14 +1,19 @@
 # Standard Library
+import threading
 from enum import Enum
-from typing import Final
+from typing import Dict, Final, Union
 
 # Third Party Library
-from rich.prompt import Prompt
+from attrs import define, evolve, field
 
 # First Party Library
-from peru_dnie.apdu import APDUCommand
-from peru_dnie.context import Context
+from peru_dnie.apdu import APDUCommand, APDUError
+from peru_dnie.cache import card_identity
+from peru_dnie.cli_config import CliConfig
+from peru_dnie.context import Context, PinProvider
+from peru_dnie.exceptions import PinError
 from peru_dnie.i18n import t
+from peru_dnie.tracing import span, traced
 
 
 class PinType(Enum):
@@ -42,14 +47,120 @@ SELECT_PKI_APP_CMD: Final = APDUCommand(
     ),
 )
 
+# GlobalPlatform GET DATA for the Card Production Life Cycle data, which holds
+# the chip serial number
+GET_CPLC_DATA_CMD: Final = APDUCommand(
+    cla=0x80,
+    ins=0xCA,
+    p1=0x9F,
+    p2=0x7F,
+    le=0x00,
+)
+
+# The missing card identity is only reported once per process
+_warned_no_card_id = False
+
+
+@traced("read_card_id")
+def read_card_id(ctx: Context) -> Union[str, None]:
+    """Identify the card from its ATR and chip serial number
+
+    Must be sent before selecting an application. Returns None when the card
+    does not expose its production data, which disables what is kept per card.
+    """
+    global _warned_no_card_id
+
+    if ctx.card is None:
+        return None
+
+    r = ctx.transmit(GET_CPLC_DATA_CMD)
+
+    # Wrong Le, the card tells the right one in SW2
+    if r.sw1 == 0x6C:
+        r = ctx.transmit(evolve(GET_CPLC_DATA_CMD, le=r.sw2))
+
+    if not r.ok or not r.data:
+        if not _warned_no_card_id:
+            _warned_no_card_id = True
+            ctx.cli.print(t["init"]["no_card_id"])
+        return None
+
+    return card_identity(ctx.card.atr(), r.data)
+
+
+def needs_card_id(ctx: Context) -> bool:
+    """Cached card files are only valid for their card"""
+    return ctx.cache is not None
+
+
+def select_pki_app(ctx: Context) -> None:
+    """Open the PKI app, unless it is already the selected application"""
+    if ctx.card_state.application == SELECT_PKI_APP_CMD.data:
+        return
+
+    with span("select_pki_app"):
+        r = ctx.transmit(SELECT_PKI_APP_CMD)
+
+    if ctx.cli.DEBUG:
+        print(f"Select PKI: '{r!r}'")
+
+    if not r.ok:
+        raise APDUError(t["errors"]["could_not_select_pki"].format(repr(r)))
+
+
+def ask_pin(
+    cli: CliConfig, pin_provider: Union[PinProvider, None], pin_type: PinType
+) -> str:
+    """PIN from `pin_provider`, or asked on the console when interactive"""
+    if pin_provider is not None:
+        return pin_provider(pin_type)
+
+    if not cli.interactive:
+        raise PinError(t["errors"]["pin_needed"])
+
+    return cli.ask_password(t["general"]["enter_pin"])
+
+
+@define
+class RememberedPin:
+    """PIN provider asking on the main thread once, then reusing the PIN
+
+    For cards shared with worker threads, which verify the PIN again when
+    another process reset the card but must not prompt. A PIN rejected by the
+    card is forgotten.
+    """
+
+    cli: CliConfig
+    pin_provider: Union[PinProvider, None] = None
+    _pins: Dict[PinType, str] = field(init=False, factory=dict)
+
+    def __call__(self, pin_type: PinType) -> str:
+        pin = self._pins.get(pin_type)
+        if pin is not None:
+            return pin
+
+        if threading.current_thread() is not threading.main_thread():
+            raise PinError(t["errors"]["pin_needed"])
+
+        pin = ask_pin(self.cli, self.pin_provider, pin_type)
+        self._pins[pin_type] = pin
+        return pin
+
+    def forget(self, pin_type: PinType) -> None:
+        self._pins.pop(pin_type, None)
+
 
 def verify_pin(ctx: Context, *, pin_type: PinType) -> bool:
-    """Verify the PIN before a DNIe cryptographic operation"""
-    pin = Prompt.ask(
-        t["general"]["enter_pin"],
-        password=True,
-        console=ctx.cli.console,
-    )
+    """Verify the PIN before a DNIe cryptographic operation
+
+    The PIN comes from `ctx.pin_provider`, or is asked on the console. It is
+    not asked again while the card keeps it verified.
+    """
+    if pin_type.value in ctx.card_state.verified_pins:
+        return True
+
+    with span("pin_prompt"):
+        pin = ask_pin(ctx.cli, ctx.pin_provider, pin_type)
 
     encoded_pin = pin.encode("ascii")
 
@@ -62,9 +173,12 @@ def verify_pin(ctx: Context, *, pin_type: PinType) -> bool:
         data=encoded_pin,
     )
 
-    r = ctx.transmit(verify_command)
+    with span("verify_pin"):
+        r = ctx.transmit(verify_command)
 
     if not r.ok:
-        raise RuntimeError(t["errors"]["failed_pin"].format(repr(r)))
+        if isinstance(ctx.pin_provider, RememberedPin):
+            ctx.pin_provider.forget(pin_type)
+        raise PinError(t["errors"]["failed_pin"].format(repr(r)))
 
     return True
@@ -1,21 +1,61 @@
 # Standard Library
+import hashlib
+import sys
+from collections import deque
+from concurrent.futures import Future
+from contextlib import closing
+from datetime import datetime
 from enum import Enum
 from pathlib import Path
+from typing import BinaryIO, Callable, Deque, Final, List, Sequence, Tuple, Union
 
 # First Party Library
+from peru_dnie import cms, merkle
 from peru_dnie.apdu import APDUCommand, APDUError
+from peru_dnie.constants import CertificateType
 from peru_dnie.context import Context
 from peru_dnie.hashes import HashFunction
 from peru_dnie.i18n import t
+from peru_dnie.pipeline import HashingEngine
+from peru_dnie.pool import CardPool
+from peru_dnie.tracing import span
 
 # Local Modules
-from .general import SELECT_PKI_APP_CMD, PinType, verify_pin
+from .certificate import cache_certificate, cached_certificate, read_certificate
+from .general import PinType, select_pki_app, verify_pin
 
 
 class PaddingSchemes(str, Enum):
     PKCS1_15 = "pkcs1_15"
 
 
+# Set security enviroment for RSA signature, off-card hashing, and in card
+# padding. With these settings the card expects a hash with its corresponding
+# digest_info hash identifier. The padding bytes are added by the card.
+SET_SIGNATURE_ENVIRONMENT_CMD: Final = APDUCommand(
+    cla=0x00,
+    ins=0x22,
+    p1=0x41,
+    p2=0xB6,
+    lc=0x06,
+    data=bytes(
+        [
+            0x80,
+            0x01,
+            0x8A,
+            0x84,
+            0x01,
+            0x81,
+        ]
+    ),
+)
+
+
+# Makes the signature file contents of a digest on a prepared card, e.g.
+# `stored_or_compute_signature` for raw signatures or `compute_cms_signature`
+ComputeSignature = Callable[[Context, bytes], bytes]
+
+
 def build_signature_payload(
     input_bytes: bytes,
     hash_func: HashFunction,
@@ -29,9 +69,18 @@ def build_signature_payload(
     for filling with 0x00 0x01 0xff.. 0xff 0x00 digest_info.
     """
 
-    hashed_bytes = hash_func(input_bytes)
+    return build_digest_info(hash_func(input_bytes), hash_func, padding_scheme)
+
+
+def build_digest_info(
+    digest: bytes,
+    hash_func: HashFunction,
+    padding_scheme: PaddingSchemes,
+) -> bytes:
+    """Prepare the digest info payload for an already computed digest"""
+
     if padding_scheme == PaddingSchemes.PKCS1_15:
-        digest_info = hash_func.der_encoding() + hashed_bytes
+        digest_info = hash_func.der_encoding() + digest
     else:
         raise TypeError("Padding scheme not supported")
 
@@ -47,45 +96,80 @@ def sign_bytes(
     if ctx.hash_func is None:
         raise ValueError("A hash function is needed for a signature.")
 
-    pkcs1_15_padded_hash = build_signature_payload(
-        input_bytes,
-        ctx.hash_func,
-        PaddingSchemes.PKCS1_15,
-    )
+    return sign_digest(ctx, ctx.hash_func(input_bytes))
 
-    r = ctx.transmit(SELECT_PKI_APP_CMD)
 
-    if not r.ok:
-        raise APDUError(t["errors"]["could_not_select_pki"].format(repr(r)))
+def sign_stream(
+    ctx: Context,
+    stream: BinaryIO,
+) -> bytes:
+    """Sign a binary stream with the DNIe card, hashing it in chunks."""
+
+    if ctx.hash_func is None:
+        raise ValueError("A hash function is needed for a signature.")
+
+    return sign_digest(ctx, ctx.hash_func.hash_stream(stream))
+
+
+def sign_digest(
+    ctx: Context,
+    digest: bytes,
+) -> bytes:
+    """Sign a digest computed with the context hash function."""
+
+    with ctx.exclusive():
+        # Stored signatures do not need the PIN
+        signature = stored_signature(ctx, digest)
+        if signature is not None:
+            return signature
+
+        prepare_signature(ctx)
+
+        return compute_signature(ctx, digest)
+
+
+def prepare_signature(ctx: Context) -> None:
+    """Open the PKI app, verify the PIN and set the signature environment
+
+    After this, `compute_signature` can be called any number of times on the
+    same card session. Steps the card state shows as done are skipped.
+    """
+
+    select_pki_app(ctx)
 
     verify_pin(ctx, pin_type=PinType.SIGNATURE)
 
-    # Set security enviroment for RSA signature, off-card hashing, and in card
-    # padding. With these settings the card expects a hash with its corresponding
-    # digest_info hash identifier. The padding bytes are added by the card.
-    set_security_environment = APDUCommand(
-        cla=0x00,
-        ins=0x22,
-        p1=0x41,
-        p2=0xB6,
-        lc=0x06,
-        data=bytes(
-            [
-                0x80,
-                0x01,
-                0x8A,
-                0x84,
-                0x01,
-                0x81,
-            ]
-        ),
-    )
+    if ctx.card_state.security_environment == SET_SIGNATURE_ENVIRONMENT_CMD.serialize():
+        return
 
-    r = ctx.transmit(set_security_environment)
+    with span("set_security_environment"):
+        r = ctx.transmit(SET_SIGNATURE_ENVIRONMENT_CMD)
 
     if not r.ok:
         raise APDUError(t["errors"]["could_not_set_env"].format(repr(r)))
 
+
+def compute_signature(
+    ctx: Context,
+    digest: bytes,
+) -> bytes:
+    """Sign a digest on a card prepared with `prepare_signature`
+
+    The signature is added to `ctx.signature_store`, where callers look it up
+    first with `stored_signature`.
+    """
+
+    if ctx.hash_func is None:
+        raise ValueError("A hash function is needed for a signature.")
+
+    ctx.hash_func.check_digest(digest)
+
+    pkcs1_15_padded_hash = build_digest_info(
+        digest,
+        ctx.hash_func,
+        PaddingSchemes.PKCS1_15,
+    )
+
     signature_command = APDUCommand(
         cla=0x00,
         ins=0x2A,
@@ -95,12 +179,87 @@ def sign_bytes(
         data=pkcs1_15_padded_hash,
     )
 
-    r = ctx.transmit(signature_command)
+    with span("sign_apdu"):
+        r = ctx.transmit(signature_command)
 
     if not r.ok or r.data is None:
         raise APDUError(t["errors"]["could_not_sign"].format(repr(r)))
 
-    return r.data
+    signature = bytes(r.data)
+
+    if ctx.signature_store is not None:
+        ctx.signature_store.put(
+            signing_key_id(ctx), ctx.hash_func.name, digest, signature
+        )
+
+    return signature
+
+
+def stored_or_compute_signature(
+    ctx: Context,
+    digest: bytes,
+) -> bytes:
+    """`compute_signature`, unless `ctx.signature_store` has the signature"""
+
+    signature = stored_signature(ctx, digest)
+    if signature is not None:
+        return signature
+
+    return compute_signature(ctx, digest)
+
+
+def stored_signature(ctx: Context, digest: bytes) -> Union[bytes, None]:
+    """Signature of `digest` made earlier by the key of `ctx`, if stored"""
+
+    if ctx.signature_store is None or ctx.hash_func is None:
+        return None
+
+    return ctx.signature_store.get(signing_key_id(ctx), ctx.hash_func.name, digest)
+
+
+def signing_key_id(ctx: Context) -> str:
+    """SHA-256 fingerprint of the signing certificate, known once per card
+
+    The certificate comes from `ctx.cache` when it was read from the card
+    before, so stored signatures are found without using the card. A renewed
+    certificate comes with a new key on the same card, whose signatures
+    replace those of the old key in `ctx.signature_store`.
+    """
+    if ctx.signing_key_id is None:
+        certificate = cached_certificate(ctx, CertificateType.SIGNATURE)
+        if certificate is None:
+            with ctx.exclusive():
+                certificate = read_certificate(ctx, CertificateType.SIGNATURE)
+            cache_certificate(ctx, CertificateType.SIGNATURE, certificate)
+
+        ctx.signing_key_id = hashlib.sha256(certificate).hexdigest()
+
+        if ctx.signature_store is not None and ctx.card_id is not None:
+            ctx.signature_store.use_key(ctx.card_id, ctx.signing_key_id)
+
+    return ctx.signing_key_id
+
+
+def compute_cms_signature(
+    ctx: Context,
+    digest: bytes,
+    *,
+    certificate: bytes,
+    signing_time: Union[datetime, None] = None,
+) -> bytes:
+    """CMS detached signature (`.p7s`) of a document digest
+
+    The card signs the signed attributes holding `digest`. `certificate` is
+    the DER signing certificate of the card, as `extract_certificate` returns.
+    """
+
+    if ctx.hash_func is None:
+        raise ValueError("A hash function is needed for a signature.")
+
+    attributes = cms.signed_attributes(ctx.hash_func, digest, signing_time)
+    signature = compute_signature(ctx, ctx.hash_func(attributes))
+
+    return cms.signed_data(ctx.hash_func, certificate, attributes, signature)
 
 
 def sign_file(
@@ -108,11 +267,205 @@ def sign_file(
     *,
     input_file: Path,
     output_file: Path,
+    compute: ComputeSignature = stored_or_compute_signature,
+) -> None:
+    """Sign a file with the DNIe
+
+    The file is hashed in fixed-size chunks so memory usage does not depend on
+    its size. An `input_file` of `-` signs the data piped on stdin.
+    """
+
+    if ctx.hash_func is None:
+        raise ValueError("A hash function is needed for a signature.")
+
+    if str(input_file) == "-":
+        with span("hash_stdin"):
+            digest = ctx.hash_func.hash_stream(sys.stdin.buffer)
+    else:
+        digest = ctx.hash_func.hash_file(input_file)
+
+    with ctx.exclusive():
+        prepare_signature(ctx)
+
+        signature = compute(ctx, digest)
+
+    with span("write_output", file=str(output_file)):
+        output_file.write_bytes(signature)
+
+
+def sign_files(
+    ctx: Context,
+    jobs: Sequence[Tuple[Path, Path]],
+    *,
+    engine: Union[HashingEngine, None] = None,
+    compute: ComputeSignature = stored_or_compute_signature,
+) -> None:
+    """Sign many files in a single card session
+
+    `jobs` pairs every input file with its output signature file. The PKI app,
+    PIN and security environment are set once, and the next files are hashed
+    by `engine` while the card signs the current one.
+    """
+
+    if ctx.hash_func is None:
+        raise ValueError("A hash function is needed for a signature.")
+
+    if not jobs:
+        return
+
+    if engine is None:
+        engine = HashingEngine(ctx.hash_func)
+
+    digests = engine.digests(input_file for input_file, _ in jobs)
+
+    with closing(digests), ctx.exclusive():
+        prepare_signature(ctx)
+
+        for (_, output_file), (_, digest) in zip(jobs, digests):
+            signature = compute(ctx, digest)
+            with span("write_output", file=str(output_file)):
+                output_file.write_bytes(signature)
+
+
+def sign_files_merkle(
+    ctx: Context,
+    jobs: Sequence[Tuple[Path, Path]],
+    *,
+    engine: Union[HashingEngine, None] = None,
+) -> bytes:
+    """Sign many files with a single card signature over a Merkle tree
+
+    `jobs` pairs every input file with its output inclusion proof file. The
+    card signs the tree root once, as a digest, and every proof holds that
+    signature and the audit path of its file. Returns the root.
+    """
+
+    if ctx.hash_func is None:
+        raise ValueError("A hash function is needed for a signature.")
+
+    if engine is None:
+        engine = HashingEngine(ctx.hash_func)
+
+    digests = engine.digests(input_file for input_file, _ in jobs)
+    with closing(digests), span("hash", files=len(jobs)):
+        levels = merkle.tree_levels(ctx.hash_func, [digest for _, digest in digests])
+
+    # The root has the size of a digest, the card signs it as one
+    root = levels[-1][0]
+    signature = sign_digest(ctx, root)
+
+    with span("write_output", files=len(jobs)):
+        for leaf_index, (_, output_file) in enumerate(jobs):
+            proof = merkle.InclusionProof(
+                hash_algorithm=ctx.hash_func.name,
+                leaf_index=leaf_index,
+                tree_size=len(jobs),
+                path=merkle.audit_path(levels, leaf_index),
+                signature=signature,
+            )
+            output_file.write_text(proof.to_json())
+
+    return root
+
+
+def sign_digests(
+    ctx: Context,
+    jobs: Sequence[Tuple[bytes, Path]],
+) -> None:
+    """Sign digests computed elsewhere in a single card session
+
+    `jobs` pairs every digest with its output signature file. All the digests
+    are checked before the card is used.
+    """
+
+    if ctx.hash_func is None:
+        raise ValueError("A hash function is needed for a signature.")
+
+    for digest, _ in jobs:
+        ctx.hash_func.check_digest(digest)
+
+    if not jobs:
+        return
+
+    with ctx.exclusive():
+        prepare_signature(ctx)
+
+        for digest, output_file in jobs:
+            signature = stored_or_compute_signature(ctx, digest)
+            with span("write_output", file=str(output_file)):
+                output_file.write_bytes(signature)
+
+
+def parse_digest(hex_digest: str) -> bytes:
+    try:
+        return bytes.fromhex(hex_digest)
+    except ValueError:
+        raise ValueError(t["errors"]["invalid_digest"].format(hex_digest)) from None
+
+
+def read_digest_manifest(manifest_file: Path) -> List[Tuple[bytes, Path]]:
+    """Read the digest and output file pairs of a manifest
+
+    Every line has a hex digest and the output signature file, separated by
+    whitespace. Relative outputs are relative to the manifest directory. Empty
+    lines and lines starting with # are skipped.
+    """
+
+    jobs = []
+    with manifest_file.open() as manifest:
+        for line_number, line in enumerate(manifest, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+
+            fields = line.split(maxsplit=1)
+            if len(fields) != 2:
+                raise ValueError(
+                    t["errors"]["invalid_manifest_line"].format(
+                        manifest_file, line_number
+                    )
+                )
+
+            hex_digest, output_file = fields
+            jobs.append((parse_digest(hex_digest), manifest_file.parent / output_file))
+
+    return jobs
+
+
+def _signature_job(
+    compute: ComputeSignature, digest: bytes
+) -> Callable[[Context], bytes]:
+    return lambda ctx: compute(ctx, digest)
+
+
+def sign_files_with_pool(
+    pool: CardPool,
+    jobs: Sequence[Tuple[Path, Path]],
+    *,
+    engine: HashingEngine,
+    compute: ComputeSignature = stored_or_compute_signature,
 ) -> None:
-    """Sign a file with the DNIe"""
+    """Sign many files spreading the signatures over the cards of `pool`
+
+    The pool must be started with `prepare_signature` as initializer.
+    """
+
+    max_pending = 2 * len(pool.contexts)
+    pending: Deque[Tuple[Path, "Future[bytes]"]] = deque()
+
+    def write_signature() -> None:
+        output_file, future = pending.popleft()
+        output_file.write_bytes(future.result())
+
+    digests = engine.digests(input_file for input_file, _ in jobs)
 
-    input_bytes = input_file.read_bytes()
+    with closing(digests):
+        for (_, output_file), (_, digest) in zip(jobs, digests):
+            future = pool.submit(_signature_job(compute, digest))
+            pending.append((output_file, future))
 
-    signature = sign_bytes(ctx, input_bytes)
+            if len(pending) >= max_pending:
+                write_signature()
 
-    output_file.write_bytes(signature)
+        while pending:
+            write_signature()
@@ -1,9 +1,27 @@
 # Standard Library
+import os
 from enum import Enum, auto
-from typing import Final
+from typing import Final, Literal
 
 MODULUS_SIZE: Final = 256
 
+HashTypes = Literal["sha224", "sha256", "sha384", "sha512"]
+
+# Maximum number of digests waiting for the card. Hashing runs ahead of the
+# signature operations by at most this many files.
+DEFAULT_MAX_PENDING: Final = 4
+
+DEFAULT_HASH_WORKERS: Final = os.cpu_count() or 1
+
+# Seconds to wait for a DNIe to be inserted
+CARD_WAIT_TIMEOUT: Final = 120
+
+# Seconds to wait for other processes using the same reader
+CARD_QUEUE_TIMEOUT: Final = 300
+
+# Upper bound for the file data held in hashing buffers at the same time
+DEFAULT_MAX_IN_FLIGHT_BYTES: Final = 64 * 1024 * 1024
+
 DER_HASH_ALGORITHM_ENCODINGS: Final = {
     "sha224": bytes(
         [
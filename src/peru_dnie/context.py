@@ -1,32 +1,165 @@
 # Standard Library
-from typing import Union
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from typing import TYPE_CHECKING, Any, Callable, Iterator, List, Union
 
 # Third Party Library
-from attrs import define
+from attrs import define, field
 
 # First Party Library
-from peru_dnie.apdu import APDUCommand, APDUResponse
-from peru_dnie.card import SmartCard
+from peru_dnie.apdu import APDUResponse, Command
+from peru_dnie.cache import CardFileCache
+from peru_dnie.card import CardState, SmartCard
 from peru_dnie.cli_config import CLI_CONFIG, CliConfig
 from peru_dnie.hashes import HashFunction
 from peru_dnie.i18n import t
+from peru_dnie.metrics import ApduMetrics
+
+if TYPE_CHECKING:
+    # First Party Library
+    from peru_dnie.commands.general import PinType
+    from peru_dnie.coordination import CardQueue
+    from peru_dnie.simulator import TraceExchange
+    from peru_dnie.store import SignatureStore
+
+# Gives the PIN of a type, e.g. from a secret store
+PinProvider = Callable[["PinType"], str]
+
+
+def _recording_card(
+    ctx: "Context", card: Union[SmartCard, None]
+) -> Union[SmartCard, None]:
+    if card is None or ctx.recorded_exchanges is None:
+        return card
+
+    from peru_dnie.simulator import RecordingSmartCard
+
+    if isinstance(card, RecordingSmartCard):
+        return card
+
+    return RecordingSmartCard(card=card, trace=ctx.recorded_exchanges)
+
+
+def _reset_card_state(
+    ctx: "Context", _: Any, card: Union[SmartCard, None]
+) -> Union[SmartCard, None]:
+    ctx.card_state.reset()
+    ctx.signing_key_id = None
+    return _recording_card(ctx, card)
 
 
 @define
 class Context:
     hash_func: Union[HashFunction, None] = None
-    card: Union[SmartCard, None] = None
+    card: Union[SmartCard, None] = field(default=None, on_setattr=_reset_card_state)
     cli: CliConfig = CLI_CONFIG
+    cache: Union[CardFileCache, None] = None
+    card_id: Union[str, None] = None
+    metrics: Union[ApduMetrics, None] = None
+    card_state: CardState = field(factory=CardState)
+    signature_store: Union["SignatureStore", None] = None
+    # Fingerprint of the signing certificate, keys `signature_store`
+    signing_key_id: Union[str, None] = None
+    card_queue: Union["CardQueue", None] = None
+    # The PIN is asked on `cli` when there is no provider
+    pin_provider: Union[PinProvider, None] = None
+    # Every exchange with the card is appended here when set
+    recorded_exchanges: Union[List["TraceExchange"], None] = None
+    # Owned by one thread at a time, which may nest `exclusive` calls
+    _exclusive_lock: threading.Lock = field(init=False, factory=threading.Lock)
+    _exclusive_local: threading.local = field(init=False, factory=threading.local)
 
-    def transmit(self, command: APDUCommand) -> APDUResponse:
+    def __attrs_post_init__(self) -> None:
+        if self.recorded_exchanges is not None:
+            self.card = _recording_card(self, self.card)
+
+    def transmit(self, command: Command) -> APDUResponse:
         if self.card is None:
             raise RuntimeError(t["errors"]["dnie_not_init"])
-        return self.card.transmit(command)
+
+        try:
+            if self.metrics is None:
+                r = self.card.transmit(command)
+            else:
+                r = self._measured_transmit(self.card, self.metrics, command)
+        except Exception:
+            # The card may have been reset or removed
+            self.card_state.reset()
+            raise
+
+        self.card_state.update(command, r)
+
+        return r
+
+    @contextmanager
+    def exclusive(self) -> Iterator[None]:
+        """Keep the card for a sequence of APDUs
+
+        Other processes wait in `card_queue`, and other PC/SC clients wait for
+        the card transaction to end. When another process used the card in
+        between, the card state is forgotten. Nested calls on the thread holding
+        the card reuse the outer one, other threads wait.
+        """
+        local = self._exclusive_local
+        depth = getattr(local, "depth", 0)
+        if depth > 0 or self.card is None:
+            local.depth = depth + 1
+            try:
+                yield
+            finally:
+                local.depth = depth
+            return
+
+        with ExitStack() as stack:
+            # Other threads of this process wait for the owner to finish
+            stack.enter_context(self._exclusive_lock)
+
+            if self.card_queue is not None:
+                if stack.enter_context(self.card_queue.hold(self.card.reader())):
+                    self.card_state.reset()
+
+            stack.enter_context(self.card.transaction())
+
+            local.depth = 1
+            try:
+                yield
+            finally:
+                local.depth = 0
+
+    def _measured_transmit(
+        self,
+        card: SmartCard,
+        metrics: ApduMetrics,
+        command: Command,
+    ) -> APDUResponse:
+        start = time.perf_counter()
+        try:
+            r = card.transmit(command)
+        except Exception:
+            metrics.record(
+                command.ins,
+                len(command.serialize()),
+                0,
+                None,
+                time.perf_counter() - start,
+            )
+            raise
+
+        metrics.record(
+            command.ins,
+            len(command.serialize()),
+            (len(r.data) if r.data is not None else 0) + 2,
+            (r.sw1 << 8) | r.sw2,
+            time.perf_counter() - start,
+        )
+
+        return r
 
 
 @define
 class FakeContext(Context):
-    def transmit(self, command: APDUCommand):
+    def transmit(self, command: Command):
         if command.serialize()[:4] == bytes([0x00, 0x2A, 0x9E, 0x9A]):
             data = b"\xff" * 10
         else:
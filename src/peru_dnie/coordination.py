@@ -0,0 +1,131 @@
+# Standard Library
+import hashlib
+import itertools
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Final, Iterator, List, Union
+
+# Third Party Library
+from attrs import define
+
+# First Party Library
+from peru_dnie.constants import CARD_QUEUE_TIMEOUT
+from peru_dnie.exceptions import CardError
+from peru_dnie.i18n import t
+from peru_dnie.tracing import span
+
+_TICKET_SUFFIX: Final = ".ticket"
+_LAST_HOLDER: Final = "last_holder"
+
+# Tickets of the same process and nanosecond still get distinct names
+_ticket_counter = itertools.count()
+
+
+def get_default_queue_dir() -> Path:
+    runtime_dir = os.getenv("XDG_RUNTIME_DIR", None)
+    if runtime_dir is not None:
+        return Path(runtime_dir) / "peru_dnie-queue"
+
+    return Path(tempfile.gettempdir()) / f"peru_dnie-{os.getuid()}-queue"
+
+
+DEFAULT_QUEUE_DIR: Final = get_default_queue_dir()
+
+
+@define
+class CardQueue:
+    """First come, first served access to each reader, across processes
+
+    Every caller leaves a ticket file in the directory of the reader and
+    holds the card once its ticket is the oldest one. Tickets left by
+    processes that died are removed, and a caller gives up after `timeout`
+    seconds with `CardError`.
+    """
+
+    directory: Path = DEFAULT_QUEUE_DIR
+    timeout: Union[float, None] = CARD_QUEUE_TIMEOUT
+    poll_interval: float = 0.05
+
+    @contextmanager
+    def hold(self, reader: str) -> Iterator[bool]:
+        """Wait for the turn of this caller on `reader`
+
+        Yields whether another process used the reader since this one last
+        held it, so what this process knows of the card state is stale.
+        """
+        reader_dir = self.directory / hashlib.sha256(reader.encode()).hexdigest()[:16]
+        reader_dir.mkdir(parents=True, exist_ok=True, mode=0o700)
+
+        ticket = reader_dir / (
+            f"{time.time_ns():020d}-{os.getpid()}-{threading.get_ident()}"
+            f"-{next(_ticket_counter)}{_TICKET_SUFFIX}"
+        )
+        ticket.touch(exist_ok=False)
+
+        try:
+            with span("card_queue", reader=reader):
+                self._wait_turn(reader, ticket)
+
+            last_holder = reader_dir / _LAST_HOLDER
+            try:
+                stale = last_holder.read_text() != str(os.getpid())
+            except FileNotFoundError:
+                stale = True
+
+            try:
+                yield stale
+            finally:
+                last_holder.write_text(str(os.getpid()))
+        finally:
+            ticket.unlink(missing_ok=True)
+
+    def _wait_turn(self, reader: str, ticket: Path) -> None:
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+
+        while True:
+            ahead = [other for other in _tickets(ticket.parent) if other < ticket.name]
+            if not _remove_dead(ticket.parent, ahead):
+                return
+
+            if deadline is not None and time.monotonic() >= deadline:
+                raise CardError(
+                    t["errors"]["card_queue_timeout"].format(reader, self.timeout)
+                )
+
+            time.sleep(self.poll_interval)
+
+
+def _tickets(reader_dir: Path) -> List[str]:
+    return [
+        entry.name
+        for entry in os.scandir(reader_dir)
+        if entry.name.endswith(_TICKET_SUFFIX)
+    ]
+
+
+def _remove_dead(reader_dir: Path, tickets: List[str]) -> List[str]:
+    """Remove the tickets of processes that are gone, return the others"""
+    alive = []
+    for name in tickets:
+        if _process_alive(int(name.split("-")[1])):
+            alive.append(name)
+        else:
+            (reader_dir / name).unlink(missing_ok=True)
+
+    return alive
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Owned by another user
+        return True
+
+    return True
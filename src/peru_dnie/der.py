@@ -0,0 +1,153 @@
+"""Minimal DER encoder and parser for the structures handled by the DNIe
+
+Only what CMS signatures and X.509 certificates need, not a general ASN.1
+library.
+"""
+
+# Standard Library
+from datetime import datetime, timezone
+from typing import Final, Iterator, List, Tuple, Union
+
+# First Party Library
+from peru_dnie.i18n import t
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+# Universal tags
+INTEGER: Final = 0x02
+BIT_STRING: Final = 0x03
+OCTET_STRING: Final = 0x04
+NULL: Final = 0x05
+OBJECT_IDENTIFIER: Final = 0x06
+UTC_TIME: Final = 0x17
+GENERALIZED_TIME: Final = 0x18
+SEQUENCE: Final = 0x30
+SET: Final = 0x31
+
+
+class DERError(ValueError):
+    """Malformed DER data"""
+
+
+def encode_length(length: int) -> bytes:
+    if length < 0x80:
+        return bytes([length])
+
+    length_bytes = length.to_bytes((length.bit_length() + 7) // 8, byteorder="big")
+    return bytes([0x80 | len(length_bytes)]) + length_bytes
+
+
+def tlv(tag: int, value: bytes) -> bytes:
+    return bytes([tag]) + encode_length(len(value)) + value
+
+
+def sequence(*items: bytes) -> bytes:
+    return tlv(SEQUENCE, b"".join(items))
+
+
+def set_of(*items: bytes) -> bytes:
+    """SET OF, with its items sorted as DER requires"""
+    return tlv(SET, b"".join(sorted(items)))
+
+
+def context(number: int, value: bytes, constructed: bool = True) -> bytes:
+    """Context specific tag [number], implicit unless `value` is a TLV"""
+    return tlv((0xA0 if constructed else 0x80) | number, value)
+
+
+def integer(value: int) -> bytes:
+    length = value.bit_length() // 8 + 1
+    return tlv(INTEGER, value.to_bytes(length, byteorder="big", signed=True))
+
+
+def octet_string(value: bytes) -> bytes:
+    return tlv(OCTET_STRING, value)
+
+
+def null() -> bytes:
+    return tlv(NULL, b"")
+
+
+def oid(dotted: str) -> bytes:
+    arcs = [int(arc) for arc in dotted.split(".")]
+    encoded = bytearray([40 * arcs[0] + arcs[1]])
+
+    for arc in arcs[2:]:
+        chunk = [arc & 0x7F]
+        arc >>= 7
+        while arc:
+            chunk.append(0x80 | (arc & 0x7F))
+            arc >>= 7
+        encoded += bytes(reversed(chunk))
+
+    return tlv(OBJECT_IDENTIFIER, bytes(encoded))
+
+
+def timestamp(value: datetime) -> bytes:
+    """UTCTime until 2049 and GeneralizedTime after, as X.509 and CMS do"""
+    value = value.astimezone(timezone.utc)
+    if value.year < 2050:
+        return tlv(UTC_TIME, value.strftime("%y%m%d%H%M%SZ").encode("ascii"))
+    return tlv(GENERALIZED_TIME, value.strftime("%Y%m%d%H%M%SZ").encode("ascii"))
+
+
+def read_header(data: Buffer, offset: int = 0) -> Tuple[int, int, int]:
+    """Tag, value start and value length of the TLV at `offset`
+
+    Only the header must be in `data`, e.g. the first chunk of a file.
+    """
+    try:
+        tag = data[offset]
+        length = data[offset + 1]
+        start = offset + 2
+
+        if length & 0x80:
+            size = length & 0x7F
+            if size == 0 or size > 4:
+                raise DERError(t["errors"]["der_unsupported_length"])
+            if start + size > len(data):
+                raise IndexError
+            length = int.from_bytes(data[start : start + size], byteorder="big")
+            start += size
+    except IndexError:
+        raise DERError(t["errors"]["der_truncated"]) from None
+
+    return tag, start, length
+
+
+def read_tlv(data: Buffer, offset: int = 0) -> Tuple[int, int, int]:
+    """Tag, value start and value end of the TLV at `offset`"""
+    tag, start, length = read_header(data, offset)
+
+    end = start + length
+    if end > len(data):
+        raise DERError(t["errors"]["der_truncated"])
+
+    return tag, start, end
+
+
+def children(data: bytes, start: int, end: int) -> Iterator[Tuple[int, int, int, int]]:
+    """Tag, TLV start, value start and value end of each TLV in a range"""
+    offset = start
+    while offset < end:
+        tag, value_start, value_end = read_tlv(data, offset)
+        yield tag, offset, value_start, value_end
+        offset = value_end
+
+
+def elements(data: bytes) -> List[bytes]:
+    """Complete TLVs inside a constructed TLV (e.g. a SEQUENCE)"""
+    _, start, end = read_tlv(data)
+    return [
+        data[offset:value_end] for _, offset, _, value_end in children(data, start, end)
+    ]
+
+
+def value(data: bytes) -> bytes:
+    """Value of a single TLV"""
+    _, start, end = read_tlv(data)
+    return data[start:end]
+
+
+def decode_integer(data: bytes) -> int:
+    return int.from_bytes(value(data), byteorder="big", signed=True)
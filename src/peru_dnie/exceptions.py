@@ -1,2 +1,14 @@
 class CardError(Exception):
     """Card runtime errors"""
+
+
+class ServerError(Exception):
+    """Errors reported by the signing server"""
+
+
+class OperationCancelled(Exception):
+    """A card operation was cancelled before it finished"""
+
+
+class PinError(Exception):
+    """The PIN could not be obtained or the card rejected it"""
@@ -1,14 +1,36 @@
 # Standard Library
 import hashlib
-from typing import Literal
+import os
+from pathlib import Path
+from typing import Any, BinaryIO, Union
 
 # Third Party Library
 from attrs import define
 
 # First Party Library
-from peru_dnie.constants import DER_HASH_ALGORITHM_ENCODINGS
+from peru_dnie.constants import DER_HASH_ALGORITHM_ENCODINGS, HashTypes
+from peru_dnie.i18n import t
+from peru_dnie.tracing import span
 
-HashTypes = Literal["sha224", "sha256", "sha384", "sha512"]
+# Size of the buffer reused while hashing files and streams. Memory usage stays
+# bounded by this value regardless of the size of the input.
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+ByteBuffer = Union[bytes, bytearray, memoryview]
+
+
+@define
+class Hasher:
+    """Incremental hasher returned by `HashFunction.new`"""
+
+    _hash: Any
+
+    def update(self, data: ByteBuffer) -> None:
+        self._hash.update(data)
+
+    def finalize(self) -> bytes:
+        digest: bytes = self._hash.digest()
+        return digest
 
 
 @define
@@ -18,6 +40,57 @@ class HashFunction:
     def der_encoding(self) -> bytes:
         return DER_HASH_ALGORITHM_ENCODINGS[self.name]
 
+    @property
+    def digest_size(self) -> int:
+        return hashlib.new(self.name).digest_size
+
+    def check_digest(self, digest: bytes) -> None:
+        """Raise ValueError if `digest` cannot come from this hash function"""
+        if len(digest) != self.digest_size:
+            raise ValueError(
+                t["errors"]["wrong_digest_length"].format(
+                    len(digest), self.name, self.digest_size
+                )
+            )
+
+    def new(self) -> Hasher:
+        """Start an incremental hash computation"""
+        if self.name not in DER_HASH_ALGORITHM_ENCODINGS:
+            raise TypeError("Hash function not supported")
+
+        return Hasher(hashlib.new(self.name))
+
+    def hash_stream(
+        self,
+        stream: BinaryIO,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> bytes:
+        """Hash a binary stream in fixed-size chunks"""
+        hasher = self.new()
+        buffer = bytearray(chunk_size)
+        view = memoryview(buffer)
+
+        while True:
+            read = stream.readinto(view)  # type: ignore[attr-defined]
+            if not read:
+                break
+            hasher.update(view[:read])
+
+        return hasher.finalize()
+
+    def hash_file(self, path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> bytes:
+        """Hash a file without loading it in memory
+
+        Files smaller than `chunk_size` get a buffer of their own size.
+        """
+        with span("hash_file", path=str(path)), path.open("rb") as stream:
+            # Some special files report a size of 0 and still have data
+            size = os.fstat(stream.fileno()).st_size
+            if 0 < size < chunk_size:
+                chunk_size = size
+
+            return self.hash_stream(stream, chunk_size)
+
     def __call__(self, input_bytes: bytes) -> bytes:
         if self.name == "sha224":
             return hash_sha224(input_bytes)
@@ -26,7 +99,7 @@ class HashFunction:
         elif self.name == "sha384":
             return hash_sha384(input_bytes)
         elif self.name == "sha512":
-            return hash_sha384(input_bytes)
+            return hash_sha512(input_bytes)
         else:
             raise TypeError("Hash function not supported")
 
@@ -0,0 +1,125 @@
+MESSAGES = {
+    "cli": {
+        "sign": {
+            "sign_help": "Sign with the DNIe",
+            "input_file_help": "Files, directories or glob patterns to sign, or - to read from stdin",
+            "output_file_help": "Output signature file, or output directory when signing several files",
+            "hash_algorithm_help": "Hash algorithm for the signature",
+            "suffix_help": "Suffix of the signature files when signing several files, .sig, .p7s or .proof by default",
+            "hash_workers_help": "Number of threads hashing files when signing several files",
+            "hash_memory_help": "Maximum memory in MiB used by the hashing buffers",
+            "all_readers_help": "Spread the signatures over the DNIe cards of all readers",
+            "format_help": "Signature format: raw RSA signature, CMS/PKCS#7 detached signature (.p7s) with the signing certificate, or one signature of a Merkle tree with an inclusion proof (.proof) per file",
+        },
+        "sign_digest": {
+            "sign_digest_help": "Sign digests computed elsewhere, without the documents",
+            "digest_help": "Hex digest to sign",
+            "digest_file_help": "File with the binary digest to sign, or - to read it from stdin",
+            "manifest_help": "File with one hex digest and output signature file per line",
+            "output_file_help": "Output signature file, not needed with --manifest",
+        },
+        "extract": {
+            "extract_help": "Extract certificates from the DNIe",
+            "certificate_type_help": "Type of certificate to extract: signature, encryption, authentication or all of them",
+            "output_file_help": "Output public certificate file, or output directory for all of them",
+            "no_cache_help": "Always read the certificate from the card and do not cache it",
+            "refresh_help": "Discard the cached files of the card before reading",
+        },
+        "serve": {
+            "serve_help": "Keep the DNIe session open and serve signatures over a Unix socket",
+            "monitor_help": "Watch all readers and switch to the next DNIe inserted when the card is removed",
+            "socket_help": "Path of the Unix socket to listen on",
+        },
+        "verify": {
+            "verify_help": "Verify signatures offline with the certificate extracted from the DNIe",
+            "certificate_help": "Signature certificate, DER or PEM",
+            "input_file_help": "Signed files, directories or glob patterns",
+            "signatures_help": "Directory with the signature files, next to each file by default",
+            "suffix_help": "Suffix of the signature files, .sig or .proof by default",
+            "format_help": "Signature format: raw RSA signatures or Merkle inclusion proofs",
+        },
+        "clear_cache": {
+            "clear_cache_help": "Remove the cached certificates of all cards",
+        },
+        "program_description": "Utilities for the Peruvian DNIe Smart Card cryptographic functions",
+        "available_tasks": "Available DNIe tasks",
+        "metrics_help": "Write APDU latency and error metrics to this file when the command ends",
+        "metrics_format_help": "Format of the metrics file",
+        "signature_store_help": "Reuse the signatures already made by the card for the same digest, stored in this SQLite file or in the cache directory",
+        "queue_timeout_help": "Seconds to wait while other processes use the same card reader",
+        "no_queue_help": "Do not wait in line for other processes using the same card reader",
+        "trace_help": "Save the time spent in each phase of the command to this file, in the Chrome trace format that Perfetto opens",
+        "record_trace_help": "Record the APDUs exchanged with the card in this file, the PIN is not recorded",
+    },
+    "init": {
+        "choose_reader": "Choose reader",
+        "readers": "[bold underline]Readers:",
+        "waiting_dnie": "Waiting for DNIe...",
+        "found_dnie": "[green]Found DNIe V2",
+        "no_card_id": "[yellow]The card does not report its serial number, so the certificate cache and the signature store are disabled",
+        "found_dnies": "[green]Found {} DNIe V2 cards",
+        "preparing_reader": "[bold]Reader {}",
+        "reader_usage": "{}: {} signatures, {} failures, {:.0%} busy",
+    },
+    "certificates": {
+        "reading_cert": "Reading signature certificate...",
+        "success": "[green]Certificate successfully loaded",
+        "wrote_cert": "[green]Wrote certificate to '{}'",
+        "from_cache": "[green]Certificate loaded from cache",
+    },
+    "general": {
+        "enter_pin": "Please enter your PIN",
+    },
+    "serve": {
+        "listening": "[green]Listening on '{}'",
+    },
+    "verify": {
+        "valid": "[green]OK[/] {}",
+        "invalid": "[red]FAILED[/] {}: {}",
+        "summary": "{} valid, {} invalid",
+        "missing_file": "file not found",
+        "missing_signature": "signature file not found",
+        "bad_signature": "signature does not match",
+    },
+    "errors": {
+        "lc_must_none": "'lc' must be None if 'data' is None",
+        "lc_must_length": "'lc' must be the length of 'data'",
+        "lc_out_of_range": "'lc' must be between 1 and 65535",
+        "template_field_out_of_range": "The template field must be inside the command data",
+        "le_out_of_range": "'le' must be between 0 and 65536",
+        "dnie_not_init": "DNIe card is not initialized",
+        "dnie_not_found": "Could not find DNIe",
+        "card_queue_timeout": "The card in '{}' is still in use by other processes after {} seconds",
+        "transmit_failed": "Could not exchange APDU with the card: '{}'",
+        "could_not_select_pki": "Could not select PKI app: '{}'",
+        "could_not_select_cert": "Could not select signature certificate file: '{}'",
+        "could_not_read_cert": "Could not read certificate: '{}'",
+        "wrong_while_reading": "Something went wrong while reading the certificate: '{}'",
+        "certificate_not_supported": "Certificate type extraction not supported",
+        "pin_needed": "A PIN is needed but there is no PIN provider",
+        "pin_env_missing": "The environment variable '{}' with the PIN is not set",
+        "failed_pin": "Failed to verify PIN: '{}'",
+        "could_not_set_env": "Could not set security environment: '{}'",
+        "could_not_sign": "Could not sign payload: '{}'",
+        "input_not_found": "Input file not found: '{}'",
+        "duplicated_output": "Several inputs would write the same signature file: '{}'",
+        "hash_workers_positive": "The number of hashing workers must be at least 1",
+        "no_cards_available": "No DNIe card is available",
+        "operation_cancelled": "The card operation was cancelled",
+        "der_truncated": "Truncated DER data",
+        "der_unsupported_length": "Unsupported DER length",
+        "wrong_digest_length": "Digest has {} bytes, {} digests have {} bytes",
+        "invalid_digest": "Not a hex digest: '{}'",
+        "invalid_manifest_line": "{}, line {}: expected a hex digest and an output file",
+        "digest_output_needed": "An output file is needed with --digest and --digest-file",
+        "merkle_stdin": "Standard input cannot be signed with --format merkle",
+        "not_rsa_certificate": "The certificate does not hold an RSA public key",
+        "invalid_proof": "Malformed Merkle inclusion proof",
+        "empty_merkle_tree": "A Merkle tree needs at least one document",
+        "server_missing_input": "A sign request needs a 'digest' or a 'path'",
+        "server_unknown_op": "Unknown request operation: '{}'",
+        "server_running": "A server is already listening on '{}'",
+        "server_closed": "The signing server closed the connection",
+        "server_card_changed": "A different DNIe was inserted, its PIN can only be entered when the server starts",
+    },
+}
@@ -0,0 +1,125 @@
+MESSAGES = {
+    "cli": {
+        "sign": {
+            "sign_help": "Firmar con el DNIe",
+            "input_file_help": "Archivos, directorios o patrones glob a firmar, o - para leer de stdin",
+            "output_file_help": "Archivo de firma resultante, o directorio de salida al firmar varios archivos",
+            "hash_algorithm_help": "Algoritmo de hash para la firma",
+            "suffix_help": "Sufijo de los archivos de firma al firmar varios archivos, .sig, .p7s o .proof por defecto",
+            "hash_workers_help": "Número de hilos que calculan los hashes al firmar varios archivos",
+            "hash_memory_help": "Memoria máxima en MiB usada por los buffers de hash",
+            "all_readers_help": "Repartir las firmas entre los DNIe de todos los lectores",
+            "format_help": "Formato de la firma: firma RSA cruda, firma CMS/PKCS#7 separada (.p7s) con el certificado de firma, o una sola firma de un árbol Merkle con una prueba de inclusión (.proof) por archivo",
+        },
+        "sign_digest": {
+            "sign_digest_help": "Firmar digests calculados en otro lugar, sin los documentos",
+            "digest_help": "Digest hexadecimal a firmar",
+            "digest_file_help": "Archivo con el digest binario a firmar, o - para leerlo de stdin",
+            "manifest_help": "Archivo con un digest hexadecimal y un archivo de firma de salida por línea",
+            "output_file_help": "Archivo de firma de salida, no es necesario con --manifest",
+        },
+        "extract": {
+            "extract_help": "Extraer certificados del DNIe",
+            "certificate_type_help": "Tipo de certificado a extraer: firma, encripcion, autentificacion o todos (all)",
+            "output_file_help": "Archivo de certificado público resultante, o directorio de salida para todos",
+            "no_cache_help": "Leer siempre el certificado de la tarjeta sin guardarlo en caché",
+            "refresh_help": "Descartar los archivos en caché de la tarjeta antes de leer",
+        },
+        "serve": {
+            "serve_help": "Mantener abierta la sesión del DNIe y atender firmas por un socket Unix",
+            "monitor_help": "Vigilar todos los lectores y pasar al siguiente DNIe insertado cuando se retire la tarjeta",
+            "socket_help": "Ruta del socket Unix en el que escuchar",
+        },
+        "verify": {
+            "verify_help": "Verificar firmas sin conexión con el certificado extraído del DNIe",
+            "certificate_help": "Certificado de firma, DER o PEM",
+            "input_file_help": "Archivos firmados, directorios o patrones glob",
+            "signatures_help": "Directorio con los archivos de firma, junto a cada archivo por defecto",
+            "suffix_help": "Sufijo de los archivos de firma, .sig o .proof por defecto",
+            "format_help": "Formato de la firma: firmas RSA crudas o pruebas de inclusión Merkle",
+        },
+        "clear_cache": {
+            "clear_cache_help": "Eliminar los certificados en caché de todas las tarjetas",
+        },
+        "program_description": "Utilidades para las funciones criptográficas de la Tarjeta Inteligente DNIe peruana",
+        "available_tasks": "Tareas DNIe disponibles",
+        "metrics_help": "Escribir métricas de latencia y errores de los APDU en este archivo al terminar",
+        "metrics_format_help": "Formato del archivo de métricas",
+        "signature_store_help": "Reutilizar las firmas ya hechas por la tarjeta para el mismo digest, guardadas en este archivo SQLite o en el directorio de caché",
+        "queue_timeout_help": "Segundos de espera mientras otros procesos usan el mismo lector de tarjetas",
+        "no_queue_help": "No esperar el turno de otros procesos que usan el mismo lector de tarjetas",
+        "trace_help": "Guardar en este archivo el tiempo de cada fase del comando, en el formato de trazas de Chrome que abre Perfetto",
+        "record_trace_help": "Grabar en este archivo los APDUs intercambiados con la tarjeta, el PIN no se graba",
+    },
+    "init": {
+        "choose_reader": "Elegir lector",
+        "readers": "[bold underline]Lectores:",
+        "waiting_dnie": "Esperando el DNIe...",
+        "found_dnie": "[green]DNIe V2 encontrado",
+        "no_card_id": "[yellow]La tarjeta no informa su número de serie, así que la caché de certificados y el almacén de firmas están desactivados",
+        "found_dnies": "[green]{} DNIe V2 encontrados",
+        "preparing_reader": "[bold]Lector {}",
+        "reader_usage": "{}: {} firmas, {} fallos, {:.0%} ocupado",
+    },
+    "certificates": {
+        "reading_cert": "Leyendo certificado de firma...",
+        "success": "[green]Certificado cargado con éxito",
+        "wrote_cert": "[green]Certificado escrito en '{}'",
+        "from_cache": "[green]Certificado cargado desde la caché",
+    },
+    "general": {
+        "enter_pin": "Por favor, introduce tu PIN",
+    },
+    "serve": {
+        "listening": "[green]Escuchando en '{}'",
+    },
+    "verify": {
+        "valid": "[green]OK[/] {}",
+        "invalid": "[red]FALLÓ[/] {}: {}",
+        "summary": "{} válidas, {} inválidas",
+        "missing_file": "archivo no encontrado",
+        "missing_signature": "archivo de firma no encontrado",
+        "bad_signature": "la firma no coincide",
+    },
+    "errors": {
+        "lc_must_none": "'lc' debe ser None si 'data' es None",
+        "lc_must_length": "'lc' debe ser la longitud de 'data'",
+        "lc_out_of_range": "'lc' debe estar entre 1 y 65535",
+        "template_field_out_of_range": "El campo de la plantilla debe estar dentro de los datos del comando",
+        "le_out_of_range": "'le' debe estar entre 0 y 65536",
+        "dnie_not_init": "La tarjeta DNIe no está inicializada",
+        "dnie_not_found": "No se pudo encontrar el DNIe",
+        "card_queue_timeout": "La tarjeta en '{}' sigue en uso por otros procesos después de {} segundos",
+        "transmit_failed": "No se pudo intercambiar el APDU con la tarjeta: '{}'",
+        "could_not_select_pki": "No se pudo seleccionar la aplicación PKI: '{}'",
+        "could_not_select_cert": "No se pudo seleccionar el archivo de certificado de firma: '{}'",
+        "could_not_read_cert": "No se pudo leer el certificado: '{}'",
+        "wrong_while_reading": "Algo salió mal al leer el certificado: '{}'",
+        "certificate_not_supported": "Extracción de tipo de certificado no soportada",
+        "pin_needed": "Se necesita un PIN pero no hay un proveedor de PIN",
+        "pin_env_missing": "La variable de entorno '{}' con el PIN no está definida",
+        "failed_pin": "Fallo al verificar el PIN: '{}'",
+        "could_not_set_env": "No se pudo configurar el entorno de seguridad: '{}'",
+        "could_not_sign": "No se pudo firmar el payload: '{}'",
+        "input_not_found": "Archivo de entrada no encontrado: '{}'",
+        "duplicated_output": "Varias entradas escribirían el mismo archivo de firma: '{}'",
+        "hash_workers_positive": "El número de hilos de hash debe ser al menos 1",
+        "no_cards_available": "No hay ningún DNIe disponible",
+        "operation_cancelled": "Se canceló la operación con la tarjeta",
+        "der_truncated": "Datos DER truncados",
+        "der_unsupported_length": "Longitud DER no soportada",
+        "wrong_digest_length": "El digest tiene {} bytes, los digests {} tienen {} bytes",
+        "invalid_digest": "No es un digest hexadecimal: '{}'",
+        "invalid_manifest_line": "{}, línea {}: se esperaba un digest hexadecimal y un archivo de salida",
+        "digest_output_needed": "Se necesita un archivo de salida con --digest y --digest-file",
+        "merkle_stdin": "La entrada estándar no se puede firmar con --format merkle",
+        "not_rsa_certificate": "El certificado no contiene una clave pública RSA",
+        "invalid_proof": "Prueba de inclusión Merkle mal formada",
+        "empty_merkle_tree": "Un árbol Merkle necesita al menos un documento",
+        "server_missing_input": "Una solicitud de firma necesita un 'digest' o un 'path'",
+        "server_unknown_op": "Operación de solicitud desconocida: '{}'",
+        "server_running": "Ya hay un servidor escuchando en '{}'",
+        "server_closed": "El servidor de firmas cerró la conexión",
+        "server_card_changed": "Se insertó otro DNIe, su PIN solo se puede ingresar al iniciar el servidor",
+    },
+}
@@ -0,0 +1,178 @@
+"""Merkle tree batch signatures, with the tree hashing of RFC 6962
+
+The card signs the root of a tree over the digests of many documents, as a
+digest of the tree hash function. Every document gets an inclusion proof with
+the audit path from its leaf to the root and the root signature, so it can be
+verified on its own.
+"""
+
+# Standard Library
+import json
+from typing import List, Sequence
+
+# Third Party Library
+from attrs import define
+
+# First Party Library
+from peru_dnie.hashes import HashFunction
+from peru_dnie.i18n import t
+from peru_dnie.verify import RSAPublicKey, check_signature
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+@define
+class InclusionProof:
+    hash_algorithm: str
+    leaf_index: int
+    tree_size: int
+    # Sibling hashes from the leaf up to the root
+    path: List[bytes]
+    # Card signature of the root, signed as a digest
+    signature: bytes
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "hash_algorithm": self.hash_algorithm,
+                "leaf_index": self.leaf_index,
+                "tree_size": self.tree_size,
+                "path": [node.hex() for node in self.path],
+                "signature": self.signature.hex(),
+            },
+            indent=2,
+        )
+
+    @classmethod
+    def from_json(cls, data: str) -> "InclusionProof":
+        try:
+            fields = json.loads(data)
+            return cls(
+                hash_algorithm=fields["hash_algorithm"],
+                leaf_index=int(fields["leaf_index"]),
+                tree_size=int(fields["tree_size"]),
+                path=[bytes.fromhex(node) for node in fields["path"]],
+                signature=bytes.fromhex(fields["signature"]),
+            )
+        except (ValueError, KeyError, TypeError):
+            raise ValueError(t["errors"]["invalid_proof"]) from None
+
+
+def leaf_hash(hash_func: HashFunction, digest: bytes) -> bytes:
+    return hash_func(LEAF_PREFIX + digest)
+
+
+def node_hash(hash_func: HashFunction, left: bytes, right: bytes) -> bytes:
+    return hash_func(NODE_PREFIX + left + right)
+
+
+def tree_levels(hash_func: HashFunction, digests: Sequence[bytes]) -> List[List[bytes]]:
+    """Every level of the tree over document `digests`, from the leaves up
+
+    Pairing nodes left to right and promoting a last unpaired node gives the
+    same tree as the recursive split of RFC 6962.
+    """
+    if not digests:
+        raise ValueError(t["errors"]["empty_merkle_tree"])
+
+    levels = [[leaf_hash(hash_func, digest) for digest in digests]]
+
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [
+            node_hash(hash_func, level[idx], level[idx + 1])
+            for idx in range(0, len(level) - 1, 2)
+        ]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+
+    return levels
+
+
+def audit_path(levels: Sequence[Sequence[bytes]], leaf_index: int) -> List[bytes]:
+    """Sibling hashes needed to rebuild the root from a leaf"""
+    path = []
+    index = leaf_index
+
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            path.append(level[sibling])
+        index //= 2
+
+    return path
+
+
+def root_from_path(
+    hash_func: HashFunction,
+    digest: bytes,
+    leaf_index: int,
+    tree_size: int,
+    path: Sequence[bytes],
+) -> bytes:
+    """Root of the tree holding `digest`, RFC 9162 section 2.1.3.2"""
+    if not 0 <= leaf_index < tree_size:
+        raise ValueError(t["errors"]["invalid_proof"])
+
+    index = leaf_index
+    last = tree_size - 1
+    node = leaf_hash(hash_func, digest)
+
+    for sibling in path:
+        if last == 0:
+            raise ValueError(t["errors"]["invalid_proof"])
+
+        if index % 2 or index == last:
+            node = node_hash(hash_func, sibling, node)
+            # Climb past the levels where this node has no sibling
+            if not index % 2:
+                while index and not index % 2:
+                    index >>= 1
+                    last >>= 1
+        else:
+            node = node_hash(hash_func, node, sibling)
+
+        index >>= 1
+        last >>= 1
+
+    if last != 0:
+        raise ValueError(t["errors"]["invalid_proof"])
+
+    return node
+
+
+def verify_proof(
+    public_key: RSAPublicKey,
+    hash_func: HashFunction,
+    digest: bytes,
+    proof: InclusionProof,
+) -> bool:
+    """Check that the document with `digest` is in the signed tree of `proof`"""
+    if proof.hash_algorithm != hash_func.name:
+        return False
+
+    try:
+        root = root_from_path(
+            hash_func, digest, proof.leaf_index, proof.tree_size, proof.path
+        )
+    except ValueError:
+        return False
+
+    return check_signature(public_key, hash_func, root, proof.signature)
+
+
+def check_proof_file(
+    public_key: RSAPublicKey,
+    hash_func: HashFunction,
+    digest: bytes,
+    contents: bytes,
+) -> bool:
+    """`verify_files` check for proof files written by `sign_files_merkle`"""
+    try:
+        proof = InclusionProof.from_json(contents.decode("utf-8"))
+    except (ValueError, UnicodeDecodeError):
+        return False
+
+    return verify_proof(public_key, hash_func, digest, proof)
@@ -0,0 +1,158 @@
+# Standard Library
+import json
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, Final, List, Tuple, Union
+
+# Third Party Library
+from attrs import define, field
+
+# Upper bounds in seconds of the latency histogram buckets, from 0.1 ms doubling
+# up to ~13 s. Slower exchanges fall in an extra overflow bucket.
+LATENCY_BUCKETS: Final[Tuple[float, ...]] = tuple(0.0001 * 2.0**i for i in range(18))
+
+# Status words 64XX to 6FXX are execution or checking errors (ISO 7816-4)
+_ERROR_SW1: Final = range(0x64, 0x70)
+
+
+@define
+class LatencyHistogram:
+    """Fixed log-scale buckets, cheap to update and to merge"""
+
+    counts: List[int] = field(factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the `q` quantile"""
+        if self.count == 0:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        for idx, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                if idx < len(LATENCY_BUCKETS):
+                    return min(LATENCY_BUCKETS[idx], self.max)
+                break
+
+        return self.max
+
+
+@define
+class InsMetrics:
+    """Metrics of the exchanges of one instruction (INS byte)"""
+
+    exchanges: int = 0
+    errors: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    status_words: Dict[str, int] = field(factory=dict)
+    latency: LatencyHistogram = field(factory=LatencyHistogram)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "exchanges": self.exchanges,
+            "errors": self.errors,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "status_words": dict(self.status_words),
+            "seconds_total": self.latency.total,
+            "seconds_p50": self.latency.quantile(0.5),
+            "seconds_p99": self.latency.quantile(0.99),
+            "seconds_max": self.latency.max,
+        }
+
+
+@define
+class ApduMetrics:
+    """APDU exchange metrics grouped by instruction
+
+    Filled by `Context.transmit` when the context has metrics enabled.
+    """
+
+    by_ins: Dict[int, InsMetrics] = field(factory=dict)
+    _lock: threading.Lock = field(factory=threading.Lock)
+
+    def record(
+        self,
+        ins: int,
+        sent: int,
+        received: int,
+        sw: Union[int, None],
+        seconds: float,
+    ) -> None:
+        """Record one exchange, `sw` is None when the exchange failed"""
+        with self._lock:
+            metrics = self.by_ins.get(ins)
+            if metrics is None:
+                metrics = self.by_ins[ins] = InsMetrics()
+
+            metrics.exchanges += 1
+            metrics.bytes_sent += sent
+            metrics.bytes_received += received
+            metrics.latency.observe(seconds)
+
+            status = "transport_error" if sw is None else f"{sw:04X}"
+            metrics.status_words[status] = metrics.status_words.get(status, 0) + 1
+            if sw is None or sw >> 8 in _ERROR_SW1:
+                metrics.errors += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                f"0x{ins:02X}": metrics.to_dict()
+                for ins, metrics in sorted(self.by_ins.items())
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format"""
+        lines = []
+
+        counters = [
+            ("exchanges", "APDU exchanges with the card"),
+            ("errors", "APDU exchanges with an error status word or failed"),
+            ("bytes_sent", "Bytes sent to the card"),
+            ("bytes_received", "Bytes received from the card"),
+        ]
+
+        with self._lock:
+            items = sorted(self.by_ins.items())
+
+            for name, description in counters:
+                metric = f"peru_dnie_apdu_{name}_total"
+                lines.append(f"# HELP {metric} {description}")
+                lines.append(f"# TYPE {metric} counter")
+                for ins, metrics in items:
+                    value = getattr(metrics, name)
+                    lines.append(f'{metric}{{ins="0x{ins:02X}"}} {value}')
+
+            metric = "peru_dnie_apdu_duration_seconds"
+            lines.append(f"# HELP {metric} Duration of the APDU exchanges")
+            lines.append(f"# TYPE {metric} histogram")
+            for ins, metrics in items:
+                histogram = metrics.latency
+                labels = f'ins="0x{ins:02X}"'
+                cumulative = 0
+                for bound, bucket_count in zip(LATENCY_BUCKETS, histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(
+                        f'{metric}_bucket{{{labels},le="{bound:g}"}} {cumulative}'
+                    )
+                lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"{metric}_sum{{{labels}}} {histogram.total}")
+                lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,110 @@
+# Standard Library
+import threading
+from typing import Any, Dict, List, Union
+
+# Third Party Library
+from attrs import define, field
+from smartcard.CardMonitoring import CardMonitor, CardObserver
+from smartcard.CardType import CardType
+from smartcard.Exceptions import CardConnectionException
+
+# First Party Library
+from peru_dnie.constants import CARD_WAIT_TIMEOUT
+from peru_dnie.exceptions import CardError
+from peru_dnie.i18n import t
+from peru_dnie.pyscard import DNIv2CardType, PyscardSmartCard
+
+
+@define(eq=False)
+class DnieMonitor(CardObserver):
+    """Keep a connection ready to the DNIe of every reader
+
+    pyscard's `CardMonitor` reports insertions and removals in all readers.
+    A DNIe is connected as soon as it is inserted, so the next operation can
+    start on it right away, and its connection is dropped when it is removed.
+    Cards already inserted are reported when the monitor starts.
+    """
+
+    card_type: CardType = field(factory=DNIv2CardType)
+    # Ready cards by reader name, in insertion order
+    _cards: Dict[str, PyscardSmartCard] = field(init=False, factory=dict)
+    _changed: threading.Condition = field(init=False, factory=threading.Condition)
+    _monitor: Union[CardMonitor, None] = field(init=False, default=None)
+
+    def start(self) -> None:
+        if self._monitor is None:
+            self._monitor = CardMonitor()
+            self._monitor.addObserver(self)
+
+    def stop(self) -> None:
+        if self._monitor is not None:
+            self._monitor.deleteObserver(self)
+            self._monitor = None
+
+        with self._changed:
+            cards = list(self._cards.values())
+            self._cards.clear()
+
+        for card in cards:
+            _disconnect(card)
+
+    def update(self, observable: Any, handlers: Any) -> None:
+        """Called by `CardMonitor` with the inserted and removed cards"""
+        added, removed = handlers
+
+        for removed_card in removed:
+            with self._changed:
+                card = self._cards.pop(str(removed_card.reader), None)
+                self._changed.notify_all()
+
+            if card is not None:
+                _disconnect(card)
+
+        for inserted in added:
+            if not self.card_type.matches(inserted.atr, inserted.reader):
+                continue
+
+            connection = inserted.createConnection()
+            try:
+                connection.connect()
+            except CardConnectionException:
+                # Removed again, or used by another process
+                continue
+
+            with self._changed:
+                self._cards[str(inserted.reader)] = PyscardSmartCard(connection)
+                self._changed.notify_all()
+
+    def cards(self) -> List[PyscardSmartCard]:
+        """Cards ready right now"""
+        with self._changed:
+            return list(self._cards.values())
+
+    def is_ready(self, card: PyscardSmartCard) -> bool:
+        """Whether `card` is still inserted and connected"""
+        with self._changed:
+            return any(ready is card for ready in self._cards.values())
+
+    def wait_for_card(
+        self, timeout: Union[float, None] = CARD_WAIT_TIMEOUT
+    ) -> PyscardSmartCard:
+        """The last card inserted, waiting up to `timeout` seconds for one"""
+        with self._changed:
+            if not self._changed.wait_for(lambda: self._cards, timeout):
+                raise CardError(t["errors"]["dnie_not_found"])
+
+            return next(reversed(self._cards.values()))
+
+    def __enter__(self) -> "DnieMonitor":
+        self.start()
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.stop()
+
+
+def _disconnect(card: PyscardSmartCard) -> None:
+    try:
+        card.connection.disconnect()
+    except CardConnectionException:
+        pass
@@ -0,0 +1,123 @@
+# Standard Library
+import glob
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Deque, Generator, Iterable, List, Sequence, Tuple
+
+# Third Party Library
+from attrs import define
+
+# First Party Library
+from peru_dnie.constants import (
+    DEFAULT_HASH_WORKERS,
+    DEFAULT_MAX_IN_FLIGHT_BYTES,
+    DEFAULT_MAX_PENDING,
+)
+from peru_dnie.hashes import DEFAULT_CHUNK_SIZE, HashFunction
+from peru_dnie.i18n import t
+
+_GLOB_CHARACTERS = ("*", "?", "[")
+
+
+def collect_input_files(patterns: Iterable[str]) -> List[Path]:
+    """Expand files, directories and glob patterns into a list of files
+
+    Directories contribute their regular files (not recursively). The order of
+    the patterns is kept and every directory or glob is sorted by name.
+    """
+    files: List[Path] = []
+
+    for pattern in patterns:
+        path = Path(pattern)
+
+        if path.is_dir():
+            files.extend(sorted(p for p in path.iterdir() if p.is_file()))
+        elif path.is_file():
+            files.append(path)
+        elif any(c in pattern for c in _GLOB_CHARACTERS):
+            matches = sorted(Path(p) for p in glob.glob(pattern, recursive=True))
+            files.extend(p for p in matches if p.is_file())
+        else:
+            raise FileNotFoundError(t["errors"]["input_not_found"].format(pattern))
+
+    return files
+
+
+def signature_output_files(
+    input_files: Sequence[Path],
+    output_dir: Path,
+    suffix: str,
+) -> List[Tuple[Path, Path]]:
+    """Pair every input file with its signature file inside `output_dir`"""
+    jobs = []
+    seen = set()
+
+    for input_file in input_files:
+        output_file = output_dir / (input_file.name + suffix)
+
+        if output_file in seen:
+            raise ValueError(t["errors"]["duplicated_output"].format(output_file))
+
+        seen.add(output_file)
+        jobs.append((input_file, output_file))
+
+    return jobs
+
+
+@define
+class HashingEngine:
+    """Hash many files concurrently and return the digests in submission order
+
+    hashlib releases the GIL while digesting large buffers, so threads scale
+    with the number of cores. Every running job holds one `chunk_size` buffer,
+    so at most `max_in_flight_bytes` of file data are in memory at once.
+    """
+
+    hash_func: HashFunction
+    workers: int = DEFAULT_HASH_WORKERS
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+    max_in_flight_bytes: int = DEFAULT_MAX_IN_FLIGHT_BYTES
+    max_pending: int = DEFAULT_MAX_PENDING
+
+    def __attrs_post_init__(self) -> None:
+        if self.workers < 1:
+            raise ValueError(t["errors"]["hash_workers_positive"])
+
+    @property
+    def effective_workers(self) -> int:
+        return max(1, min(self.workers, self.max_in_flight_bytes // self.chunk_size))
+
+    def digests(
+        self, files: Iterable[Path]
+    ) -> Generator[Tuple[Path, bytes], None, None]:
+        """Yield `(file, digest)` pairs in the order the files are given
+
+        Hashing runs ahead of the consumer by at most `max_pending` digests on
+        top of the files being hashed.
+        """
+        workers = self.effective_workers
+        window = workers + self.max_pending
+        pending: Deque[Tuple[Path, "Future[bytes]"]] = deque()
+
+        with ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="peru_dnie_hash",
+        ) as executor:
+            try:
+                for path in files:
+                    future = executor.submit(
+                        self.hash_func.hash_file, path, self.chunk_size
+                    )
+                    pending.append((path, future))
+
+                    if len(pending) >= window:
+                        path, future = pending.popleft()
+                        yield path, future.result()
+
+                while pending:
+                    path, future = pending.popleft()
+                    yield path, future.result()
+            finally:
+                for _, future in pending:
+                    future.cancel()
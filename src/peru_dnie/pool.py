@@ -0,0 +1,220 @@
+# Standard Library
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Sequence, Tuple, TypeVar, Union
+
+# Third Party Library
+from attrs import define, field
+
+# First Party Library
+from peru_dnie.context import Context
+from peru_dnie.exceptions import CardError
+from peru_dnie.i18n import t
+
+T = TypeVar("T")
+
+Job = Callable[[Context], Any]
+
+_STOP = object()
+
+
+@define
+class CardStats:
+    """Usage of one card of a `CardPool`"""
+
+    reader: str
+    jobs: int = 0
+    failures: int = 0
+    busy_seconds: float = 0.0
+    removed: bool = False
+
+    def utilisation(self, elapsed: float) -> float:
+        if elapsed <= 0:
+            return 0.0
+        return min(1.0, self.busy_seconds / elapsed)
+
+
+@define
+class CardPool:
+    """Run jobs on several cards, each one in its own worker thread
+
+    Every worker takes the next job as soon as its card is idle, so jobs are
+    spread over the cards. When a card fails with `CardError` (e.g. it was
+    removed) it leaves the pool and its job is retried on another card, up to
+    `max_attempts` times.
+    """
+
+    contexts: Sequence[Context]
+    initializer: Union[Job, None] = None
+    max_attempts: int = 3
+    stats: List[CardStats] = field(init=False, factory=list)
+    _jobs: "queue.Queue[Any]" = field(init=False, factory=queue.Queue)
+    _workers: List[threading.Thread] = field(init=False, factory=list)
+    _alive: int = field(init=False, default=0)
+    _outstanding: int = field(init=False, default=0)
+    _lock: threading.Condition = field(init=False, factory=threading.Condition)
+    _started_at: float = field(init=False, default=0.0)
+    _stopped_at: Union[float, None] = field(init=False, default=None)
+
+    def start(self) -> None:
+        """Run the initializer on every card and start the workers
+
+        Initializers run one card at a time in the calling thread, so they can
+        prompt the user (e.g. for each card PIN).
+        """
+        for ctx in self.contexts:
+            stats = CardStats(reader=_reader_name(ctx))
+            self.stats.append(stats)
+
+            if self.initializer is not None:
+                try:
+                    self.initializer(ctx)
+                except CardError:
+                    stats.removed = True
+                    continue
+
+            worker = threading.Thread(
+                target=self._work,
+                args=(ctx, stats),
+                name=f"peru_dnie_card_{len(self._workers)}",
+                daemon=True,
+            )
+            self._workers.append(worker)
+
+        if not self._workers:
+            raise CardError(t["errors"]["no_cards_available"])
+
+        self._alive = len(self._workers)
+        self._started_at = time.perf_counter()
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, job: Callable[[Context], T]) -> "Future[T]":
+        future: "Future[T]" = Future()
+
+        with self._lock:
+            if self._alive == 0:
+                future.set_exception(CardError(t["errors"]["no_cards_available"]))
+                return future
+
+            self._outstanding += 1
+            self._jobs.put((job, future, 1))
+
+        return future
+
+    def shutdown(self) -> None:
+        """Wait for the submitted jobs and stop the workers"""
+        with self._lock:
+            self._lock.wait_for(lambda: self._outstanding == 0)
+
+        for _ in self._workers:
+            self._jobs.put(_STOP)
+
+        for worker in self._workers:
+            worker.join()
+
+        self._stopped_at = time.perf_counter()
+
+    def report(self) -> List[Tuple[CardStats, float]]:
+        """Stats of every card with its utilisation (busy time / elapsed time)"""
+        end = self._stopped_at if self._stopped_at is not None else time.perf_counter()
+        elapsed = end - self._started_at
+
+        return [(stats, stats.utilisation(elapsed)) for stats in self.stats]
+
+    def __enter__(self) -> "CardPool":
+        self.start()
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.shutdown()
+
+    def _work(self, ctx: Context, stats: CardStats) -> None:
+        while True:
+            item = self._jobs.get()
+            if item is _STOP:
+                return
+
+            job, future, attempt = item
+            if not future.set_running_or_notify_cancel():
+                self._done()
+                continue
+
+            start = time.perf_counter()
+            try:
+                result = job(ctx)
+            except CardError as e:
+                stats.busy_seconds += time.perf_counter() - start
+                stats.failures += 1
+                stats.removed = True
+                self._retire(job, future, attempt, e)
+                return
+            except Exception as e:
+                stats.busy_seconds += time.perf_counter() - start
+                stats.failures += 1
+                future.set_exception(e)
+                self._done()
+                continue
+
+            stats.busy_seconds += time.perf_counter() - start
+            stats.jobs += 1
+            future.set_result(result)
+            self._done()
+
+    def _done(self) -> None:
+        with self._lock:
+            self._outstanding -= 1
+            self._lock.notify_all()
+
+    def _retire(
+        self, job: Job, future: "Future[Any]", attempt: int, error: Exception
+    ) -> None:
+        """Leave the pool after a card failure, handing the job to other cards"""
+        with self._lock:
+            self._alive -= 1
+
+            if self._alive > 0 and attempt < self.max_attempts:
+                # Future is already running, hand it over as a new pending one
+                retry: "Future[Any]" = Future()
+                retry.add_done_callback(lambda f: _copy_result(f, future))
+                self._jobs.put((job, retry, attempt + 1))
+            else:
+                future.set_exception(error)
+                self._outstanding -= 1
+
+            if self._alive == 0:
+                self._fail_pending(error)
+
+            self._lock.notify_all()
+
+    def _fail_pending(self, error: Exception) -> None:
+        while True:
+            try:
+                item = self._jobs.get_nowait()
+            except queue.Empty:
+                return
+
+            if item is _STOP:
+                continue
+
+            _, future, _ = item
+            if future.set_running_or_notify_cancel():
+                future.set_exception(error)
+            self._outstanding -= 1
+
+
+def _copy_result(source: "Future[T]", target: "Future[T]") -> None:
+    error = source.exception()
+    if error is not None:
+        target.set_exception(error)
+    else:
+        target.set_result(source.result())
+
+
+def _reader_name(ctx: Context) -> str:
+    if ctx.card is None:
+        return "-"
+
+    return ctx.card.reader()
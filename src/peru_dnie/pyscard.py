@@ -1,19 +1,33 @@
 # Standard Library
-from typing import List
+from contextlib import contextmanager
+from typing import Any, Iterator, List
 
 # Third Party Library
 from attrs import define
 from smartcard.CardRequest import CardRequest
 from smartcard.CardType import CardType
+from smartcard.Exceptions import CardConnectionException
 from smartcard.pcsc.PCSCReader import PCSCCardConnection, PCSCReader
+from smartcard.scard import (
+    SCARD_LEAVE_CARD,
+    SCARD_S_SUCCESS,
+    SCardBeginTransaction,
+    SCardEndTransaction,
+    SCardGetErrorMessage,
+)
 from smartcard.System import readers
 
 # First Party Library
-from peru_dnie.apdu import APDUCommand, APDUResponse
+from peru_dnie.apdu import APDUResponse, Command
 from peru_dnie.card import SmartCard
-from peru_dnie.constants import PERU_DNIE_V2_ATR, PERU_DNIE_V2_ATR_NFC
+from peru_dnie.constants import (
+    CARD_WAIT_TIMEOUT,
+    PERU_DNIE_V2_ATR,
+    PERU_DNIE_V2_ATR_NFC,
+)
 from peru_dnie.exceptions import CardError
 from peru_dnie.i18n import t
+from peru_dnie.tracing import span, traced
 
 
 class DNIv2CardType(CardType):
@@ -30,15 +44,52 @@ class DNIv2CardType(CardType):
         return False
 
 
-
 @define
 class PyscardSmartCard(SmartCard):
-    def transmit(self, command: APDUCommand) -> APDUResponse:
-        serial_bytes = command.serialize()
-        data, sw1, sw2 = self.connection.transmit(list(serial_bytes))
-        return APDUResponse(sw1=sw1, sw2=sw2, data=bytes(data))
-
-
+    def transmit(self, command: Command) -> APDUResponse:
+        try:
+            data, sw1, sw2 = self.connection.transmit(command.as_list())
+        except CardConnectionException as e:
+            raise CardError(t["errors"]["transmit_failed"].format(e)) from e
+
+        # The only copy of the payload, later readers take views of it
+        return APDUResponse(sw1=sw1, sw2=sw2, data=memoryview(bytes(data)))
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """PC/SC transaction, other PC/SC clients wait until it ends
+
+        pyscard only exposes transactions on its exclusive connections, so
+        they are opened on the PC/SC handle of the connection.
+        """
+        hcard = _card_handle(self.connection)
+        if hcard is None:
+            # Not connected through PC/SC
+            yield
+            return
+
+        hresult = SCardBeginTransaction(hcard)
+        if hresult != SCARD_S_SUCCESS:
+            raise CardError(
+                t["errors"]["transmit_failed"].format(SCardGetErrorMessage(hresult))
+            )
+
+        try:
+            yield
+        finally:
+            # Fails when the card was removed, so nothing is left to release
+            SCardEndTransaction(hcard, SCARD_LEAVE_CARD)
+
+
+def _card_handle(connection: Any) -> Any:
+    """PC/SC handle of `connection`, under any CardConnectionDecorator"""
+    while not hasattr(connection, "hcard") and hasattr(connection, "component"):
+        connection = connection.component
+
+    return getattr(connection, "hcard", None)
+
+
+@traced("get_readers")
 def get_readers() -> List[PCSCReader]:
     """Get Smart Card readers"""
     current_readers = readers()
@@ -50,10 +101,35 @@ def get_dnie_connection() -> PCSCCardConnection:
 
     Wait until the DNIe is connected to the reader and return a connection.
     """
-    card_request = CardRequest(timeout=120, cardType=DNIv2CardType())
-    card_service = card_request.waitforcard()
+    card_request = CardRequest(timeout=CARD_WAIT_TIMEOUT, cardType=DNIv2CardType())
+    with span("wait_for_card"):
+        card_service = card_request.waitforcard()
 
     if card_service is not None:
         return card_service.connection
     else:
         raise CardError(t["errors"]["dnie_not_found"])
+
+
+def get_dnie_connections() -> List[PCSCCardConnection]:
+    """Get connections to the DNIe cards present in every reader.
+
+    Readers without a card, or with another type of card, are skipped.
+    """
+    card_type = DNIv2CardType()
+    connections = []
+
+    for reader in get_readers():
+        connection = reader.createConnection()
+
+        try:
+            connection.connect()
+        except CardConnectionException:
+            continue
+
+        if card_type.matches(connection.getATR()):
+            connections.append(connection)
+        else:
+            connection.disconnect()
+
+    return connections
@@ -0,0 +1,257 @@
+# Standard Library
+import json
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Final, Union
+
+# Third Party Library
+from attrs import define, field
+
+# First Party Library
+from peru_dnie.commands.certificate import extract_certificate
+from peru_dnie.commands.general import RememberedPin, needs_card_id, read_card_id
+from peru_dnie.commands.signature import prepare_signature, stored_or_compute_signature
+from peru_dnie.constants import CertificateType
+from peru_dnie.context import Context
+from peru_dnie.exceptions import ServerError
+from peru_dnie.i18n import t
+
+if TYPE_CHECKING:
+    # First Party Library
+    from peru_dnie.monitor import DnieMonitor
+    from peru_dnie.pyscard import PyscardSmartCard
+
+Message = Dict[str, Any]
+
+
+def get_default_socket_path() -> Path:
+    runtime_dir = os.getenv("XDG_RUNTIME_DIR", None)
+    if runtime_dir is not None:
+        return Path(runtime_dir) / "peru_dnie.sock"
+
+    return Path(tempfile.gettempdir()) / f"peru_dnie-{os.getuid()}.sock"
+
+
+DEFAULT_SOCKET_PATH: Final = get_default_socket_path()
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """One JSON request per line, answered with one JSON response per line"""
+
+    server: "SigningServer"
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            if not line.strip():
+                continue
+
+            try:
+                request = json.loads(line)
+                response = self.server.dispatch(request)
+            except Exception as e:
+                response = {"ok": False, "error": str(e)}
+
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+class SigningServer(socketserver.ThreadingUnixStreamServer):
+    """Serve sign and extract requests over a local Unix socket
+
+    The card session (PKI app, PIN and security environment) is prepared once
+    and kept open, so a signature request only costs the signature APDU. Card
+    access is serialized, while the hashing of files sent by path runs
+    concurrently in the request threads. Steps undone by other processes using
+    the card are done again on the next request.
+
+    With a `monitor`, a removed card is replaced by the next DNIe inserted in
+    any reader, already connected by the monitor. A PIN remembered by a
+    `RememberedPin` provider is only sent to the card it was entered for, so
+    other cards are refused until the server is started again.
+
+    Requests:
+        {"op": "sign", "digest": "<hex>"}
+        {"op": "sign", "path": "<file to hash and sign>"}
+        {"op": "extract", "certificate_type": "signature"}
+        {"op": "ping"}
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        ctx: Context,
+        socket_path: Path = DEFAULT_SOCKET_PATH,
+        monitor: Union["DnieMonitor", None] = None,
+    ):
+        if ctx.hash_func is None:
+            raise ValueError("A hash function is needed for a signature.")
+
+        self.ctx = ctx
+        self.monitor = monitor
+        # Card of the monitor in use, `ctx.card` may wrap it
+        self.monitored_card: Union["PyscardSmartCard", None] = None
+        # Card prepared by `prepare`, the one whose PIN may be remembered
+        self.prepared = False
+        self.prepared_card_id: Union[str, None] = None
+        self.hash_func = ctx.hash_func
+        self.socket_path = socket_path
+        self.card_lock = threading.Lock()
+
+        _remove_stale_socket(socket_path)
+
+        # Only the owner may connect and sign
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(str(socket_path), _RequestHandler)
+        finally:
+            os.umask(old_umask)
+
+    def prepare(self) -> None:
+        """Prepare the card session for signatures"""
+        with self.card_lock:
+            self._use_ready_card()
+            with self.ctx.exclusive():
+                prepare_signature(self.ctx)
+
+            self.prepared = True
+            self.prepared_card_id = self.ctx.card_id
+
+    def dispatch(self, request: Message) -> Message:
+        op = request.get("op")
+
+        if op == "sign":
+            if "digest" in request:
+                digest = bytes.fromhex(request["digest"])
+            elif "path" in request:
+                digest = self.hash_func.hash_file(Path(request["path"]))
+            else:
+                raise ValueError(t["errors"]["server_missing_input"])
+
+            return {"ok": True, "signature": self.sign_digest(digest).hex()}
+
+        elif op == "extract":
+            cert_type = CertificateType[request["certificate_type"].upper()]
+            with self.card_lock:
+                self._use_ready_card()
+                certificate = extract_certificate(self.ctx, cert_type)
+            return {"ok": True, "certificate": certificate.hex()}
+
+        elif op == "ping":
+            return {"ok": True}
+
+        raise ValueError(t["errors"]["server_unknown_op"].format(op))
+
+    def sign_digest(self, digest: bytes) -> bytes:
+        self.hash_func.check_digest(digest)
+
+        with self.card_lock:
+            self._use_ready_card()
+            with self.ctx.exclusive():
+                # Only sends the steps the card state shows as undone
+                prepare_signature(self.ctx)
+
+                return stored_or_compute_signature(self.ctx, digest)
+
+    def _use_ready_card(self) -> None:
+        """Switch to a card of the monitor if the current one was removed"""
+        if self.monitor is None:
+            return
+
+        if self.monitored_card is not None and self.monitor.is_ready(
+            self.monitored_card
+        ):
+            return
+
+        self.monitored_card = self.monitor.wait_for_card()
+        self.ctx.card = self.monitored_card
+        self.ctx.card_id = read_card_id(self.ctx) if needs_card_id(self.ctx) else None
+
+        if (
+            self.prepared
+            and isinstance(self.ctx.pin_provider, RememberedPin)
+            and (self.ctx.card_id is None or self.ctx.card_id != self.prepared_card_id)
+        ):
+            # Its PIN can only be asked on the console, checked again next time
+            self.monitored_card = None
+            raise ServerError(t["errors"]["server_card_changed"])
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.socket_path.unlink(missing_ok=True)
+
+
+def _remove_stale_socket(socket_path: Path) -> None:
+    if not socket_path.exists():
+        return
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(str(socket_path))
+        except OSError:
+            # Nobody is listening: left over by a server that did not exit cleanly
+            socket_path.unlink()
+            return
+
+    raise ServerError(t["errors"]["server_running"].format(socket_path))
+
+
+@define
+class SigningClient:
+    """Client of a `SigningServer`, keeps one connection open"""
+
+    socket_path: Path = DEFAULT_SOCKET_PATH
+    timeout: Union[float, None] = None
+    _socket: Union[socket.socket, None] = field(init=False, default=None)
+    _reader: Any = field(init=False, default=None)
+
+    def request(self, payload: Message) -> Message:
+        if self._socket is None:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.settimeout(self.timeout)
+            self._socket.connect(str(self.socket_path))
+            self._reader = self._socket.makefile("rb")
+
+        self._socket.sendall(json.dumps(payload).encode() + b"\n")
+        line = self._reader.readline()
+        if not line:
+            self.close()
+            raise ServerError(t["errors"]["server_closed"])
+
+        response: Message = json.loads(line)
+        if not response.get("ok"):
+            raise ServerError(response.get("error"))
+
+        return response
+
+    def sign_digest(self, digest: bytes) -> bytes:
+        response = self.request({"op": "sign", "digest": digest.hex()})
+        return bytes.fromhex(response["signature"])
+
+    def sign_file(self, path: Path) -> bytes:
+        response = self.request({"op": "sign", "path": str(path.absolute())})
+        return bytes.fromhex(response["signature"])
+
+    def extract_certificate(self, cert_type: CertificateType) -> bytes:
+        response = self.request(
+            {"op": "extract", "certificate_type": cert_type.name.lower()}
+        )
+        return bytes.fromhex(response["certificate"])
+
+    def close(self) -> None:
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def __enter__(self) -> "SigningClient":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
@@ -0,0 +1,153 @@
+# Standard Library
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Final, Union
+
+# Third Party Library
+from attrs import define, field
+
+# First Party Library
+from peru_dnie.cache import CardFileCache
+from peru_dnie.card import SmartCard
+from peru_dnie.cli_config import HEADLESS_CONFIG
+from peru_dnie.commands.certificate import Certificate, extract_certificate
+from peru_dnie.commands.general import PinType, needs_card_id, read_card_id
+from peru_dnie.commands.signature import sign_bytes, sign_digest, sign_stream
+from peru_dnie.constants import CertificateType, HashTypes
+from peru_dnie.context import Context, PinProvider
+from peru_dnie.exceptions import CardError, PinError
+from peru_dnie.hashes import HashFunction
+from peru_dnie.i18n import t
+
+if TYPE_CHECKING:
+    # First Party Library
+    from peru_dnie.coordination import CardQueue
+    from peru_dnie.store import SignatureStore
+
+DEFAULT_PIN_VARIABLE: Final = "PERU_DNIE_PIN"
+
+
+def env_pin(variable: str = DEFAULT_PIN_VARIABLE) -> PinProvider:
+    """PIN provider reading the environment variable `variable`
+
+    The variable is read on every verification, so it can be rotated.
+    """
+
+    def provider(pin_type: PinType) -> str:
+        pin = os.environ.get(variable)
+        if not pin:
+            raise PinError(t["errors"]["pin_env_missing"].format(variable))
+
+        return pin
+
+    return provider
+
+
+@define
+class DnieSession:
+    """Headless access to a DNIe, for services using the package as a library
+
+    Nothing is shown or asked on a console: the PIN comes from `pin_provider`,
+    a callback taking the `PinType` or e.g. `env_pin()`, and failures are
+    raised as `CardError`, `PinError` or `APDUError`. Without a `card`, the
+    session connects to the first DNIe inserted in any reader.
+    """
+
+    pin_provider: Union[PinProvider, None] = None
+    hash_algorithm: HashTypes = "sha256"
+    card: Union[SmartCard, None] = None
+    cache: Union[CardFileCache, None] = None
+    signature_store: Union["SignatureStore", None] = None
+    card_queue: Union["CardQueue", None] = None
+    _ctx: Union[Context, None] = field(init=False, default=None)
+    _connected: bool = field(init=False, default=False)
+
+    @property
+    def ctx(self) -> Context:
+        if self._ctx is None:
+            raise CardError(t["errors"]["dnie_not_init"])
+
+        return self._ctx
+
+    def open(self) -> None:
+        if self._ctx is not None:
+            return
+
+        card = self.card
+        if card is None:
+            card = _connect_dnie()
+            self._connected = True
+
+        self._ctx = Context(
+            hash_func=HashFunction(name=self.hash_algorithm),
+            card=card,
+            cli=HEADLESS_CONFIG,
+            cache=self.cache,
+            signature_store=self.signature_store,
+            card_queue=self.card_queue,
+            pin_provider=self.pin_provider,
+        )
+
+        if needs_card_id(self._ctx):
+            try:
+                self._ctx.card_id = read_card_id(self._ctx)
+            except Exception:
+                self.close()
+                raise
+
+    def close(self) -> None:
+        if self._ctx is None:
+            return
+
+        card = self._ctx.card
+        self._ctx = None
+
+        if self._connected and card is not None:
+            self._connected = False
+            _disconnect(card)
+
+    def sign_digest(self, digest: bytes) -> bytes:
+        return sign_digest(self.ctx, digest)
+
+    def sign_bytes(self, data: bytes) -> bytes:
+        return sign_bytes(self.ctx, data)
+
+    def sign_file(self, path: Path) -> bytes:
+        with path.open("rb") as stream:
+            return sign_stream(self.ctx, stream)
+
+    def certificate(
+        self, cert_type: CertificateType = CertificateType.SIGNATURE
+    ) -> Certificate:
+        return extract_certificate(self.ctx, cert_type)
+
+    def __enter__(self) -> "DnieSession":
+        self.open()
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+
+def _connect_dnie() -> SmartCard:
+    # pyscard is only needed when the session connects to a reader itself
+    from smartcard.Exceptions import CardConnectionException
+
+    from peru_dnie.pyscard import PyscardSmartCard, get_dnie_connection
+
+    connection = get_dnie_connection()
+    try:
+        connection.connect()
+    except CardConnectionException as e:
+        raise CardError(t["errors"]["transmit_failed"].format(e)) from e
+
+    return PyscardSmartCard(connection=connection)
+
+
+def _disconnect(card: SmartCard) -> None:
+    from smartcard.Exceptions import CardConnectionException
+
+    try:
+        card.connection.disconnect()
+    except CardConnectionException:
+        pass
@@ -0,0 +1,269 @@
+# Standard Library
+import json
+import time
+from collections import deque
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Deque,
+    Dict,
+    Final,
+    FrozenSet,
+    List,
+    Mapping,
+    Tuple,
+)
+
+# Third Party Library
+from attrs import define, field
+
+# First Party Library
+from peru_dnie.apdu import APDUCommand, APDUResponse, Command
+from peru_dnie.card import SmartCard
+from peru_dnie.commands.certificate import (
+    SELECT_CERTIFICATE_CMDS,
+    read_certificate_command,
+)
+from peru_dnie.commands.general import SELECT_PKI_APP_CMD
+from peru_dnie.commands.signature import SET_SIGNATURE_ENVIRONMENT_CMD
+from peru_dnie.constants import PERU_DNIE_V2_ATR, CertificateType
+
+# VERIFY and PSO carry data that changes on every run (PIN, digest), so they
+# are replayed by matching their header only
+HEADER_MATCH_INS: Final = frozenset([0x20, 0x2A])
+
+# Answer for commands missing from the trace: wrong length, which makes the
+# certificate reads fall back to the chunk size recorded in the trace
+MISSING_SW: Final = (0x67, 0x00)
+
+_VERIFY_INS: Final = 0x20
+
+
+@define
+class TraceExchange:
+    """One recorded command and the response data and status word"""
+
+    command: bytes
+    response: APDUResponse
+
+    def to_dict(self) -> Dict[str, str]:
+        data = self.response.data if self.response.data is not None else b""
+        return {
+            "command": self.command.hex(),
+            "response": data.hex(),
+            "sw": f"{self.response.sw1:02x}{self.response.sw2:02x}",
+        }
+
+    @classmethod
+    def from_dict(cls, exchange: Mapping[str, str]) -> "TraceExchange":
+        sw = bytes.fromhex(exchange["sw"])
+        return cls(
+            command=bytes.fromhex(exchange["command"]),
+            response=APDUResponse(
+                sw1=sw[0], sw2=sw[1], data=bytes.fromhex(exchange["response"])
+            ),
+        )
+
+
+def load_trace(path: Path) -> List[TraceExchange]:
+    """Load a trace written by `save_trace`, one JSON exchange per line"""
+    with path.open() as trace_file:
+        return [
+            TraceExchange.from_dict(json.loads(line))
+            for line in trace_file
+            if line.strip()
+        ]
+
+
+def save_trace(path: Path, trace: List[TraceExchange]) -> None:
+    with path.open("w") as trace_file:
+        for exchange in trace:
+            trace_file.write(json.dumps(exchange.to_dict()) + "\n")
+
+
+@define
+class LatencyModel:
+    """Time taken by the card and reader to answer a command
+
+    `per_exchange` is the fixed round trip cost, `per_byte` the transfer cost of
+    every byte sent and received and `per_ins` the processing time of specific
+    instructions (e.g. the RSA signature).
+    """
+
+    per_exchange: float = 0.0
+    per_byte: float = 0.0
+    per_ins: Dict[int, float] = field(factory=dict)
+
+    def delay(self, ins: int, sent: int, received: int) -> float:
+        return (
+            self.per_exchange
+            + self.per_byte * (sent + received)
+            + self.per_ins.get(ins, 0.0)
+        )
+
+
+# Rough figures for a contact reader and an NFC reader signing with RSA 2048
+CONTACT_READER_LATENCY: Final = LatencyModel(
+    per_exchange=0.004,
+    per_byte=0.00009,
+    per_ins={0x2A: 0.3},
+)
+
+NFC_READER_LATENCY: Final = LatencyModel(
+    per_exchange=0.015,
+    per_byte=0.0004,
+    per_ins={0x2A: 0.35},
+)
+
+
+@define
+class SimulatedSmartCard(SmartCard):
+    """Card answering from a recorded trace
+
+    Commands are looked up by their exact bytes; repeated commands get the
+    recorded responses in order, the last one being repeated afterwards.
+    Commands in `header_match_ins` fall back to a match on CLA INS P1 P2.
+    """
+
+    connection: Any = None
+    trace: List[TraceExchange] = field(factory=list)
+    latency: LatencyModel = field(factory=LatencyModel)
+    header_match_ins: FrozenSet[int] = HEADER_MATCH_INS
+    atr_bytes: bytes = bytes(PERU_DNIE_V2_ATR)
+    reader_name: str = "Simulated DNIe reader"
+    sleep: Callable[[float], None] = time.sleep
+    exchanges: int = field(init=False, default=0)
+    _responses: Dict[bytes, Deque[APDUResponse]] = field(init=False, factory=dict)
+
+    def __attrs_post_init__(self) -> None:
+        for exchange in self.trace:
+            for key in self._keys(exchange.command):
+                self._responses.setdefault(key, deque()).append(exchange.response)
+
+    def _keys(self, command: bytes) -> List[bytes]:
+        if command[1] in self.header_match_ins:
+            return [command, command[:4]]
+        return [command]
+
+    def transmit(self, command: Command) -> APDUResponse:
+        serial_bytes = command.serialize()
+
+        response = None
+        for key in self._keys(serial_bytes):
+            responses = self._responses.get(key)
+            if responses:
+                response = responses.popleft() if len(responses) > 1 else responses[0]
+                break
+
+        if response is None:
+            response = APDUResponse(sw1=MISSING_SW[0], sw2=MISSING_SW[1], data=b"")
+
+        received = len(response.data) + 2 if response.data is not None else 2
+        delay = self.latency.delay(command.ins, len(serial_bytes), received)
+        if delay > 0:
+            self.sleep(delay)
+
+        self.exchanges += 1
+        return response
+
+    def atr(self) -> bytes:
+        return self.atr_bytes
+
+    def reader(self) -> str:
+        return self.reader_name
+
+
+@define
+class RecordingSmartCard(SmartCard):
+    """Forward commands to a card and record the exchanges
+
+    PINs are replaced by zeros so traces can be shared.
+    """
+
+    connection: Any = None
+    card: SmartCard = field(kw_only=True)
+    trace: List[TraceExchange] = field(factory=list)
+
+    def __attrs_post_init__(self) -> None:
+        self.connection = self.card.connection
+
+    def transmit(self, command: Command) -> APDUResponse:
+        response = self.card.transmit(command)
+
+        serial_bytes = command.serialize()
+        if command.ins == _VERIFY_INS and command.data is not None:
+            serial_bytes = serial_bytes[:5] + b"0" * len(command.data)
+
+        self.trace.append(TraceExchange(command=serial_bytes, response=response))
+        return response
+
+    def atr(self) -> bytes:
+        return self.card.atr()
+
+    def reader(self) -> str:
+        return self.card.reader()
+
+    def transaction(self) -> ContextManager[None]:
+        return self.card.transaction()
+
+    def save(self, path: Path) -> None:
+        save_trace(path, self.trace)
+
+
+def synthetic_dnie_trace(
+    certificates: Mapping[CertificateType, bytes],
+    signature: bytes = b"\x5a" * 256,
+    chunk_size: int = 0xE4,
+) -> List[TraceExchange]:
+    """Trace of a DNIe v2 read with short APDUs
+
+    Certificates are read in `chunk_size` chunks with Le 0xFF, the last one
+    ending with SW 6282, as the card does.
+    """
+    ok = (0x90, 0x00)
+
+    def exchange(
+        command: APDUCommand, data: bytes = b"", sw: Tuple[int, int] = ok
+    ) -> TraceExchange:
+        return TraceExchange(
+            command=command.serialize(),
+            response=APDUResponse(sw1=sw[0], sw2=sw[1], data=data),
+        )
+
+    trace = [exchange(SELECT_PKI_APP_CMD)]
+
+    for cert_type, certificate in certificates.items():
+        select_certificate_cmd = SELECT_CERTIFICATE_CMDS[cert_type]
+        trace.append(exchange(select_certificate_cmd))
+
+        for offset in range(0, len(certificate), chunk_size):
+            chunk = certificate[offset : offset + chunk_size]
+            last = offset + chunk_size >= len(certificate)
+            trace.append(
+                exchange(
+                    read_certificate_command(offset, 0xFF),
+                    _discretionary_data(chunk),
+                    sw=(0x62, 0x82) if last else ok,
+                )
+            )
+
+    verify_cmd = APDUCommand(ins=0x20, p1=0x00, p2=0x81, lc=4, data=b"0000")
+    pso_cmd = APDUCommand(ins=0x2A, p1=0x9E, p2=0x9A, lc=1, data=b"\x00")
+
+    trace.append(exchange(verify_cmd))
+    trace.append(exchange(SET_SIGNATURE_ENVIRONMENT_CMD))
+    trace.append(exchange(pso_cmd, signature))
+
+    return trace
+
+
+def _discretionary_data(value: bytes) -> bytes:
+    """Wrap `value` in a 0x53 BER-TLV as returned by READ BINARY odd INS"""
+    length = len(value)
+    if length < 0x80:
+        return bytes([0x53, length]) + value
+    elif length <= 0xFF:
+        return bytes([0x53, 0x81, length]) + value
+    return bytes([0x53, 0x82]) + length.to_bytes(2, byteorder="big") + value
@@ -0,0 +1,193 @@
+# Standard Library
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Final, Union
+
+# Third Party Library
+from attrs import define, field
+
+# A signature is 256 bytes, so this is ~40 MB with the keys and indexes
+DEFAULT_STORE_MAX_ENTRIES: Final = 100_000
+
+# Seconds a writer waits for another process holding the database lock
+_BUSY_TIMEOUT: Final = 30.0
+
+# A read signature only records its use if the last one is older than this, so
+# repeated reads do not write to the database
+DEFAULT_TOUCH_INTERVAL: Final = 3600.0
+
+# Eviction waits until the store is this fraction over `max_entries`, so the
+# entries are only counted again after that many inserts
+_EVICTION_SLACK: Final = 0.1
+
+_SCHEMA: Final = """
+CREATE TABLE IF NOT EXISTS signatures (
+    key_id TEXT NOT NULL,
+    hash_algorithm TEXT NOT NULL,
+    digest BLOB NOT NULL,
+    signature BLOB NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (key_id, hash_algorithm, digest)
+);
+CREATE INDEX IF NOT EXISTS signatures_last_used ON signatures (last_used);
+CREATE TABLE IF NOT EXISTS card_keys (
+    card_id TEXT PRIMARY KEY,
+    key_id TEXT NOT NULL
+);
+"""
+
+
+def get_store_path(cache_dir: Path) -> Path:
+    return cache_dir / "signatures.sqlite3"
+
+
+@define
+class SignatureStore:
+    """SQLite store of the signatures made by each signing key
+
+    Entries are keyed by signing certificate fingerprint, hash algorithm and
+    digest. PKCS#1 v1.5 signatures are deterministic, so a stored signature is
+    the one the card would make again. The database uses WAL mode, so readers
+    in other threads and processes are not blocked by a writer. Past
+    `max_entries`, the least recently used signatures are evicted, with the
+    last use recorded at most once per `touch_interval` seconds. Entries are
+    counted once, then tracked as they are inserted, and eviction runs when
+    the count goes over `max_entries` by `_EVICTION_SLACK`.
+    """
+
+    path: Path
+    max_entries: int = DEFAULT_STORE_MAX_ENTRIES
+    touch_interval: float = DEFAULT_TOUCH_INTERVAL
+    # sqlite3 connections can only be used by the thread that opened them
+    _local: threading.local = field(init=False, factory=threading.local)
+    # Entries counted on the first insert plus the inserts since, the changes
+    # of other processes are seen on the next count
+    _entries: Union[int, None] = field(init=False, default=None)
+    _entries_lock: threading.Lock = field(init=False, factory=threading.Lock)
+
+    def get(
+        self, key_id: str, hash_algorithm: str, digest: bytes
+    ) -> Union[bytes, None]:
+        key = (key_id, hash_algorithm, digest)
+        connection = self._connection()
+
+        row = connection.execute(
+            "SELECT signature, last_used FROM signatures"
+            " WHERE key_id = ? AND hash_algorithm = ? AND digest = ?",
+            key,
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        signature: bytes = row[0]
+        last_used: float = row[1]
+        now = time.time()
+        if now - last_used >= self.touch_interval:
+            with connection:
+                connection.execute(
+                    "UPDATE signatures SET last_used = ?"
+                    " WHERE key_id = ? AND hash_algorithm = ? AND digest = ?",
+                    (now, *key),
+                )
+
+        return signature
+
+    def put(
+        self,
+        key_id: str,
+        hash_algorithm: str,
+        digest: bytes,
+        signature: bytes,
+    ) -> None:
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO signatures VALUES (?, ?, ?, ?, ?)",
+                (key_id, hash_algorithm, digest, signature, time.time()),
+            )
+
+        with self._entries_lock:
+            if self._entries is None:
+                self._entries = self.count()
+            else:
+                self._entries += 1
+
+            high_water = self.max_entries + int(self.max_entries * _EVICTION_SLACK)
+            if self._entries > high_water:
+                self._entries = self._evict()
+
+    def use_key(self, card_id: str, key_id: str) -> None:
+        """Record `key_id` as the signing key of the card `card_id`
+
+        The signatures of the previous key of the card are removed, as a
+        renewed certificate replaces it.
+        """
+        connection = self._connection()
+
+        row = connection.execute(
+            "SELECT key_id FROM card_keys WHERE card_id = ?", (card_id,)
+        ).fetchone()
+        if row is not None and row[0] == key_id:
+            return
+
+        with connection:
+            if row is not None:
+                connection.execute("DELETE FROM signatures WHERE key_id = ?", row)
+            connection.execute(
+                "INSERT OR REPLACE INTO card_keys VALUES (?, ?)", (card_id, key_id)
+            )
+
+    def invalidate(self, key_id: Union[str, None] = None) -> None:
+        """Remove the signatures of one key, or of all keys"""
+        with self._connection() as connection:
+            if key_id is None:
+                connection.execute("DELETE FROM signatures")
+            else:
+                connection.execute("DELETE FROM signatures WHERE key_id = ?", (key_id,))
+
+    def count(self) -> int:
+        with self._connection() as connection:
+            (entries,) = connection.execute(
+                "SELECT COUNT(*) FROM signatures"
+            ).fetchone()
+            return int(entries)
+
+    def _evict(self) -> int:
+        """Evict the least recently used signatures past `max_entries`
+
+        Returns the entries left.
+        """
+        with self._connection() as connection:
+            (entries,) = connection.execute(
+                "SELECT COUNT(*) FROM signatures"
+            ).fetchone()
+            if entries <= self.max_entries:
+                return int(entries)
+
+            connection.execute(
+                "DELETE FROM signatures WHERE rowid IN ("
+                " SELECT rowid FROM signatures ORDER BY last_used, rowid LIMIT ?)",
+                (entries - self.max_entries,),
+            )
+            return self.max_entries
+
+    def close(self) -> None:
+        """Close the connection of the calling thread"""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.path), timeout=_BUSY_TIMEOUT)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            self._local.connection = connection
+
+        return connection
@@ -0,0 +1,142 @@
+"""Phase tracing in the Chrome trace event format, readable by Perfetto
+
+Only the standard library is used, so the CLI can import this module without
+slowing down its startup. Spans cost a global lookup while tracing is off.
+"""
+
+# Standard Library
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    List,
+    Set,
+    Type,
+    TypeVar,
+    Union,
+    cast,
+)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_NO_SPAN = nullcontext()
+
+
+class Tracer:
+    """Collects complete ("X") events, with one track per thread"""
+
+    def __init__(self) -> None:
+        self.events: List[Dict[str, Any]] = []
+        self._threads: Set[int] = set()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._origin = time.perf_counter()
+
+    def add(self, name: str, start: float, end: float, args: Dict[str, Any]) -> None:
+        thread = threading.current_thread()
+        tid = threading.get_ident()
+        event = {
+            "name": name,
+            "cat": "peru_dnie",
+            "ph": "X",
+            "ts": (start - self._origin) * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": self._pid,
+            "tid": tid,
+        }
+        if args:
+            event["args"] = args
+
+        with self._lock:
+            if tid not in self._threads:
+                self._threads.add(tid)
+                self.events.append(
+                    {
+                        "name": "thread_name",
+                        "ph": "M",
+                        "pid": self._pid,
+                        "tid": tid,
+                        "args": {"name": thread.name},
+                    }
+                )
+            self.events.append(event)
+
+    def to_json(self) -> str:
+        with self._lock:
+            events = list(self.events)
+        return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"})
+
+    def save(self, path: Path) -> None:
+        path.write_text(self.to_json())
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer: Tracer, name: str, args: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = 0.0
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Union[Type[BaseException], None], *_: Any) -> None:
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.add(self.name, self.start, time.perf_counter(), self.args)
+
+
+_tracer: Union[Tracer, None] = None
+
+
+def start_tracing() -> Tracer:
+    """Record the spans of every thread from now on"""
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def stop_tracing() -> Union[Tracer, None]:
+    """Stop recording and return the tracer with the spans so far"""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def span(name: str, **args: Any) -> ContextManager[Any]:
+    """Time the block as a span named `name` if tracing is on
+
+    Spans of the same thread nest by time.
+    """
+    if _tracer is None:
+        return _NO_SPAN
+
+    return _Span(_tracer, name, args)
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Decorator recording every call of the function as a span"""
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _tracer is None:
+                return func(*args, **kwargs)
+
+            with _Span(_tracer, name, {}):
+                return func(*args, **kwargs)
+
+        return cast(F, wrapper)
+
+    return decorator
@@ -0,0 +1,171 @@
+"""Offline verification of DNIe signatures, no card needed
+
+Signatures are RSA PKCS#1 v1.5, checked against the public key of the
+certificate written by `extract_certificate_to_file`.
+"""
+
+# Standard Library
+import base64
+import hmac
+from pathlib import Path
+from typing import Callable, Iterator, Sequence, Tuple, Union
+
+# Third Party Library
+from attrs import define
+
+# First Party Library
+from peru_dnie import der
+from peru_dnie.cms import RSA_ENCRYPTION
+from peru_dnie.hashes import HashFunction
+from peru_dnie.i18n import t
+from peru_dnie.pipeline import HashingEngine
+
+_PEM_HEADER = b"-----BEGIN CERTIFICATE-----"
+_PEM_FOOTER = b"-----END CERTIFICATE-----"
+
+
+@define
+class RSAPublicKey:
+    modulus: int
+    exponent: int
+
+    @property
+    def size(self) -> int:
+        """Size in bytes of the modulus and the signatures"""
+        return (self.modulus.bit_length() + 7) // 8
+
+    def verify_digest(
+        self,
+        hash_func: HashFunction,
+        digest: bytes,
+        signature: bytes,
+    ) -> bool:
+        """Check a PKCS#1 v1.5 signature of `digest`"""
+        if len(signature) != self.size:
+            return False
+
+        signature_int = int.from_bytes(signature, byteorder="big")
+        if signature_int >= self.modulus:
+            return False
+
+        message = pow(signature_int, self.exponent, self.modulus)
+        encoded = message.to_bytes(self.size, byteorder="big")
+
+        digest_info = hash_func.der_encoding() + digest
+        padding = b"\xff" * (self.size - len(digest_info) - 3)
+        expected = b"\x00\x01" + padding + b"\x00" + digest_info
+
+        return hmac.compare_digest(encoded, expected)
+
+
+# Checks the contents of a signature file against a document digest, e.g.
+# `check_signature` for raw signatures or `merkle.check_proof_file`
+CheckSignature = Callable[[RSAPublicKey, HashFunction, bytes, bytes], bool]
+
+
+@define
+class VerificationResult:
+    input_file: Path
+    signature_file: Path
+    valid: bool
+    reason: Union[str, None] = None
+
+
+def check_signature(
+    public_key: RSAPublicKey,
+    hash_func: HashFunction,
+    digest: bytes,
+    signature: bytes,
+) -> bool:
+    return public_key.verify_digest(hash_func, digest, signature)
+
+
+def load_certificate(path: Path) -> bytes:
+    """DER certificate from a DER or PEM file"""
+    data = path.read_bytes()
+
+    start = data.find(_PEM_HEADER)
+    if start == -1:
+        return data
+
+    end = data.find(_PEM_FOOTER, start)
+    return base64.b64decode(data[start + len(_PEM_HEADER) : end])
+
+
+def certificate_public_key(certificate: bytes) -> RSAPublicKey:
+    """RSA public key of a DER X.509 certificate"""
+    tbs_certificate = der.elements(certificate)[0]
+    fields = der.elements(tbs_certificate)
+
+    # Skip the optional version, [0] EXPLICIT
+    if fields[0][0] == 0xA0:
+        fields = fields[1:]
+
+    # serialNumber, signature, issuer, validity, subject, subjectPublicKeyInfo
+    algorithm, public_key = der.elements(fields[5])
+    if der.elements(algorithm)[0] != der.oid(RSA_ENCRYPTION):
+        raise ValueError(t["errors"]["not_rsa_certificate"])
+
+    # BIT STRING with no unused bits holding the RSAPublicKey
+    modulus, exponent = der.elements(der.value(public_key)[1:])
+
+    return RSAPublicKey(
+        modulus=der.decode_integer(modulus),
+        exponent=der.decode_integer(exponent),
+    )
+
+
+def signature_files(
+    input_files: Sequence[Path],
+    suffix: str,
+    signature_dir: Union[Path, None] = None,
+) -> Sequence[Tuple[Path, Path]]:
+    """Pair every input file with its signature file
+
+    Signatures are next to their file, or in `signature_dir` as `sign` writes
+    them when signing several files.
+    """
+    if signature_dir is not None:
+        return [(path, signature_dir / (path.name + suffix)) for path in input_files]
+
+    return [
+        (path, path.with_name(path.name + suffix))
+        for path in input_files
+        if not path.name.endswith(suffix)
+    ]
+
+
+def verify_files(
+    public_key: RSAPublicKey,
+    jobs: Sequence[Tuple[Path, Path]],
+    engine: HashingEngine,
+    check: CheckSignature = check_signature,
+) -> Iterator[VerificationResult]:
+    """Check the signature of every (file, signature file) pair
+
+    Files are hashed in parallel by `engine`. Pairs with a missing file are
+    reported first, the rest in the order of `jobs`.
+    """
+    checked = []
+    for input_file, signature_file in jobs:
+        if not input_file.is_file():
+            yield VerificationResult(
+                input_file, signature_file, False, t["verify"]["missing_file"]
+            )
+        elif not signature_file.is_file():
+            yield VerificationResult(
+                input_file, signature_file, False, t["verify"]["missing_signature"]
+            )
+        else:
+            checked.append((input_file, signature_file))
+
+    digests = engine.digests(input_file for input_file, _ in checked)
+    for (input_file, signature_file), (_, digest) in zip(checked, digests):
+        signature = signature_file.read_bytes()
+
+        if check(public_key, engine.hash_func, digest, signature):
+            yield VerificationResult(input_file, signature_file, True)
+        else:
+            yield VerificationResult(
+                input_file, signature_file, False, t["verify"]["bad_signature"]
+            )
@@ -0,0 +1,206 @@
+"""Benchmarks of the hot paths, compared with a stored baseline
+
+Run with `make bench`. Each benchmark reports the best time per call out of
+several repeats, relative to a reference workload timed in the same run so
+results from different machines can be compared. The run fails when one of
+them is slower than the baseline by more than the tolerance.
+"""
+
+# Standard Library
+import io
+import json
+import platform
+import sys
+import timeit
+from argparse import ArgumentParser
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Union
+
+# First Party Library
+from peru_dnie.apdu import APDUCommand, APDUTemplate
+from peru_dnie.cli_config import HEADLESS_CONFIG
+from peru_dnie.commands.certificate import extract_certificate
+from peru_dnie.commands.signature import (
+    PaddingSchemes,
+    build_signature_payload,
+    sign_bytes,
+)
+from peru_dnie.constants import CertificateType
+from peru_dnie.context import Context
+from peru_dnie.hashes import HashFunction
+from peru_dnie.simulator import (
+    CONTACT_READER_LATENCY,
+    NFC_READER_LATENCY,
+    LatencyModel,
+    SimulatedSmartCard,
+    synthetic_dnie_trace,
+)
+
+BENCHMARKS_DIR = Path(__file__).parent
+DEFAULT_BASELINE = BENCHMARKS_DIR / "baseline.json"
+DEFAULT_TOLERANCE = 0.5
+REPEATS = 5
+
+HASH_SIZES = {"1KiB": 1024, "1MiB": 1024 * 1024, "16MiB": 16 * 1024 * 1024}
+
+LATENCY_MODELS = {
+    "none": LatencyModel(),
+    "contact": CONTACT_READER_LATENCY,
+    "nfc": NFC_READER_LATENCY,
+}
+
+# A DNIe certificate is around 1.5 KiB
+CERTIFICATE = bytes(range(256)) * 6
+
+
+def measure(func: Callable[[], Any]) -> float:
+    """Best time in seconds of one call to `func`"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=REPEATS, number=number)) / number
+
+
+def reference_workload() -> None:
+    """Fixed mix of interpreter and C work, the unit of the relative times"""
+    items = [{"id": i, "name": f"item-{i}"} for i in range(1000)]
+    sorted(json.dumps(items), reverse=True)
+
+
+def simulated_context(latency: LatencyModel) -> Context:
+    card = SimulatedSmartCard(
+        trace=synthetic_dnie_trace({CertificateType.SIGNATURE: CERTIFICATE}),
+        latency=latency,
+    )
+    return Context(
+        hash_func=HashFunction("sha256"),
+        card=card,
+        cli=HEADLESS_CONFIG,
+        pin_provider=lambda _: "000000",
+    )
+
+
+def run_benchmarks(latency: LatencyModel) -> Dict[str, Dict[str, Any]]:
+    results: Dict[str, Dict[str, Any]] = {}
+    reference = measure(reference_workload)
+
+    def add(name: str, func: Callable[[], Any], size: Union[int, None] = None):
+        seconds = measure(func)
+        results[name] = {"relative": seconds / reference, "bytes": size}
+
+        throughput = f"  {size / seconds / 2**20:10.1f} MiB/s" if size else ""
+        print(f"{name:40} {seconds * 1e6:14.2f} us{throughput}")
+
+    for hash_name in ("sha256", "sha512"):
+        hash_func = HashFunction(hash_name)
+        for label, size in HASH_SIZES.items():
+            data = bytes(size)
+            add(f"hash_{hash_name}_{label}", partial(hash_func, data), size)
+            add(
+                f"hash_stream_{hash_name}_{label}",
+                lambda f=hash_func, d=data: f.hash_stream(io.BytesIO(d)),
+                size,
+            )
+
+    sha256 = HashFunction("sha256")
+    add(
+        "build_signature_payload",
+        lambda: build_signature_payload(b"document", sha256, PaddingSchemes.PKCS1_15),
+    )
+
+    short_command = APDUCommand(
+        ins=0xB1, p1=0x00, p2=0x00, lc=0x04, data=b"\x54\x02\x00\x00", le=0xFF
+    )
+    extended_command = APDUCommand(ins=0x2A, p1=0x9E, p2=0x9A, lc=300, data=bytes(300))
+    add("apdu_serialize_short", short_command.serialize)
+    add("apdu_serialize_extended", extended_command.serialize)
+    add(
+        "apdu_build_short",
+        lambda: APDUCommand(
+            ins=0xB1, p1=0x00, p2=0x00, lc=0x04, data=b"\x54\x02\x00\x00", le=0xFF
+        ),
+    )
+    read_template = APDUTemplate(short_command, data_offset=2, size=2)
+    add("apdu_template_set_field", lambda: read_template.set_field(0x01E4))
+
+    ctx = simulated_context(latency)
+    add("sign_bytes_simulated", lambda: sign_bytes(ctx, b"document"))
+    add(
+        "extract_certificate_simulated",
+        lambda: extract_certificate(ctx, CertificateType.SIGNATURE),
+    )
+
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    tolerance: float,
+) -> bool:
+    """Print the slowdowns against the baseline, False if one is too large"""
+    ok = True
+    for name, result in results.items():
+        if "relative" not in baseline.get(name, {}):
+            continue
+
+        ratio = result["relative"] / baseline[name]["relative"]
+        if ratio > 1 + tolerance:
+            ok = False
+            print(f"SLOWER {name}: {ratio:.2f}x the baseline")
+
+    return ok
+
+
+def main() -> int:
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--output", type=Path, help="Write the results to this file")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="Allowed slowdown, 0.5 is 50%% slower than the baseline",
+    )
+    parser.add_argument(
+        "--latency",
+        default="none",
+        choices=list(LATENCY_MODELS),
+        help="Latency model of the simulated card",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Store the results as the new baseline",
+    )
+    args = parser.parse_args()
+
+    results = run_benchmarks(LATENCY_MODELS[args.latency])
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "latency": args.latency,
+        "benchmarks": results,
+    }
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}, run with --update-baseline")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get("latency") != args.latency:
+        print(f"The baseline was measured with latency {baseline.get('latency')}")
+        return 0
+
+    return 0 if compare(results, baseline["benchmarks"], args.tolerance) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
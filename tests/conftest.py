@@ -8,4 +8,6 @@ from peru_dnie.hashes import HashFunction
 
 @pytest.fixture(scope="session")
 def ctx():
-    yield FakeContext(hash_func=HashFunction(name="sha256"))
+    yield FakeContext(
+        hash_func=HashFunction(name="sha256"), pin_provider=lambda _: "1234"
+    )
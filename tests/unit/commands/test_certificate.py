@@ -0,0 +1,174 @@
+# Third Party Library
+import pytest
+
+# First Party Library
+from peru_dnie import der
+from peru_dnie.apdu import APDUResponse
+from peru_dnie.cache import CardFileCache
+from peru_dnie.commands.certificate import (
+    SELECT_CERTIFICATE_CMDS,
+    extract_all_certificates,
+    extract_certificate,
+)
+from peru_dnie.commands.general import SELECT_PKI_APP_CMD
+from peru_dnie.constants import CertificateType
+from peru_dnie.context import Context, FakeContext
+from peru_dnie.simulator import (
+    RecordingSmartCard,
+    SimulatedSmartCard,
+    synthetic_dnie_trace,
+)
+
+
+@pytest.mark.pointer(target=extract_certificate)
+def test_extract_certificate_cached(tmp_path):
+    cache = CardFileCache(tmp_path)
+    cache.put("card", "certificate_signature", b"some certificate")
+    ctx = FakeContext(cache=cache, card_id="card")
+
+    certificate = extract_certificate(ctx, CertificateType.SIGNATURE)
+
+    assert certificate == b"some certificate"
+
+
+class FakeCardContext(Context):
+    """Answers certificate reads like a card limited to `max_chunk` bytes"""
+
+    def __init__(self, certificate, max_le, max_chunk=0xE4):
+        super().__init__()
+        self.certificate = certificate
+        self.max_le = max_le
+        self.max_chunk = max_chunk
+        self.read_lengths = []
+
+    def transmit(self, command):
+        if command.ins != 0xB1:
+            return APDUResponse(sw1=0x90, sw2=0x00, data=b"")
+
+        if command.le > self.max_le:
+            return APDUResponse(sw1=0x67, sw2=0x00, data=b"")
+
+        self.read_lengths.append(command.le)
+        offset = int.from_bytes(command.data[2:], byteorder="big")
+        chunk = self.certificate[offset : offset + min(command.le, self.max_chunk)]
+        sw1, sw2 = (0x90, 0x00)
+        if offset + len(chunk) >= len(self.certificate):
+            sw1, sw2 = (0x62, 0x82)
+
+        length = len(chunk)
+        if length < 0x80:
+            header = bytes([0x53, length])
+        elif length <= 0xFF:
+            header = bytes([0x53, 0x81, length])
+        else:
+            header = bytes([0x53, 0x82]) + length.to_bytes(2, byteorder="big")
+
+        return APDUResponse(sw1=sw1, sw2=sw2, data=memoryview(header + chunk))
+
+
+@pytest.mark.pointer(target=extract_certificate)
+@pytest.mark.parametrize(
+    ("max_le", "max_chunk", "reads"),
+    [
+        (0xFF, 0xE4, 7),
+        (0x1000, 0x1000, 1),
+        (0x0400, 0x0400, 2),
+    ],
+)
+@pytest.mark.parametrize(
+    "certificate",
+    [
+        # Sized from its DER header, or of unknown size
+        der.sequence((bytes(range(256)) * 6)[:-4]),
+        bytes(range(256)) * 6,
+    ],
+)
+def test_extract_certificate(max_le, max_chunk, reads, certificate):
+    ctx = FakeCardContext(certificate, max_le=max_le, max_chunk=max_chunk)
+
+    read = extract_certificate(ctx, CertificateType.SIGNATURE)
+
+    assert read == certificate
+    # The read buffer itself, not a copy
+    assert isinstance(read, bytearray)
+    assert len(ctx.read_lengths) == reads
+
+
+class MoreDataCardContext(FakeCardContext):
+    """Answers the first 0x80 bytes of every read, the rest after GET RESPONSE"""
+
+    def transmit(self, command):
+        if command.ins == 0xC0:
+            return self.rest
+
+        r = super().transmit(command)
+        if command.ins != 0xB1 or not r.data:
+            return r
+
+        data = bytes(r.data)
+        self.rest = APDUResponse(sw1=r.sw1, sw2=r.sw2, data=data[0x80:])
+        return APDUResponse(sw1=0x61, sw2=len(data) - 0x80, data=data[:0x80])
+
+
+@pytest.mark.pointer(target=extract_certificate)
+def test_extract_certificate_get_response():
+    certificate = bytes(range(256)) * 6
+    ctx = MoreDataCardContext(certificate, max_le=0x1000, max_chunk=0x100)
+
+    assert extract_certificate(ctx, CertificateType.SIGNATURE) == certificate
+    # More data is not a length error, the chunk size is kept
+    assert set(ctx.read_lengths) == {0x1000}
+
+
+@pytest.mark.pointer(target=extract_all_certificates)
+def test_extract_all_certificates():
+    certificates = {
+        cert_type: bytes([idx]) * (500 + idx)
+        for idx, cert_type in enumerate(CertificateType)
+    }
+    card = RecordingSmartCard(
+        card=SimulatedSmartCard(trace=synthetic_dnie_trace(certificates))
+    )
+    ctx = Context(card=card)
+
+    assert extract_all_certificates(ctx) == certificates
+
+    commands = [exchange.command for exchange in card.trace]
+    assert commands.count(SELECT_PKI_APP_CMD.serialize()) == 1
+    for select_certificate_cmd in SELECT_CERTIFICATE_CMDS.values():
+        assert commands.count(select_certificate_cmd.serialize()) == 1
+
+
+@pytest.mark.pointer(target=extract_all_certificates)
+def test_extract_all_certificates_cached(tmp_path):
+    certificates = {
+        cert_type: bytes([idx]) * (500 + idx)
+        for idx, cert_type in enumerate(CertificateType)
+    }
+    cache = CardFileCache(tmp_path)
+    for cert_type, certificate in certificates.items():
+        if cert_type != CertificateType.ENCRYPTION:
+            cache.put("card", f"certificate_{cert_type.name.lower()}", certificate)
+
+    missing = {CertificateType.ENCRYPTION: certificates[CertificateType.ENCRYPTION]}
+    card = RecordingSmartCard(
+        card=SimulatedSmartCard(trace=synthetic_dnie_trace(missing))
+    )
+    ctx = Context(card=card, cache=cache, card_id="card")
+
+    # Only the missing certificate is read from the card
+    assert extract_all_certificates(ctx) == certificates
+    selected = {
+        cert_type
+        for cert_type, select_certificate_cmd in SELECT_CERTIFICATE_CMDS.items()
+        if any(
+            exchange.command == select_certificate_cmd.serialize()
+            for exchange in card.trace
+        )
+    }
+    assert selected == {CertificateType.ENCRYPTION}
+
+    # All of them cached now: the card is not used
+    card.trace.clear()
+    assert extract_all_certificates(ctx) == certificates
+    assert card.trace == []
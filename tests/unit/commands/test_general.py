@@ -0,0 +1,81 @@
+# Standard Library
+import threading
+
+# Third Party Library
+import pytest
+
+# First Party Library
+from peru_dnie.cli_config import CliConfig
+from peru_dnie.commands import general
+from peru_dnie.commands.general import (
+    PinType,
+    RememberedPin,
+    read_card_id,
+    verify_pin,
+)
+from peru_dnie.context import Context
+from peru_dnie.exceptions import PinError
+from peru_dnie.simulator import SimulatedSmartCard
+
+
+@pytest.mark.pointer(target=read_card_id)
+def test_read_card_id_unsupported(monkeypatch, capsys):
+    monkeypatch.setattr(general, "_warned_no_card_id", False)
+    # The card answers nothing to GET DATA
+    ctx = Context(card=SimulatedSmartCard(), cli=CliConfig())
+
+    assert read_card_id(ctx) is None
+    # Warned that nothing is kept per card
+    assert capsys.readouterr().out
+
+    # Only once
+    assert read_card_id(ctx) is None
+    assert not capsys.readouterr().out
+
+
+@pytest.mark.pointer(target=RememberedPin)
+def test_remembered_pin():
+    asked = []
+
+    def provider(pin_type):
+        asked.append(pin_type)
+        return "1234"
+
+    remembered = RememberedPin(CliConfig(interactive=False), provider)
+    errors = []
+
+    def worker():
+        try:
+            remembered(PinType.SIGNATURE)
+        except PinError as e:
+            errors.append(e)
+
+    # Worker threads never ask for a PIN
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    assert len(errors) == 1 and not asked
+
+    assert remembered(PinType.SIGNATURE) == "1234"
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    assert len(errors) == 1
+    assert asked == [PinType.SIGNATURE]
+
+
+@pytest.mark.pointer(target=verify_pin)
+def test_verify_pin_forgets_rejected_pin():
+    remembered = RememberedPin(CliConfig(interactive=False), lambda _: "0000")
+    ctx = Context(
+        # The card rejects every command
+        card=SimulatedSmartCard(),
+        cli=CliConfig(interactive=False),
+        pin_provider=remembered,
+    )
+
+    with pytest.raises(PinError):
+        verify_pin(ctx, pin_type=PinType.SIGNATURE)
+
+    assert not remembered._pins
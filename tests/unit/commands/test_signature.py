@@ -1,17 +1,38 @@
 # Standard Library
+import hashlib
+from functools import partial
 from unittest.mock import MagicMock
 
 # Third Party Library
 import pytest
 
 # First Party Library
-from peru_dnie.commands import general
+from peru_dnie import der, merkle
+from peru_dnie.cache import CardFileCache
+from peru_dnie.cli_config import HEADLESS_CONFIG
 from peru_dnie.commands.signature import (
     PaddingSchemes,
     build_signature_payload,
+    compute_cms_signature,
+    prepare_signature,
+    read_digest_manifest,
     sign_bytes,
+    sign_digest,
+    sign_digests,
+    sign_file,
+    sign_files,
+    sign_files_merkle,
+    sign_files_with_pool,
+    signing_key_id,
+    stored_or_compute_signature,
 )
+from peru_dnie.constants import CertificateType
+from peru_dnie.context import Context, FakeContext
 from peru_dnie.hashes import HashFunction
+from peru_dnie.pipeline import HashingEngine
+from peru_dnie.pool import CardPool
+from peru_dnie.simulator import SimulatedSmartCard, synthetic_dnie_trace
+from peru_dnie.store import SignatureStore
 
 
 @pytest.mark.pointer(target=build_signature_payload)
@@ -35,11 +56,261 @@ def test_build_signature_payload():
 def test_sign_bytes(ctx):
     input_bytes = b"some information to sign"
 
-    class FakePrompt:
-        ask = MagicMock(return_value="1234")
-
-    general.Prompt = FakePrompt
-
     signature = sign_bytes(ctx, input_bytes)
 
     assert signature == b"\xff" * 10
+
+
+@pytest.mark.pointer(target=stored_or_compute_signature)
+def test_stored_or_compute_signature(tmp_path):
+    transmitted = []
+
+    class CountingContext(FakeContext):
+        def transmit(self, command):
+            transmitted.append(command)
+            return super().transmit(command)
+
+    ctx = CountingContext(
+        hash_func=HashFunction(name="sha256"),
+        signing_key_id="key",
+        signature_store=SignatureStore(tmp_path / "signatures.sqlite3"),
+    )
+
+    assert stored_or_compute_signature(ctx, b"\x00" * 32) == b"\xff" * 10
+    assert stored_or_compute_signature(ctx, b"\x00" * 32) == b"\xff" * 10
+    assert stored_or_compute_signature(ctx, b"\x01" * 32) == b"\xff" * 10
+
+    # The repeated digest never reached the card
+    assert len(transmitted) == 2
+
+
+@pytest.mark.pointer(target=sign_digest)
+def test_sign_digest_store_lookup(tmp_path):
+    store = SignatureStore(tmp_path / "signatures.sqlite3")
+    ctx = FakeContext(
+        hash_func=HashFunction(name="sha256"),
+        signing_key_id="key",
+        signature_store=store,
+        pin_provider=lambda _: "1234",
+    )
+    statements = []
+    store._connection().set_trace_callback(statements.append)
+
+    assert sign_digest(ctx, b"\x00" * 32) == b"\xff" * 10
+
+    # Looked up once on a miss, then written by `compute_signature`
+    lookups = [s for s in statements if s.startswith("SELECT signature")]
+    assert len(lookups) == 1
+    assert store.get("key", "sha256", b"\x00" * 32) == b"\xff" * 10
+
+
+@pytest.mark.pointer(target=signing_key_id)
+def test_signature_store_renewed_certificate(tmp_path):
+    store = SignatureStore(tmp_path / "signatures.sqlite3")
+    digest = b"\x00" * 32
+
+    def card_context(certificate, signature):
+        card = SimulatedSmartCard(
+            trace=synthetic_dnie_trace(
+                {CertificateType.SIGNATURE: certificate}, signature=signature
+            )
+        )
+        return Context(
+            hash_func=HashFunction(name="sha256"),
+            card=card,
+            cli=HEADLESS_CONFIG,
+            signature_store=store,
+            pin_provider=lambda _: "1234",
+        )
+
+    assert sign_digest(card_context(b"old", b"\x01" * 256), digest) == b"\x01" * 256
+    # Same card with a renewed certificate: the old signature is not reused
+    renewed = card_context(b"new", b"\x02" * 256)
+    assert sign_digest(renewed, digest) == b"\x02" * 256
+    assert renewed.signing_key_id == hashlib.sha256(b"new").hexdigest()
+    assert store.count() == 2
+
+
+@pytest.mark.pointer(target=signing_key_id)
+def test_signing_key_id_cached_certificate(tmp_path):
+    store = SignatureStore(tmp_path / "signatures.sqlite3")
+    cache = CardFileCache(tmp_path / "cache")
+    digest = b"\x00" * 32
+
+    def card_context(certificate, signature):
+        card = SimulatedSmartCard(
+            trace=synthetic_dnie_trace(
+                {CertificateType.SIGNATURE: certificate}, signature=signature
+            )
+        )
+        return Context(
+            hash_func=HashFunction(name="sha256"),
+            card=card,
+            cli=HEADLESS_CONFIG,
+            cache=cache,
+            card_id="card",
+            signature_store=store,
+            pin_provider=lambda _: "1234",
+            recorded_exchanges=[],
+        )
+
+    assert sign_digest(card_context(b"old", b"\x01" * 256), digest) == b"\x01" * 256
+
+    # The fingerprint comes from the cached certificate, the card is not used
+    again = card_context(b"old", b"\x01" * 256)
+    assert sign_digest(again, digest) == b"\x01" * 256
+    assert again.recorded_exchanges == []
+
+    # Renewed certificate read again: the signatures of the old key are dropped
+    cache.invalidate("card")
+    renewed = card_context(b"new", b"\x02" * 256)
+    assert sign_digest(renewed, digest) == b"\x02" * 256
+    assert store.count() == 1
+
+
+@pytest.mark.pointer(target=sign_file)
+def test_sign_file(ctx, tmp_path):
+    input_file = tmp_path / "input.txt"
+    input_file.write_bytes(b"some information to sign")
+    output_file = tmp_path / "input.txt.sig"
+
+    sign_file(ctx, input_file=input_file, output_file=output_file)
+
+    assert output_file.read_bytes() == b"\xff" * 10
+
+
+@pytest.mark.pointer(target=sign_files)
+def test_sign_files(tmp_path):
+    jobs = []
+    for idx in range(5):
+        input_file = tmp_path / f"input_{idx}.txt"
+        input_file.write_bytes(b"some information to sign %d" % idx)
+        jobs.append((input_file, tmp_path / f"input_{idx}.txt.sig"))
+
+    ask_pin = MagicMock(return_value="1234")
+    ctx = FakeContext(hash_func=HashFunction(name="sha256"), pin_provider=ask_pin)
+    sign_files(ctx, jobs)
+
+    assert ask_pin.call_count == 1
+    for _, output_file in jobs:
+        assert output_file.read_bytes() == b"\xff" * 10
+
+
+@pytest.mark.pointer(target=sign_files_merkle)
+def test_sign_files_merkle(tmp_path):
+    signed = []
+
+    class SigningContext(FakeContext):
+        def transmit(self, command):
+            if command.ins == 0x2A:
+                signed.append(command.data)
+            return super().transmit(command)
+
+    ctx = SigningContext(
+        hash_func=HashFunction(name="sha256"), pin_provider=lambda _: "1234"
+    )
+    jobs = []
+    for idx in range(5):
+        input_file = tmp_path / f"input_{idx}.txt"
+        input_file.write_bytes(b"some information to sign %d" % idx)
+        jobs.append((input_file, tmp_path / f"input_{idx}.txt.proof"))
+
+    root = sign_files_merkle(ctx, jobs)
+
+    # The card signs the root as a digest
+    assert signed == [ctx.hash_func.der_encoding() + root]
+
+    for input_file, output_file in jobs:
+        proof = merkle.InclusionProof.from_json(output_file.read_text())
+        assert proof.signature == b"\xff" * 10
+        assert proof.tree_size == 5
+
+        digest = ctx.hash_func.hash_file(input_file)
+        assert (
+            merkle.root_from_path(
+                ctx.hash_func, digest, proof.leaf_index, proof.tree_size, proof.path
+            )
+            == root
+        )
+
+
+@pytest.mark.pointer(target=sign_files_with_pool)
+def test_sign_files_with_pool(tmp_path):
+    hash_func = HashFunction(name="sha256")
+    jobs = []
+    for idx in range(10):
+        input_file = tmp_path / f"input_{idx}.txt"
+        input_file.write_bytes(b"some information to sign %d" % idx)
+        jobs.append((input_file, tmp_path / f"input_{idx}.txt.sig"))
+
+    ask_pin = MagicMock(return_value="1234")
+    contexts = [
+        FakeContext(hash_func=hash_func, pin_provider=ask_pin) for _ in range(3)
+    ]
+    with CardPool(contexts, initializer=prepare_signature) as pool:
+        sign_files_with_pool(pool, jobs, engine=HashingEngine(hash_func))
+
+    assert ask_pin.call_count == 3
+    for _, output_file in jobs:
+        assert output_file.read_bytes() == b"\xff" * 10
+
+
+@pytest.mark.pointer(target=sign_digests)
+def test_sign_digests(ctx, tmp_path):
+    jobs = [(bytes([idx]) * 32, tmp_path / f"digest_{idx}.sig") for idx in range(3)]
+
+    sign_digests(ctx, jobs)
+
+    for _, output_file in jobs:
+        assert output_file.read_bytes() == b"\xff" * 10
+
+    with pytest.raises(ValueError):
+        sign_digests(ctx, [(b"\x00" * 20, tmp_path / "short.sig")])
+
+    assert not (tmp_path / "short.sig").exists()
+
+
+@pytest.mark.pointer(target=read_digest_manifest)
+def test_read_digest_manifest(tmp_path):
+    manifest_file = tmp_path / "manifest.txt"
+    manifest_file.write_text(
+        "# digests of the documents\n"
+        f"{'ab' * 32}  first.sig\n"
+        "\n"
+        f"{'CD' * 32}\tsignatures/second.sig\n"
+    )
+
+    assert read_digest_manifest(manifest_file) == [
+        (b"\xab" * 32, tmp_path / "first.sig"),
+        (b"\xcd" * 32, tmp_path / "signatures" / "second.sig"),
+    ]
+
+    manifest_file.write_text(f"{'ab' * 32}\n")
+    with pytest.raises(ValueError):
+        read_digest_manifest(manifest_file)
+
+    manifest_file.write_text("not-hex first.sig\n")
+    with pytest.raises(ValueError):
+        read_digest_manifest(manifest_file)
+
+
+@pytest.mark.pointer(target=compute_cms_signature)
+def test_sign_file_cms(ctx, tmp_path):
+    input_file = tmp_path / "input.txt"
+    input_file.write_bytes(b"some information to sign")
+    output_file = tmp_path / "input.txt.p7s"
+    certificate = der.sequence(
+        der.sequence(der.integer(7), der.sequence(), der.sequence(der.set_of()))
+    )
+
+    sign_file(
+        ctx,
+        input_file=input_file,
+        output_file=output_file,
+        compute=partial(compute_cms_signature, certificate=certificate),
+    )
+
+    p7s = output_file.read_bytes()
+    assert der.octet_string(ctx.hash_func(b"some information to sign")) in p7s
+    assert der.octet_string(b"\xff" * 10) in p7s
+    assert certificate in p7s
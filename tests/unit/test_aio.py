@@ -0,0 +1,117 @@
+# Standard Library
+import asyncio
+import threading
+
+# Third Party Library
+import pytest
+
+# First Party Library
+from peru_dnie.aio import AsyncCardPool, AsyncContext
+from peru_dnie.constants import CertificateType
+from peru_dnie.context import Context
+from peru_dnie.exceptions import CardError
+from peru_dnie.hashes import HashFunction
+from peru_dnie.simulator import SimulatedSmartCard, synthetic_dnie_trace
+
+SIGNATURE = b"\x5a" * 256
+
+
+def simulated_context(**card_args) -> Context:
+    card = SimulatedSmartCard(
+        trace=synthetic_dnie_trace({CertificateType.SIGNATURE: bytes(300)}),
+        **card_args,
+    )
+    return Context(
+        hash_func=HashFunction("sha256"), card=card, pin_provider=lambda _: "1234"
+    )
+
+
+@pytest.mark.pointer(target=AsyncContext.run)
+def test_async_context_concurrent_clients():
+    async def main():
+        async with AsyncContext(simulated_context()) as actx:
+            return await asyncio.gather(
+                actx.sign_bytes(b"first"),
+                actx.extract_certificate(CertificateType.SIGNATURE),
+                *(actx.sign_bytes(bytes([idx])) for idx in range(8)),
+            )
+
+    results = asyncio.run(main())
+
+    assert results[1] == bytes(300)
+    assert results[:1] + results[2:] == [SIGNATURE] * 9
+
+
+@pytest.mark.pointer(target=AsyncContext.run)
+def test_async_context_cancel():
+    gate = threading.Event()
+    started = threading.Event()
+
+    def slow_card(_):
+        started.set()
+        gate.wait()
+
+    ctx = simulated_context(latency=_EveryExchange(), sleep=slow_card)
+    card = ctx.card
+
+    async def main():
+        actx = AsyncContext(ctx)
+        task = asyncio.create_task(actx.sign_bytes(b"document"))
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, started.wait)
+        task.cancel()
+        await asyncio.wait([task])
+        gate.set()
+
+        assert task.cancelled()
+
+        signature = await actx.sign_bytes(b"document")
+        actx.close()
+        return signature
+
+    assert asyncio.run(main()) == SIGNATURE
+    # The cancelled signature stopped after its first APDU (SELECT), the next
+    # one started over: SELECT, VERIFY, MSE and PSO
+    assert card.exchanges == 1 + 4
+
+
+@pytest.mark.pointer(target=AsyncCardPool.run)
+def test_async_card_pool():
+    cards = [simulated_context() for _ in range(3)]
+
+    async def main():
+        async with AsyncCardPool([AsyncContext(ctx) for ctx in cards]) as pool:
+            return await asyncio.gather(
+                *(pool.sign_bytes(bytes([idx])) for idx in range(12))
+            )
+
+    assert asyncio.run(main()) == [SIGNATURE] * 12
+
+
+@pytest.mark.pointer(target=AsyncCardPool.run)
+def test_async_card_pool_removed_card():
+    removed = Context(hash_func=HashFunction("sha256"), card=_RemovedCard())
+    cards = [removed, simulated_context()]
+
+    async def main():
+        pool = AsyncCardPool([AsyncContext(ctx) for ctx in cards])
+        signatures = await asyncio.gather(
+            *(pool.sign_bytes(bytes([idx])) for idx in range(4))
+        )
+        pool.close()
+        return signatures
+
+    assert asyncio.run(main()) == [SIGNATURE] * 4
+
+
+class _EveryExchange:
+    """Latency model calling `sleep` on every exchange"""
+
+    def delay(self, *_) -> float:
+        return 1.0
+
+
+class _RemovedCard(SimulatedSmartCard):
+    def transmit(self, command):
+        raise CardError("removed")
@@ -0,0 +1,100 @@
+# Third Party Library
+import pytest
+from attrs.exceptions import FrozenInstanceError
+
+# First Party Library
+from peru_dnie.apdu import APDUCommand, APDUResponse, APDUTemplate
+
+
+class Test_APDUCommand:
+    @pytest.mark.pointer(target=APDUCommand.serialize)
+    def test_serialize_short(self):
+        command = APDUCommand(ins=0xB1, p1=0x00, p2=0x00, lc=0x02, data=b"\x54\x02")
+
+        assert command.serialize() == bytes.fromhex("00b10000025402")
+        assert APDUCommand(ins=0xCA, p1=0x9F, p2=0x7F, le=0x100).serialize() == (
+            bytes.fromhex("00ca9f7f00")
+        )
+
+    @pytest.mark.pointer(target=APDUCommand.serialize)
+    def test_serialize_extended(self):
+        command = APDUCommand(ins=0xCA, p1=0x9F, p2=0x7F, le=0x0800)
+
+        assert command.extended
+        assert command.serialize() == bytes.fromhex("00ca9f7f000800")
+
+        command = APDUCommand(
+            ins=0xB1, p1=0x00, p2=0x00, lc=0x04, data=b"\x54\x02\x00\x00", le=0x1000
+        )
+
+        assert command.serialize() == bytes.fromhex("00b10000000004540200001000")
+
+        command = APDUCommand(ins=0x2A, p1=0x9E, p2=0x9A, lc=0x100, data=b"\x01" * 256)
+
+        assert command.serialize() == bytes.fromhex("002a9e9a000100") + b"\x01" * 256
+
+    @pytest.mark.pointer(target=APDUCommand.__attrs_post_init__)
+    def test_validation(self):
+        with pytest.raises(ValueError):
+            APDUCommand(ins=0xB1, p1=0x00, p2=0x00, lc=0x04)
+
+        with pytest.raises(ValueError):
+            APDUCommand(ins=0xB1, p1=0x00, p2=0x00, lc=0x03, data=b"\x00")
+
+        with pytest.raises(ValueError):
+            APDUCommand(ins=0xB1, p1=0x00, p2=0x00, le=0x10001)
+
+    @pytest.mark.pointer(target=APDUCommand.as_list)
+    def test_serialized_once(self):
+        command = APDUCommand(ins=0xCA, p1=0x9F, p2=0x7F, le=0x00)
+
+        assert command.serialize() is command.serialize()
+        assert command.as_list() == list(command.serialize())
+
+        with pytest.raises(FrozenInstanceError):
+            command.le = 0x10  # type: ignore[misc]
+
+
+class Test_APDUTemplate:
+    @pytest.mark.pointer(target=APDUTemplate.set_field)
+    def test_set_field(self):
+        command = APDUCommand(
+            ins=0xB1, p1=0x00, p2=0x00, lc=0x04, data=b"\x54\x02\x00\x00", le=0xFF
+        )
+        template = APDUTemplate(command, data_offset=2, size=2)
+
+        template.set_field(0x01E4)
+
+        assert template.serialize() == bytes.fromhex("00b1000004540201e4ff")
+        assert template.as_list() == list(template.serialize())
+        assert template.data == b"\x54\x02\x01\xe4"
+        assert command.serialize() == bytes.fromhex("00b100000454020000ff")
+
+    @pytest.mark.pointer(target=APDUTemplate.set_field)
+    def test_set_field_extended(self):
+        command = APDUCommand(
+            ins=0xB1, p1=0x00, p2=0x00, lc=0x04, data=b"\x54\x02\x00\x00", le=0x1000
+        )
+        template = APDUTemplate(command, data_offset=2, size=2)
+
+        template.set_field(0x1000)
+
+        assert template.serialize() == bytes.fromhex("00b10000000004540210001000")
+
+    @pytest.mark.pointer(target=APDUTemplate.__attrs_post_init__)
+    def test_field_outside_data(self):
+        command = APDUCommand(ins=0xB1, p1=0x00, p2=0x00, lc=0x02, data=b"\x54\x02")
+
+        with pytest.raises(ValueError):
+            APDUTemplate(command, data_offset=1, size=2)
+
+
+class Test_APDUResponse:
+    @pytest.mark.pointer(target=APDUResponse)
+    def test_memoryview_data(self):
+        buffer = b"\x53\x02ab"
+        r = APDUResponse(sw1=0x90, sw2=0x00, data=memoryview(buffer)[2:])
+
+        assert r.data == b"ab"
+        assert r.data.obj is buffer
+        assert "data=b'ab'" in repr(r)
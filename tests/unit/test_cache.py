@@ -0,0 +1,70 @@
+# Standard Library
+import os
+
+# Third Party Library
+import pytest
+
+# First Party Library
+from peru_dnie.cache import CardFileCache, card_identity
+
+
+@pytest.mark.pointer(target=card_identity)
+def test_card_identity():
+    atr = bytes([0x3B, 0x80, 0x80, 0x01, 0x01])
+
+    assert card_identity(atr, b"\x01\x02") == card_identity(atr, b"\x01\x02")
+    assert card_identity(atr, b"\x01\x02") != card_identity(atr, b"\x01\x03")
+
+
+class Test_CardFileCache:
+    @pytest.mark.pointer(target=CardFileCache.get)
+    def test_get(self, tmp_path):
+        cache = CardFileCache(tmp_path)
+
+        assert cache.get("card", "certificate") is None
+
+        cache.put("card", "certificate", b"some certificate")
+
+        assert cache.get("card", "certificate") == b"some certificate"
+        assert cache.get("other card", "certificate") is None
+
+    @pytest.mark.pointer(target=CardFileCache.put)
+    def test_put_corrupted(self, tmp_path):
+        cache = CardFileCache(tmp_path)
+        cache.put("card", "certificate", b"some certificate")
+
+        entry = tmp_path / "card" / "certificate"
+        entry.write_bytes(entry.read_bytes()[:-1])
+
+        assert cache.get("card", "certificate") is None
+        assert not entry.exists()
+
+    @pytest.mark.pointer(target=CardFileCache.invalidate)
+    def test_invalidate(self, tmp_path):
+        cache = CardFileCache(tmp_path)
+        cache.put("card 1", "certificate", b"some certificate")
+        cache.put("card 2", "certificate", b"some certificate")
+
+        cache.invalidate("card 1")
+
+        assert cache.get("card 1", "certificate") is None
+        assert cache.get("card 2", "certificate") == b"some certificate"
+
+        cache.invalidate()
+
+        assert cache.get("card 2", "certificate") is None
+
+    @pytest.mark.pointer(target=CardFileCache.evict)
+    def test_evict(self, tmp_path):
+        cache = CardFileCache(tmp_path, max_bytes=200)
+        cache.put("card 1", "certificate", b"1" * 60)
+        cache.put("card 2", "certificate", b"2" * 60)
+        os.utime(tmp_path / "card 1", (0, 0))
+        os.utime(tmp_path / "card 2", (1, 1))
+
+        cache.put("card 3", "certificate", b"3" * 60)
+
+        assert cache.get("card 1", "certificate") is None
+        assert cache.get("card 2", "certificate") == b"2" * 60
+        assert cache.get("card 3", "certificate") == b"3" * 60
+        assert cache.size() <= 200
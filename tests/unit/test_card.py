@@ -0,0 +1,82 @@
+# Third Party Library
+import pytest
+
+# First Party Library
+from peru_dnie.apdu import APDUCommand, APDUResponse
+from peru_dnie.card import CardState
+from peru_dnie.commands.certificate import extract_certificate
+from peru_dnie.commands.general import SELECT_PKI_APP_CMD
+from peru_dnie.commands.signature import (
+    SET_SIGNATURE_ENVIRONMENT_CMD,
+    prepare_signature,
+    sign_bytes,
+)
+from peru_dnie.constants import CertificateType
+from peru_dnie.context import Context
+from peru_dnie.hashes import HashFunction
+from peru_dnie.simulator import SimulatedSmartCard, synthetic_dnie_trace
+
+OK = APDUResponse(sw1=0x90, sw2=0x00, data=b"")
+VERIFY_CMD = APDUCommand(ins=0x20, p1=0x00, p2=0x81, lc=0x04, data=b"1234")
+
+
+@pytest.mark.pointer(target=CardState.update)
+def test_card_state_update():
+    state = CardState()
+
+    state.update(SELECT_PKI_APP_CMD, OK)
+    state.update(VERIFY_CMD, OK)
+    state.update(SET_SIGNATURE_ENVIRONMENT_CMD, OK)
+
+    assert state.application == SELECT_PKI_APP_CMD.data
+    assert state.verified_pins == {0x81}
+    assert state.security_environment == SET_SIGNATURE_ENVIRONMENT_CMD.serialize()
+
+    # Wrong length does not touch the card
+    state.update(VERIFY_CMD, APDUResponse(sw1=0x67, sw2=0x00))
+    assert state.verified_pins == {0x81}
+
+    state.update(VERIFY_CMD, APDUResponse(sw1=0x69, sw2=0x82))
+    assert state == CardState()
+
+
+@pytest.mark.pointer(target=CardState.update)
+def test_card_state_select_application_resets():
+    state = CardState(verified_pins={0x81}, selected_file=b"\x00\x1b")
+
+    state.update(SELECT_PKI_APP_CMD, OK)
+
+    assert state.verified_pins == set()
+    assert state.selected_file is None
+
+
+@pytest.mark.pointer(target=prepare_signature)
+def test_session_skips_redundant_commands():
+    asked = []
+    certificate = bytes(range(200))
+    card = SimulatedSmartCard(
+        trace=synthetic_dnie_trace({CertificateType.SIGNATURE: certificate})
+    )
+    ctx = Context(
+        hash_func=HashFunction("sha256"),
+        card=card,
+        pin_provider=lambda _: asked.append(1) or "1234",
+    )
+
+    sign_bytes(ctx, b"first")
+    assert card.exchanges == 4
+
+    sign_bytes(ctx, b"second")
+    assert card.exchanges == 5
+    assert asked == [1]
+
+    # The PKI app is still selected, only the certificate file is selected and
+    # read, and the PIN stays verified
+    extract_certificate(ctx, CertificateType.SIGNATURE)
+    sign_bytes(ctx, b"third")
+    assert asked == [1]
+
+    # A new card starts from scratch
+    ctx.card = card
+    sign_bytes(ctx, b"fourth")
+    assert asked == [1, 1]
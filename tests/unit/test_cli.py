@@ -0,0 +1,24 @@
+# Standard Library
+import sys
+
+# Third Party Library
+import pytest
+
+# First Party Library
+from peru_dnie import cli
+from peru_dnie.cli import main
+
+
+@pytest.mark.pointer(target=main)
+def test_sign_merkle_rejects_stdin(monkeypatch, tmp_path, capsys):
+    monkeypatch.setattr(
+        sys, "argv", ["peru_dnie", "sign", "--format", "merkle", "-", str(tmp_path)]
+    )
+    # Rejected before any card is used
+    monkeypatch.setattr(cli, "run_sign", pytest.fail)
+
+    with pytest.raises(SystemExit) as exc_info:
+        main()
+
+    assert exc_info.value.code == 2
+    assert "merkle" in capsys.readouterr().err
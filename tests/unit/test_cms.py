@@ -0,0 +1,74 @@
+# Standard Library
+from datetime import datetime, timezone
+
+# Third Party Library
+import pytest
+
+# First Party Library
+from peru_dnie import cms, der
+from peru_dnie.hashes import HashFunction
+
+SERIAL = der.integer(0x1234567890)
+ISSUER = der.sequence(
+    der.set_of(der.sequence(der.oid("2.5.4.3"), der.tlv(0x0C, b"RENIEC CA")))
+)
+CERTIFICATE = der.sequence(
+    der.sequence(
+        der.context(0, der.integer(2)),
+        SERIAL,
+        cms.algorithm_identifier("1.2.840.113549.1.1.11"),
+        ISSUER,
+    ),
+    cms.algorithm_identifier("1.2.840.113549.1.1.11"),
+    der.tlv(der.BIT_STRING, b"\x00" + b"\x01" * 256),
+)
+
+
+@pytest.mark.pointer(target=cms.issuer_and_serial_number)
+def test_issuer_and_serial_number():
+    assert cms.issuer_and_serial_number(CERTIFICATE) == der.sequence(ISSUER, SERIAL)
+
+
+@pytest.mark.pointer(target=cms.signed_attributes)
+def test_signed_attributes():
+    hash_func = HashFunction("sha256")
+    digest = hash_func(b"document")
+    moment = datetime(2024, 5, 1, 12, 30, 0, tzinfo=timezone.utc)
+
+    attributes = cms.signed_attributes(hash_func, digest, moment)
+
+    assert attributes[0] == der.SET
+    assert der.octet_string(digest) in attributes
+    assert der.timestamp(moment) in attributes
+
+    with pytest.raises(ValueError):
+        cms.signed_attributes(hash_func, digest[:20], moment)
+
+
+@pytest.mark.pointer(target=cms.signed_data)
+def test_signed_data():
+    hash_func = HashFunction("sha512")
+    attributes = cms.signed_attributes(hash_func, hash_func(b"document"))
+    signature = b"\x5a" * 256
+
+    content_info = cms.signed_data(hash_func, CERTIFICATE, attributes, signature)
+
+    content_type, content = der.elements(content_info)
+    assert content_type == der.oid(cms.ID_SIGNED_DATA)
+
+    signed_data = der.value(content)
+    version, digest_algorithms, encap_content, certificates, signer_infos = (
+        der.elements(signed_data)
+    )
+    assert version == der.integer(1)
+    assert der.value(digest_algorithms) == cms.algorithm_identifier(
+        cms.HASH_ALGORITHM_OIDS["sha512"]
+    )
+    assert encap_content == der.sequence(der.oid(cms.ID_DATA))
+    assert der.value(certificates) == CERTIFICATE
+
+    signer_info = der.elements(der.value(signer_infos))
+    assert signer_info[1] == cms.issuer_and_serial_number(CERTIFICATE)
+    # The signed attributes, [0] IMPLICIT instead of SET
+    assert signer_info[3] == b"\xa0" + attributes[1:]
+    assert signer_info[5] == der.octet_string(signature)
@@ -0,0 +1,152 @@
+# Standard Library
+import multiprocessing
+import threading
+import time
+from contextlib import contextmanager
+
+# Third Party Library
+import pytest
+from attrs import define
+
+# First Party Library
+from peru_dnie.context import Context
+from peru_dnie.coordination import CardQueue
+from peru_dnie.exceptions import CardError
+from peru_dnie.simulator import SimulatedSmartCard
+
+
+@define
+class TransactionCard(SimulatedSmartCard):
+    transactions: int = 0
+
+    @contextmanager
+    def transaction(self):
+        self.transactions += 1
+        yield
+
+
+@pytest.mark.pointer(target=CardQueue.hold)
+def test_card_queue_fifo(tmp_path):
+    queue = CardQueue(tmp_path, poll_interval=0.01)
+    order = []
+
+    def use_card(idx):
+        with queue.hold("Reader"):
+            order.append(idx)
+
+    with queue.hold("Reader"):
+        threads = []
+        for idx in range(3):
+            thread = threading.Thread(target=use_card, args=(idx,))
+            thread.start()
+            threads.append(thread)
+            # Every ticket is left before the next one
+            time.sleep(0.02)
+
+        # Other readers are not blocked
+        with queue.hold("Other reader"):
+            pass
+
+    for thread in threads:
+        thread.join()
+
+    assert order == [0, 1, 2]
+    assert not list(tmp_path.glob("*/*.ticket"))
+
+
+@pytest.mark.pointer(target=CardQueue.hold)
+def test_card_queue_timeout(tmp_path):
+    queue = CardQueue(tmp_path, timeout=0.05, poll_interval=0.01)
+
+    errors = []
+
+    def use_card():
+        try:
+            with queue.hold("Reader"):
+                pass
+        except CardError as e:
+            errors.append(e)
+
+    with queue.hold("Reader"):
+        waiting = threading.Thread(target=use_card)
+        waiting.start()
+        waiting.join()
+
+    assert len(errors) == 1
+    assert not list(tmp_path.glob("*/*.ticket"))
+
+
+@pytest.mark.pointer(target=CardQueue.hold)
+def test_card_queue_dead_process(tmp_path):
+    queue = CardQueue(tmp_path, timeout=1, poll_interval=0.01)
+
+    with queue.hold("Reader"):
+        reader_dir = next(tmp_path.iterdir())
+
+    # A process that died while holding the card
+    process = multiprocessing.Process(target=int)
+    process.start()
+    process.join()
+    dead_pid = process.pid
+    dead_ticket = reader_dir / f"{0:020d}-{dead_pid}-1-0.ticket"
+    dead_ticket.touch()
+    (reader_dir / "last_holder").write_text(str(dead_pid))
+
+    with queue.hold("Reader") as stale:
+        assert stale
+        assert not dead_ticket.exists()
+
+    with queue.hold("Reader") as stale:
+        assert not stale
+
+
+@pytest.mark.pointer(target=Context.exclusive)
+def test_context_exclusive(tmp_path):
+    card = TransactionCard()
+    ctx = Context(card=card, card_queue=CardQueue(tmp_path))
+
+    with ctx.exclusive():
+        ctx.card_state.application = b"PKI"
+
+        # Nested calls reuse the outer one
+        with ctx.exclusive():
+            pass
+
+    assert card.transactions == 1
+
+    with ctx.exclusive():
+        assert ctx.card_state.application == b"PKI"
+
+    # Another process used the card since
+    reader_dir = next(tmp_path.iterdir())
+    (reader_dir / "last_holder").write_text("1")
+
+    with ctx.exclusive():
+        assert ctx.card_state.application is None
+
+    assert card.transactions == 3
+
+
+@pytest.mark.pointer(target=Context.exclusive)
+def test_context_exclusive_threads():
+    card = TransactionCard()
+    ctx = Context(card=card)
+    entered = threading.Event()
+    order = []
+
+    def use_card():
+        with ctx.exclusive():
+            order.append("worker")
+
+    with ctx.exclusive():
+        thread = threading.Thread(target=lambda: (entered.set(), use_card()))
+        thread.start()
+        entered.wait()
+        # The worker waits for this thread instead of nesting in its call
+        time.sleep(0.05)
+        order.append("owner")
+
+    thread.join()
+
+    assert order == ["owner", "worker"]
+    assert card.transactions == 2
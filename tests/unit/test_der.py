@@ -0,0 +1,65 @@
+# Standard Library
+from datetime import datetime, timezone
+
+# Third Party Library
+import pytest
+
+# First Party Library
+from peru_dnie import der
+
+
+@pytest.mark.pointer(target=der.encode_length)
+def test_encode_length():
+    assert der.encode_length(0x7F) == b"\x7f"
+    assert der.encode_length(0x80) == b"\x81\x80"
+    assert der.encode_length(0x0100) == b"\x82\x01\x00"
+
+
+@pytest.mark.pointer(target=der.oid)
+def test_oid():
+    assert der.oid("1.2.840.113549.1.7.2") == bytes.fromhex("06092a864886f70d010702")
+    assert der.oid("2.16.840.1.101.3.4.2.1") == bytes.fromhex("0609608648016503040201")
+
+
+@pytest.mark.pointer(target=der.integer)
+def test_integer():
+    assert der.integer(1) == b"\x02\x01\x01"
+    assert der.integer(0x80) == b"\x02\x02\x00\x80"
+    assert der.decode_integer(der.integer(2**70 + 3)) == 2**70 + 3
+
+
+@pytest.mark.pointer(target=der.set_of)
+def test_set_of_is_sorted():
+    assert der.set_of(der.integer(2), der.integer(1)) == bytes.fromhex(
+        "3106020101020102"
+    )
+
+
+@pytest.mark.pointer(target=der.timestamp)
+def test_timestamp():
+    moment = datetime(2024, 5, 1, 12, 30, 0, tzinfo=timezone.utc)
+
+    assert der.timestamp(moment) == b"\x17\x0d240501123000Z"
+    assert der.timestamp(moment.replace(year=2050))[:2] == b"\x18\x0f"
+
+
+@pytest.mark.pointer(target=der.read_tlv)
+def test_read_tlv():
+    data = der.sequence(der.integer(1), der.octet_string(b"\x00" * 200))
+
+    assert der.read_tlv(data) == (der.SEQUENCE, 3, len(data))
+    assert der.elements(data) == [der.integer(1), der.octet_string(b"\x00" * 200)]
+
+    with pytest.raises(der.DERError):
+        der.read_tlv(data[:-1])
+
+
+@pytest.mark.pointer(target=der.read_header)
+def test_read_header():
+    data = der.sequence(b"\x00" * 1500)
+
+    assert der.read_header(data[:4]) == (der.SEQUENCE, 4, 1500)
+    assert der.read_header(memoryview(data)[:4]) == (der.SEQUENCE, 4, 1500)
+
+    with pytest.raises(der.DERError):
+        der.read_header(data[:3])
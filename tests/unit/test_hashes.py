@@ -1,9 +1,13 @@
+# Standard Library
+import io
+
 # Third Party Library
 import pytest
 
 # First Party Library
 from peru_dnie.constants import DER_HASH_ALGORITHM_ENCODINGS
 from peru_dnie.hashes import (
+    DEFAULT_CHUNK_SIZE,
     HashFunction,
     hash_sha224,
     hash_sha256,
@@ -29,6 +33,66 @@ class Test_HashFunction:
             "679aa02ff1852e40618b0701f430cad8bfcaa0811579edb17a258c2b322b9826"
         )
 
+    @pytest.mark.pointer(target=HashFunction.new)
+    def test_new(self):
+        hash_func = HashFunction(name="sha256")
+        hasher = hash_func.new()
+        hasher.update(b"some data")
+        hasher.update(b" here")
+
+        assert hasher.finalize() == hash_func(b"some data here")
+
+    @pytest.mark.pointer(target=HashFunction.hash_stream)
+    def test_hash_stream(self):
+        hash_func = HashFunction(name="sha512")
+        some_data = b"some data here" * 1000
+
+        hash = hash_func.hash_stream(io.BytesIO(some_data), chunk_size=7)
+
+        assert hash == hash_sha512(some_data)
+
+    @pytest.mark.pointer(target=HashFunction.hash_file)
+    def test_hash_file(self, tmp_path):
+        hash_func = HashFunction(name="sha384")
+        input_file = tmp_path / "input.txt"
+        input_file.write_bytes(b"some data here")
+
+        assert hash_func.hash_file(input_file) == hash_sha384(b"some data here")
+
+    @pytest.mark.pointer(target=HashFunction.hash_file)
+    def test_hash_file_buffer_size(self, tmp_path, monkeypatch):
+        chunk_sizes = []
+        hash_stream = HashFunction.hash_stream
+
+        def recording_hash_stream(self, stream, chunk_size):
+            chunk_sizes.append(chunk_size)
+            return hash_stream(self, stream, chunk_size)
+
+        monkeypatch.setattr(HashFunction, "hash_stream", recording_hash_stream)
+        hash_func = HashFunction(name="sha256")
+        small_file = tmp_path / "small.txt"
+        small_file.write_bytes(b"some data here")
+        empty_file = tmp_path / "empty.txt"
+        empty_file.write_bytes(b"")
+
+        assert hash_func.hash_file(small_file) == hash_sha256(b"some data here")
+        assert hash_func.hash_file(empty_file) == hash_sha256(b"")
+        assert hash_func.hash_file(small_file, chunk_size=4) == hash_sha256(
+            b"some data here"
+        )
+
+        # Small files do not allocate a whole chunk
+        assert chunk_sizes == [14, DEFAULT_CHUNK_SIZE, 4]
+
+    @pytest.mark.pointer(target=HashFunction.check_digest)
+    def test_check_digest(self):
+        hash_func = HashFunction(name="sha512")
+
+        hash_func.check_digest(b"\x00" * 64)
+
+        with pytest.raises(ValueError):
+            hash_func.check_digest(b"\x00" * 32)
+
 
 @pytest.mark.pointer(target=hash_sha224)
 def test_hash_sha224():
@@ -0,0 +1,21 @@
+# Third Party Library
+import pytest
+
+# First Party Library
+from peru_dnie.i18n import SUPPORTED_LANGUAGES, load_messages
+
+
+def message_strings(messages):
+    for value in messages.values():
+        if isinstance(value, dict):
+            yield from message_strings(value)
+        else:
+            yield value
+
+
+@pytest.mark.pointer(target=load_messages)
+@pytest.mark.parametrize("lang", SUPPORTED_LANGUAGES)
+def test_messages_format(lang):
+    for message in message_strings(load_messages(lang)):
+        # A number fits every placeholder, including percentages
+        message.format(*[0.5] * message.count("{"))
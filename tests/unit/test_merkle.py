@@ -0,0 +1,99 @@
+# Third Party Library
+import pytest
+
+# First Party Library
+from peru_dnie import merkle
+from peru_dnie.hashes import HashFunction
+from peru_dnie.verify import RSAPublicKey, check_signature
+
+HASH_FUNC = HashFunction("sha256")
+
+# With exponent 1 the signature is the PKCS#1 v1.5 encoded message itself
+IDENTITY_KEY = RSAPublicKey(modulus=(1 << 1024) - 1, exponent=1)
+
+
+def identity_signature(digest: bytes) -> bytes:
+    digest_info = HASH_FUNC.der_encoding() + digest
+    padding = b"\xff" * (IDENTITY_KEY.size - len(digest_info) - 3)
+    return b"\x00\x01" + padding + b"\x00" + digest_info
+
+
+def rfc6962_root(digests):
+    """Merkle Tree Hash as defined recursively in RFC 6962 section 2.1"""
+    if len(digests) == 1:
+        return merkle.leaf_hash(HASH_FUNC, digests[0])
+
+    split = 1
+    while split * 2 < len(digests):
+        split *= 2
+
+    return merkle.node_hash(
+        HASH_FUNC, rfc6962_root(digests[:split]), rfc6962_root(digests[split:])
+    )
+
+
+@pytest.mark.pointer(target=merkle.tree_levels)
+def test_tree_levels():
+    for size in range(1, 20):
+        digests = [HASH_FUNC(bytes([idx])) for idx in range(size)]
+        levels = merkle.tree_levels(HASH_FUNC, digests)
+        assert levels[-1] == [rfc6962_root(digests)]
+
+    with pytest.raises(ValueError):
+        merkle.tree_levels(HASH_FUNC, [])
+
+
+@pytest.mark.pointer(target=merkle.root_from_path)
+def test_root_from_path():
+    for size in range(1, 20):
+        digests = [HASH_FUNC(bytes([idx])) for idx in range(size)]
+        levels = merkle.tree_levels(HASH_FUNC, digests)
+        root = levels[-1][0]
+
+        for index, digest in enumerate(digests):
+            path = merkle.audit_path(levels, index)
+            assert merkle.root_from_path(HASH_FUNC, digest, index, size, path) == root
+
+            # The path of a leaf does not lead to the root from another leaf
+            if size > 1:
+                other = (index + 1) % size
+                try:
+                    wrong = merkle.root_from_path(HASH_FUNC, digest, other, size, path)
+                except ValueError:
+                    wrong = None
+                assert wrong != root
+
+    with pytest.raises(ValueError):
+        merkle.root_from_path(HASH_FUNC, digests[0], 0, 3, [])
+
+    with pytest.raises(ValueError):
+        merkle.root_from_path(HASH_FUNC, digests[0], 5, 3, [])
+
+
+@pytest.mark.pointer(target=merkle.verify_proof)
+def test_verify_proof():
+    digests = [HASH_FUNC(bytes([idx])) for idx in range(7)]
+    levels = merkle.tree_levels(HASH_FUNC, digests)
+    root = levels[-1][0]
+    signature = identity_signature(root)
+    # The tree head itself is signed, not a hash of it
+    assert check_signature(IDENTITY_KEY, HASH_FUNC, root, signature)
+
+    proof = merkle.InclusionProof(
+        hash_algorithm="sha256",
+        leaf_index=4,
+        tree_size=7,
+        path=merkle.audit_path(levels, 4),
+        signature=signature,
+    )
+
+    assert merkle.verify_proof(IDENTITY_KEY, HASH_FUNC, digests[4], proof)
+    assert not merkle.verify_proof(IDENTITY_KEY, HASH_FUNC, digests[3], proof)
+    assert not merkle.verify_proof(
+        IDENTITY_KEY, HashFunction("sha512"), digests[4], proof
+    )
+
+    contents = proof.to_json().encode("utf-8")
+    assert merkle.InclusionProof.from_json(proof.to_json()) == proof
+    assert merkle.check_proof_file(IDENTITY_KEY, HASH_FUNC, digests[4], contents)
+    assert not merkle.check_proof_file(IDENTITY_KEY, HASH_FUNC, digests[4], b"{}")
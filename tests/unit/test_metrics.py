@@ -0,0 +1,81 @@
+# Standard Library
+import json
+
+# Third Party Library
+import pytest
+
+# First Party Library
+from peru_dnie.apdu import APDUResponse
+from peru_dnie.card import SmartCard
+from peru_dnie.commands.general import SELECT_PKI_APP_CMD
+from peru_dnie.context import Context
+from peru_dnie.exceptions import CardError
+from peru_dnie.metrics import ApduMetrics, LatencyHistogram
+
+
+class StatusWordCard(SmartCard):
+    def __init__(self, responses):
+        super().__init__(connection=None)
+        self.responses = list(responses)
+
+    def transmit(self, command):
+        response = self.responses.pop(0)
+        if response is None:
+            raise CardError("card removed")
+        return response
+
+
+class Test_LatencyHistogram:
+    @pytest.mark.pointer(target=LatencyHistogram.quantile)
+    def test_quantile(self):
+        histogram = LatencyHistogram()
+        for _ in range(98):
+            histogram.observe(0.001)
+        histogram.observe(0.5)
+        histogram.observe(30.0)
+
+        assert histogram.quantile(0.5) == pytest.approx(0.0016)
+        assert histogram.quantile(0.99) == pytest.approx(0.8192)
+        assert histogram.quantile(1.0) == 30.0
+        assert LatencyHistogram().quantile(0.5) == 0.0
+
+
+class Test_ApduMetrics:
+    @pytest.mark.pointer(target=ApduMetrics.record)
+    def test_record(self):
+        metrics = ApduMetrics()
+        ctx = Context(
+            card=StatusWordCard(
+                [
+                    APDUResponse(sw1=0x90, sw2=0x00, data=b"\x01\x02"),
+                    APDUResponse(sw1=0x6A, sw2=0x82, data=b""),
+                    None,
+                ]
+            ),
+            metrics=metrics,
+        )
+
+        ctx.transmit(SELECT_PKI_APP_CMD)
+        ctx.transmit(SELECT_PKI_APP_CMD)
+        with pytest.raises(CardError):
+            ctx.transmit(SELECT_PKI_APP_CMD)
+
+        select = metrics.to_dict()["0xA4"]
+
+        assert select["exchanges"] == 3
+        assert select["errors"] == 2
+        assert select["bytes_sent"] == 3 * len(SELECT_PKI_APP_CMD.serialize())
+        assert select["bytes_received"] == 6
+        assert select["status_words"] == {"9000": 1, "6A82": 1, "transport_error": 1}
+
+    @pytest.mark.pointer(target=ApduMetrics.to_prometheus)
+    def test_to_prometheus(self):
+        metrics = ApduMetrics()
+        metrics.record(0x2A, 40, 258, 0x9000, 0.3)
+
+        text = metrics.to_prometheus()
+
+        assert 'peru_dnie_apdu_exchanges_total{ins="0x2A"} 1' in text
+        assert 'peru_dnie_apdu_duration_seconds_bucket{ins="0x2A",le="+Inf"} 1' in text
+        assert 'peru_dnie_apdu_duration_seconds_count{ins="0x2A"} 1' in text
+        assert json.loads(metrics.to_json())["0x2A"]["bytes_received"] == 258
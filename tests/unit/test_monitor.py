@@ -0,0 +1,78 @@
+# Standard Library
+import threading
+
+# Third Party Library
+import pytest
+
+# First Party Library
+from peru_dnie.constants import PERU_DNIE_V2_ATR
+from peru_dnie.exceptions import CardError
+from peru_dnie.monitor import DnieMonitor
+
+
+class FakeConnection:
+    def __init__(self):
+        self.connected = False
+
+    def connect(self):
+        self.connected = True
+
+    def disconnect(self):
+        self.connected = False
+
+
+class FakeCard:
+    """Card as reported by pyscard's `CardMonitor`"""
+
+    def __init__(self, reader, atr=PERU_DNIE_V2_ATR):
+        self.reader = reader
+        self.atr = atr
+        self.connection = FakeConnection()
+
+    def createConnection(self):
+        return self.connection
+
+
+@pytest.mark.pointer(target=DnieMonitor.update)
+def test_monitor_insert_and_remove():
+    monitor = DnieMonitor()
+    dnie = FakeCard("Reader 1")
+    other = FakeCard("Reader 2", atr=[0x3B, 0x00])
+
+    monitor.update(None, ([dnie, other], []))
+
+    assert dnie.connection.connected
+    assert not other.connection.connected
+    assert [card.connection for card in monitor.cards()] == [dnie.connection]
+
+    card = monitor.wait_for_card(timeout=0)
+    assert monitor.is_ready(card)
+
+    monitor.update(None, ([], [dnie]))
+
+    assert not dnie.connection.connected
+    assert not monitor.is_ready(card)
+    with pytest.raises(CardError):
+        monitor.wait_for_card(timeout=0)
+
+
+@pytest.mark.pointer(target=DnieMonitor.wait_for_card)
+def test_monitor_wait_for_card():
+    monitor = DnieMonitor()
+    first = FakeCard("Reader 1")
+    second = FakeCard("Reader 2")
+    monitor.update(None, ([first], []))
+
+    # The card presented last is used first
+    timer = threading.Timer(0.05, monitor.update, (None, ([second], [first])))
+    timer.start()
+    monitor.update(None, ([], [first]))
+
+    card = monitor.wait_for_card(timeout=5)
+    timer.join()
+
+    assert card.connection is second.connection
+
+    with monitor:
+        pass
+    assert not second.connection.connected
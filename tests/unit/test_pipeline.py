@@ -0,0 +1,97 @@
+# Third Party Library
+import pytest
+
+# First Party Library
+from peru_dnie.hashes import HashFunction
+from peru_dnie.pipeline import (
+    HashingEngine,
+    collect_input_files,
+    signature_output_files,
+)
+
+
+@pytest.fixture
+def input_dir(tmp_path):
+    directory = tmp_path / "inputs"
+    directory.mkdir()
+    for name in ["b.txt", "a.txt", "c.xml"]:
+        (directory / name).write_bytes(name.encode())
+    (directory / "nested").mkdir()
+    return directory
+
+
+@pytest.mark.pointer(target=collect_input_files)
+def test_collect_input_files(input_dir):
+    files = collect_input_files(
+        [
+            str(input_dir / "c.xml"),
+            str(input_dir / "*.txt"),
+            str(input_dir),
+        ]
+    )
+
+    assert [f.name for f in files] == [
+        "c.xml",
+        "a.txt",
+        "b.txt",
+        "a.txt",
+        "b.txt",
+        "c.xml",
+    ]
+
+    with pytest.raises(FileNotFoundError):
+        collect_input_files([str(input_dir / "missing.txt")])
+
+
+@pytest.mark.pointer(target=signature_output_files)
+def test_signature_output_files(input_dir, tmp_path):
+    output_dir = tmp_path / "signatures"
+    jobs = signature_output_files([input_dir / "a.txt"], output_dir, ".sig")
+
+    assert jobs == [(input_dir / "a.txt", output_dir / "a.txt.sig")]
+
+    with pytest.raises(ValueError):
+        signature_output_files(
+            [input_dir / "a.txt", input_dir / "a.txt"], output_dir, ".sig"
+        )
+
+
+class Test_HashingEngine:
+    @pytest.mark.pointer(target=HashingEngine.digests)
+    def test_digests_single_worker(self, input_dir):
+        hash_func = HashFunction(name="sha256")
+        files = sorted(p for p in input_dir.iterdir() if p.is_file())
+        engine = HashingEngine(hash_func, workers=1, max_pending=1)
+
+        digests = list(engine.digests(files))
+
+        assert digests == [(f, hash_func(f.read_bytes())) for f in files]
+
+        with pytest.raises(FileNotFoundError):
+            list(engine.digests([input_dir / "missing.txt"]))
+
+    @pytest.mark.pointer(target=HashingEngine.digests)
+    def test_digests(self, tmp_path):
+        hash_func = HashFunction(name="sha256")
+        files = []
+        for idx in range(20):
+            path = tmp_path / f"input_{idx}.bin"
+            path.write_bytes(bytes([idx]) * (idx * 1000))
+            files.append(path)
+
+        engine = HashingEngine(hash_func, workers=4, chunk_size=512, max_pending=2)
+        digests = list(engine.digests(files))
+
+        assert digests == [(f, hash_func(f.read_bytes())) for f in files]
+
+    @pytest.mark.pointer(target=HashingEngine.effective_workers.fget)
+    def test_effective_workers(self):
+        hash_func = HashFunction(name="sha256")
+        engine = HashingEngine(
+            hash_func, workers=64, chunk_size=1024, max_in_flight_bytes=8 * 1024
+        )
+
+        assert engine.effective_workers == 8
+
+        with pytest.raises(ValueError):
+            HashingEngine(hash_func, workers=0)
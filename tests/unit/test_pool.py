@@ -0,0 +1,85 @@
+# Standard Library
+import threading
+
+# Third Party Library
+import pytest
+
+# First Party Library
+from peru_dnie.commands.general import SELECT_PKI_APP_CMD
+from peru_dnie.context import FakeContext
+from peru_dnie.exceptions import CardError
+from peru_dnie.pool import CardPool
+
+
+class RemovedCardContext(FakeContext):
+    def transmit(self, command):
+        raise CardError("card removed")
+
+
+def transmit_job(ctx):
+    ctx.transmit(SELECT_PKI_APP_CMD)
+    return id(ctx)
+
+
+class Test_CardPool:
+    @pytest.mark.pointer(target=CardPool.submit)
+    def test_submit(self):
+        contexts = [FakeContext(), FakeContext(), FakeContext()]
+
+        with CardPool(contexts) as pool:
+            futures = [pool.submit(transmit_job) for _ in range(30)]
+            results = [f.result() for f in futures]
+
+        assert set(results) <= {id(ctx) for ctx in contexts}
+        assert sum(stats.jobs for stats, _ in pool.report()) == 30
+
+    @pytest.mark.pointer(target=CardPool.submit)
+    def test_submit_card_removed(self):
+        card_removed = threading.Event()
+
+        class SignalingRemovedCardContext(RemovedCardContext):
+            def transmit(self, command):
+                card_removed.set()
+                super().transmit(command)
+
+        class SlowCardContext(FakeContext):
+            def transmit(self, command):
+                # Let the other card take a job first
+                card_removed.wait(timeout=5)
+                return super().transmit(command)
+
+        removed = SignalingRemovedCardContext()
+        healthy = SlowCardContext()
+
+        with CardPool([removed, healthy]) as pool:
+            futures = [pool.submit(transmit_job) for _ in range(10)]
+            results = [f.result() for f in futures]
+
+        assert results == [id(healthy)] * 10
+        assert [stats.removed for stats in pool.stats] == [True, False]
+
+    @pytest.mark.pointer(target=CardPool.submit)
+    def test_submit_all_cards_removed(self):
+        with CardPool([RemovedCardContext()], max_attempts=2) as pool:
+            future = pool.submit(transmit_job)
+
+            with pytest.raises(CardError):
+                future.result()
+
+            with pytest.raises(CardError):
+                pool.submit(transmit_job).result()
+
+    @pytest.mark.pointer(target=CardPool.start)
+    def test_start(self):
+        def initializer(ctx):
+            if isinstance(ctx, RemovedCardContext):
+                raise CardError("card removed")
+
+        pool = CardPool([RemovedCardContext(), FakeContext()], initializer=initializer)
+        pool.start()
+        pool.shutdown()
+
+        assert [stats.removed for stats in pool.stats] == [True, False]
+
+        with pytest.raises(CardError):
+            CardPool([RemovedCardContext()], initializer=initializer).start()
@@ -0,0 +1,59 @@
+# Standard Library
+from unittest.mock import create_autospec
+
+# Third Party Library
+import pytest
+from smartcard.CardConnectionDecorator import CardConnectionDecorator
+from smartcard.pcsc.PCSCReader import PCSCCardConnection
+
+# First Party Library
+from peru_dnie import pyscard
+from peru_dnie.exceptions import CardError
+from peru_dnie.pyscard import PyscardSmartCard
+
+
+@pytest.fixture
+def scard(monkeypatch):
+    calls = []
+
+    def begin(hcard):
+        calls.append(("begin", hcard))
+        return pyscard.SCARD_S_SUCCESS
+
+    def end(hcard, disposition):
+        calls.append(("end", hcard, disposition))
+        return pyscard.SCARD_S_SUCCESS
+
+    monkeypatch.setattr(pyscard, "SCardBeginTransaction", begin)
+    monkeypatch.setattr(pyscard, "SCardEndTransaction", end)
+    return calls
+
+
+def pcsc_connection(hcard):
+    connection = create_autospec(PCSCCardConnection, instance=True)
+    connection.hcard = hcard
+    return connection
+
+
+@pytest.mark.pointer(target=PyscardSmartCard.transaction)
+def test_transaction(scard):
+    # Connections of a card service are decorated
+    card = PyscardSmartCard(
+        connection=CardConnectionDecorator(pcsc_connection(hcard=7))
+    )
+
+    with card.transaction():
+        assert scard == [("begin", 7)]
+
+    assert scard == [("begin", 7), ("end", 7, pyscard.SCARD_LEAVE_CARD)]
+
+
+@pytest.mark.pointer(target=PyscardSmartCard.transaction)
+def test_transaction_failed(scard, monkeypatch):
+    monkeypatch.setattr(pyscard, "SCardBeginTransaction", lambda hcard: 1)
+
+    with pytest.raises(CardError):
+        with PyscardSmartCard(connection=pcsc_connection(hcard=7)).transaction():
+            pytest.fail()
+
+    assert scard == []
@@ -0,0 +1,166 @@
+# Standard Library
+import threading
+from unittest.mock import MagicMock
+
+# Third Party Library
+import pytest
+
+# First Party Library
+from peru_dnie.apdu import APDUResponse
+from peru_dnie.cache import CardFileCache
+from peru_dnie.cli_config import CliConfig
+from peru_dnie.commands.general import GET_CPLC_DATA_CMD, RememberedPin
+from peru_dnie.constants import CertificateType
+from peru_dnie.context import Context, FakeContext
+from peru_dnie.exceptions import ServerError
+from peru_dnie.hashes import HashFunction
+from peru_dnie.server import SigningClient, SigningServer
+from peru_dnie.simulator import (
+    SimulatedSmartCard,
+    TraceExchange,
+    synthetic_dnie_trace,
+)
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    return tmp_path / "peru_dnie.sock"
+
+
+@pytest.fixture
+def server(socket_path):
+    server = SigningServer(
+        FakeContext(
+            hash_func=HashFunction(name="sha256"), pin_provider=lambda _: "1234"
+        ),
+        socket_path,
+    )
+    server.prepare()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+class Test_SigningServer:
+    @pytest.mark.pointer(target=SigningServer.dispatch)
+    def test_dispatch(self, server, socket_path, tmp_path):
+        input_file = tmp_path / "input.txt"
+        input_file.write_bytes(b"some information to sign")
+
+        with SigningClient(socket_path, timeout=5) as client:
+            assert client.request({"op": "ping"}) == {"ok": True}
+            assert client.sign_digest(b"\x00" * 32) == b"\xff" * 10
+            assert client.sign_file(input_file) == b"\xff" * 10
+
+            with pytest.raises(ServerError):
+                client.sign_digest(b"\x00" * 20)
+
+            with pytest.raises(ServerError):
+                client.request({"op": "unknown"})
+
+    @pytest.mark.pointer(target=SigningServer.__init__)
+    def test_socket(self, server, socket_path):
+        assert socket_path.stat().st_mode & 0o777 == 0o600
+
+        with pytest.raises(ServerError):
+            SigningServer(server.ctx, socket_path)
+
+    @pytest.mark.pointer(target=SigningServer._use_ready_card)
+    def test_monitor(self, socket_path):
+        ask_pin = MagicMock(return_value="1234")
+        recorded_exchanges = []
+
+        first, second = (
+            SimulatedSmartCard(
+                trace=synthetic_dnie_trace({CertificateType.SIGNATURE: b"cert"})
+            )
+            for _ in range(2)
+        )
+        monitor = FakeMonitor([first])
+
+        server = SigningServer(
+            Context(
+                hash_func=HashFunction(name="sha256"),
+                pin_provider=ask_pin,
+                recorded_exchanges=recorded_exchanges,
+            ),
+            socket_path,
+            monitor,
+        )
+        try:
+            server.prepare()
+            server.sign_digest(b"\x00" * 32)
+            assert server.ctx.card.card is first
+
+            # The card is swapped: a new session on the inserted card
+            monitor.ready = [second]
+            assert server.sign_digest(b"\x00" * 32) == b"\x5a" * 256
+            assert server.ctx.card.card is second
+            assert ask_pin.call_count == 2
+            # Both cards are recorded: session and signature, twice
+            assert len(recorded_exchanges) == 8
+        finally:
+            server.server_close()
+
+    @pytest.mark.pointer(target=SigningServer._use_ready_card)
+    def test_monitor_remembered_pin(self, socket_path, tmp_path):
+        ask_pin = MagicMock(return_value="1234")
+
+        def inserted_card(serial):
+            trace = synthetic_dnie_trace({CertificateType.SIGNATURE: b"cert"})
+            trace.append(
+                TraceExchange(
+                    command=GET_CPLC_DATA_CMD.serialize(),
+                    response=APDUResponse(sw1=0x90, sw2=0x00, data=serial),
+                )
+            )
+            return SimulatedSmartCard(trace=trace)
+
+        monitor = FakeMonitor([inserted_card(b"serial")])
+        cli = CliConfig(interactive=False)
+        server = SigningServer(
+            Context(
+                hash_func=HashFunction(name="sha256"),
+                cli=cli,
+                cache=CardFileCache(tmp_path / "cache"),
+                pin_provider=RememberedPin(cli, ask_pin),
+            ),
+            socket_path,
+            monitor,
+        )
+        server.prepare()
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            with SigningClient(socket_path, timeout=5) as client:
+                # The same card, removed and inserted again
+                monitor.ready = [inserted_card(b"serial")]
+                assert client.sign_digest(b"\x00" * 32) == b"\x5a" * 256
+
+                # Another card: its PIN was never entered
+                monitor.ready = [inserted_card(b"other serial")]
+                with pytest.raises(ServerError, match="DNIe"):
+                    client.sign_digest(b"\x00" * 32)
+
+            # Only asked once, by `prepare` on the main thread
+            assert ask_pin.call_count == 1
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+
+class FakeMonitor:
+    def __init__(self, ready):
+        self.ready = ready
+
+    def is_ready(self, card):
+        return any(ready is card for ready in self.ready)
+
+    def wait_for_card(self):
+        return self.ready[-1]
@@ -0,0 +1,76 @@
+# Third Party Library
+import pytest
+from attrs import evolve
+
+# First Party Library
+from peru_dnie.apdu import APDUResponse
+from peru_dnie.commands.general import PinType
+from peru_dnie.constants import CertificateType
+from peru_dnie.exceptions import CardError, PinError
+from peru_dnie.session import DnieSession, env_pin
+from peru_dnie.simulator import SimulatedSmartCard, synthetic_dnie_trace
+
+CERTIFICATE = bytes(range(200))
+SIGNATURE = b"\x5a" * 256
+
+
+def simulated_card(trace=None) -> SimulatedSmartCard:
+    if trace is None:
+        trace = synthetic_dnie_trace({CertificateType.SIGNATURE: CERTIFICATE})
+    return SimulatedSmartCard(trace=trace)
+
+
+@pytest.mark.pointer(target=DnieSession.open)
+def test_session(tmp_path, capsys):
+    asked = []
+
+    def pin_provider(pin_type):
+        asked.append(pin_type)
+        return "1234"
+
+    document = tmp_path / "document.txt"
+    document.write_bytes(b"document")
+
+    with DnieSession(pin_provider, card=simulated_card()) as session:
+        assert session.certificate() == CERTIFICATE
+        assert session.sign_bytes(b"document") == SIGNATURE
+        assert session.sign_file(document) == SIGNATURE
+
+    assert asked == [PinType.SIGNATURE]
+    # Nothing is shown on the console
+    assert capsys.readouterr().out == ""
+
+    with pytest.raises(CardError):
+        session.sign_bytes(b"document")
+
+
+@pytest.mark.pointer(target=env_pin)
+def test_session_env_pin(monkeypatch):
+    monkeypatch.delenv("PERU_DNIE_PIN", raising=False)
+
+    with DnieSession(env_pin(), card=simulated_card()) as session:
+        with pytest.raises(PinError):
+            session.sign_bytes(b"document")
+
+        monkeypatch.setenv("PERU_DNIE_PIN", "1234")
+        assert session.sign_bytes(b"document") == SIGNATURE
+
+
+@pytest.mark.pointer(target=DnieSession.sign_digest)
+def test_session_pin_errors():
+    # No provider, and no console to ask on
+    with DnieSession(card=simulated_card()) as session:
+        with pytest.raises(PinError):
+            session.sign_bytes(b"document")
+
+    trace = [
+        (
+            evolve(exchange, response=APDUResponse(sw1=0x63, sw2=0xC2, data=b""))
+            if exchange.command[1] == 0x20
+            else exchange
+        )
+        for exchange in synthetic_dnie_trace({})
+    ]
+    with DnieSession(lambda _: "0000", card=simulated_card(trace)) as session:
+        with pytest.raises(PinError):
+            session.sign_bytes(b"document")
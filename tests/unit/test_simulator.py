@@ -0,0 +1,111 @@
+# Third Party Library
+import pytest
+
+# First Party Library
+from peru_dnie.apdu import APDUCommand, APDUResponse
+from peru_dnie.commands.certificate import extract_certificate
+from peru_dnie.commands.general import SELECT_PKI_APP_CMD
+from peru_dnie.commands.signature import compute_signature
+from peru_dnie.constants import CertificateType
+from peru_dnie.context import Context
+from peru_dnie.hashes import HashFunction
+from peru_dnie.simulator import (
+    LatencyModel,
+    RecordingSmartCard,
+    SimulatedSmartCard,
+    load_trace,
+    save_trace,
+    synthetic_dnie_trace,
+)
+
+CERTIFICATE = bytes(range(256)) * 5
+
+
+@pytest.mark.pointer(target=SimulatedSmartCard.transmit)
+def test_simulator_replays_certificate_read():
+    card = SimulatedSmartCard(
+        trace=synthetic_dnie_trace({CertificateType.SIGNATURE: CERTIFICATE})
+    )
+    ctx = Context(card=card)
+
+    assert extract_certificate(ctx, CertificateType.SIGNATURE) == CERTIFICATE
+
+
+@pytest.mark.pointer(target=SimulatedSmartCard.transmit)
+def test_simulator_matches_signature_by_header():
+    signature = b"\x01" * 256
+    card = SimulatedSmartCard(trace=synthetic_dnie_trace({}, signature=signature))
+    ctx = Context(hash_func=HashFunction("sha256"), card=card)
+
+    assert compute_signature(ctx, b"\x00" * 32) == signature
+    assert compute_signature(ctx, b"\x11" * 32) == signature
+
+
+@pytest.mark.pointer(target=SimulatedSmartCard.transmit)
+def test_simulator_unknown_command():
+    card = SimulatedSmartCard()
+
+    r = card.transmit(APDUCommand(ins=0xB0, p1=0x00, p2=0x00, le=0x10))
+
+    assert (r.sw1, r.sw2) == (0x67, 0x00)
+
+
+@pytest.mark.pointer(target=LatencyModel.delay)
+def test_simulator_latency():
+    delays = []
+    latency = LatencyModel(per_exchange=0.01, per_byte=0.001, per_ins={0xA4: 0.5})
+    card = SimulatedSmartCard(
+        trace=synthetic_dnie_trace({}),
+        latency=latency,
+        sleep=delays.append,
+    )
+
+    card.transmit(SELECT_PKI_APP_CMD)
+
+    sent = len(SELECT_PKI_APP_CMD.serialize())
+    assert delays == [pytest.approx(0.01 + 0.001 * (sent + 2) + 0.5)]
+
+
+@pytest.mark.pointer(target=RecordingSmartCard.transmit)
+def test_recording_hides_pin(tmp_path):
+    inner = SimulatedSmartCard(trace=synthetic_dnie_trace({}))
+    card = RecordingSmartCard(card=inner)
+    verify = APDUCommand(ins=0x20, p1=0x00, p2=0x81, lc=0x06, data=b"123456")
+
+    card.transmit(SELECT_PKI_APP_CMD)
+    card.transmit(verify)
+
+    trace_file = tmp_path / "trace.jsonl"
+    card.save(trace_file)
+    trace = load_trace(trace_file)
+
+    assert [exchange.command for exchange in trace] == [
+        SELECT_PKI_APP_CMD.serialize(),
+        bytes([0x00, 0x20, 0x00, 0x81, 0x06]) + b"000000",
+    ]
+    assert b"123456" not in trace_file.read_bytes()
+
+
+@pytest.mark.pointer(target=Context.__attrs_post_init__)
+def test_context_records_exchanges():
+    recorded_exchanges = []
+    first, second = (SimulatedSmartCard(trace=synthetic_dnie_trace({})) for _ in "ab")
+    ctx = Context(card=first, recorded_exchanges=recorded_exchanges)
+
+    ctx.transmit(SELECT_PKI_APP_CMD)
+    # A card set later is recorded too, in the same list
+    ctx.card = second
+    ctx.transmit(SELECT_PKI_APP_CMD)
+
+    assert len(recorded_exchanges) == 2
+    assert ctx.card.card is second
+
+
+@pytest.mark.pointer(target=load_trace)
+def test_trace_round_trip(tmp_path):
+    trace = synthetic_dnie_trace({CertificateType.AUTHENTICATION: CERTIFICATE})
+
+    save_trace(tmp_path / "trace.jsonl", trace)
+
+    assert load_trace(tmp_path / "trace.jsonl") == trace
+    assert trace[-1].response == APDUResponse(sw1=0x90, sw2=0x00, data=b"\x5a" * 256)
@@ -0,0 +1,114 @@
+"""Startup time of the CLI, measured with `python -X importtime`
+
+Budgets are generous so they hold on slow CI machines; they catch heavy
+modules leaking into the import path of a command that does not need them.
+"""
+
+# Standard Library
+import subprocess  # noqa: S404
+import sys
+
+# Third Party Library
+import pytest
+
+# First Party Library
+from peru_dnie.cli import main
+from peru_dnie.session import DnieSession
+
+# Budget in milliseconds for importing the package modules of each command
+STARTUP_BUDGET_MS = {
+    "--help": 100,
+    "clear-cache": 300,
+    "sign": 600,
+    "extract": 600,
+    "serve": 600,
+}
+
+# Modules imported by the commands when they run
+COMMAND_MODULES = {
+    "clear-cache": ["peru_dnie.cli", "peru_dnie.cache"],
+    "sign": [
+        "peru_dnie.cli",
+        "peru_dnie.card_init",
+        "peru_dnie.commands.signature",
+        "peru_dnie.pipeline",
+        "peru_dnie.pool",
+    ],
+    "extract": [
+        "peru_dnie.cli",
+        "peru_dnie.cache",
+        "peru_dnie.card_init",
+        "peru_dnie.commands.certificate",
+    ],
+    "serve": [
+        "peru_dnie.cli",
+        "peru_dnie.cache",
+        "peru_dnie.card_init",
+        "peru_dnie.server",
+    ],
+}
+
+HEAVY_MODULES = ["rich", "smartcard", "attr"]
+
+
+def import_times(*args):
+    """Cumulative import time in microseconds of every imported module
+
+    Nested imports are indented by two spaces per level in the name column.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+
+        times[name.rstrip()] = int(cumulative)
+
+    return times
+
+
+def package_import_ms(times):
+    """Time of the top level package imports, which include the nested ones
+
+    Cumulative times of nested modules are already counted by their parent.
+    """
+    # Top level names have a single space before them
+    return sum(us for name, us in times.items() if name.startswith(" peru_dnie")) / 1000
+
+
+@pytest.mark.pointer(target=main)
+@pytest.mark.parametrize("args", [["--help"], ["sign", "--help"], ["serve", "--help"]])
+def test_help_startup(args):
+    times = import_times("-m", "peru_dnie", *args)
+    imported = {name.strip() for name in times}
+
+    assert not [m for m in imported if m.split(".")[0] in HEAVY_MODULES]
+    assert package_import_ms(times) < STARTUP_BUDGET_MS["--help"]
+
+
+@pytest.mark.pointer(target=main)
+@pytest.mark.parametrize("command", sorted(COMMAND_MODULES))
+def test_command_startup(command):
+    modules = COMMAND_MODULES[command]
+    times = import_times("-c", "import " + ", ".join(modules))
+
+    assert package_import_ms(times) < STARTUP_BUDGET_MS[command]
+
+
+@pytest.mark.pointer(target=DnieSession.open)
+def test_session_imports():
+    times = import_times("-c", "import peru_dnie.session")
+    imported = {name.strip() for name in times}
+
+    # No console, and pyscard only once the session connects to a reader
+    assert not [m for m in imported if m.split(".")[0] in ("rich", "smartcard")]
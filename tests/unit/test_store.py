@@ -0,0 +1,117 @@
+# Standard Library
+import threading
+
+# Third Party Library
+import pytest
+
+# First Party Library
+from peru_dnie.store import SignatureStore
+
+
+@pytest.mark.pointer(target=SignatureStore.get)
+def test_signature_store(tmp_path):
+    store = SignatureStore(tmp_path / "signatures.sqlite3")
+    digest = b"\x01" * 32
+
+    assert store.get("card", "sha256", digest) is None
+
+    store.put("card", "sha256", digest, b"signature")
+
+    assert store.get("card", "sha256", digest) == b"signature"
+    assert store.get("other card", "sha256", digest) is None
+    assert store.get("card", "sha512", digest) is None
+
+    # Another store on the same file, e.g. in another process
+    assert SignatureStore(store.path).get("card", "sha256", digest) == b"signature"
+
+    store.invalidate("card")
+    assert store.get("card", "sha256", digest) is None
+
+
+@pytest.mark.pointer(target=SignatureStore.get)
+def test_signature_store_touch_interval(tmp_path):
+    store = SignatureStore(tmp_path / "signatures.sqlite3")
+    store.put("key", "sha256", b"\x01", b"signature")
+    changes = store._connection().total_changes
+
+    # Used again right away: nothing is written
+    assert store.get("key", "sha256", b"\x01") == b"signature"
+    assert store._connection().total_changes == changes
+
+    store.touch_interval = 0
+    assert store.get("key", "sha256", b"\x01") == b"signature"
+    assert store._connection().total_changes == changes + 1
+
+
+@pytest.mark.pointer(target=SignatureStore.use_key)
+def test_signature_store_use_key(tmp_path):
+    store = SignatureStore(tmp_path / "signatures.sqlite3")
+    store.put("old key", "sha256", b"\x01", b"old signature")
+    store.put("other key", "sha256", b"\x01", b"other signature")
+
+    store.use_key("card", "old key")
+    store.use_key("card", "old key")
+    assert store.get("old key", "sha256", b"\x01") == b"old signature"
+
+    # Renewed certificate of the card
+    store.use_key("card", "new key")
+    assert store.get("old key", "sha256", b"\x01") is None
+    assert store.get("other key", "sha256", b"\x01") == b"other signature"
+
+
+@pytest.mark.pointer(target=SignatureStore.put)
+def test_signature_store_eviction(tmp_path):
+    store = SignatureStore(
+        tmp_path / "signatures.sqlite3", max_entries=3, touch_interval=0
+    )
+
+    for idx in range(3):
+        store.put("card", "sha256", bytes([idx]), b"signature %d" % idx)
+
+    # The first digest is used again, the second is the least recently used
+    assert store.get("card", "sha256", bytes([0])) == b"signature 0"
+    store.put("card", "sha256", bytes([3]), b"signature 3")
+
+    assert store.count() == 3
+    assert store.get("card", "sha256", bytes([1])) is None
+    assert store.get("card", "sha256", bytes([0])) == b"signature 0"
+
+
+@pytest.mark.pointer(target=SignatureStore.put)
+def test_signature_store_eviction_slack(tmp_path):
+    store = SignatureStore(tmp_path / "signatures.sqlite3", max_entries=20)
+    statements = []
+    store._connection().set_trace_callback(statements.append)
+
+    for idx in range(23):
+        store.put("card", "sha256", bytes([idx]), b"signature")
+
+    # Counted on the first insert, and again once over the slack of 2 entries
+    assert sum("COUNT(*)" in statement for statement in statements) == 2
+    assert store.count() == 20
+
+
+@pytest.mark.pointer(target=SignatureStore.get)
+def test_signature_store_threads(tmp_path):
+    store = SignatureStore(tmp_path / "signatures.sqlite3")
+    for idx in range(50):
+        store.put("card", "sha256", bytes([idx]), bytes([idx]) * 256)
+
+    errors = []
+
+    def read():
+        try:
+            for idx in range(50):
+                assert store.get("card", "sha256", bytes([idx])) == bytes([idx]) * 256
+        except Exception as e:
+            errors.append(e)
+        finally:
+            store.close()
+
+    threads = [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
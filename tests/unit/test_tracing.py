@@ -0,0 +1,94 @@
+# Standard Library
+import json
+import threading
+
+# Third Party Library
+import pytest
+
+# First Party Library
+from peru_dnie import tracing
+from peru_dnie.commands.signature import sign_file
+from peru_dnie.tracing import span, start_tracing, stop_tracing, traced
+
+
+@pytest.fixture
+def tracer():
+    tracer = start_tracing()
+    yield tracer
+    stop_tracing()
+
+
+def complete_events(tracer):
+    return [event for event in tracer.events if event["ph"] == "X"]
+
+
+@pytest.mark.pointer(target=span)
+def test_span(tracer):
+    with span("outer", size=3):
+        with span("inner"):
+            pass
+
+    with pytest.raises(ValueError):
+        with span("failed"):
+            raise ValueError()
+
+    inner, outer, failed = complete_events(tracer)
+
+    assert (inner["name"], outer["name"], failed["name"]) == (
+        "inner",
+        "outer",
+        "failed",
+    )
+    assert outer["args"] == {"size": 3}
+    assert failed["args"] == {"error": "ValueError"}
+    # Nested by time on the same thread track
+    assert outer["ts"] <= inner["ts"]
+    assert inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+    assert inner["tid"] == outer["tid"]
+
+
+@pytest.mark.pointer(target=span)
+def test_span_off():
+    assert stop_tracing() is None
+
+    with span("ignored"):
+        pass
+
+    assert tracing._tracer is None
+
+
+@pytest.mark.pointer(target=traced)
+def test_traced_threads(tracer):
+    @traced("work")
+    def work():
+        return 1
+
+    assert work() == 1
+    thread = threading.Thread(target=work, name="worker")
+    thread.start()
+    thread.join()
+
+    names = {event["args"]["name"] for event in tracer.events if event["ph"] == "M"}
+    assert "worker" in names
+    assert len({event["tid"] for event in complete_events(tracer)}) == 2
+
+    trace = json.loads(tracer.to_json())
+    assert trace["traceEvents"] == tracer.events
+
+
+@pytest.mark.pointer(target=sign_file)
+def test_sign_file_phases(ctx, tracer, tmp_path):
+    input_file = tmp_path / "input.txt"
+    input_file.write_bytes(b"some information to sign")
+
+    sign_file(ctx, input_file=input_file, output_file=tmp_path / "input.txt.sig")
+
+    assert [event["name"] for event in complete_events(tracer)] == [
+        "hash_file",
+        "select_pki_app",
+        "pin_prompt",
+        "verify_pin",
+        "set_security_environment",
+        "sign_apdu",
+        "write_output",
+    ]
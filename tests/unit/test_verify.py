@@ -0,0 +1,148 @@
+# Standard Library
+import base64
+
+# Third Party Library
+import pytest
+
+# First Party Library
+from peru_dnie import cms, der
+from peru_dnie.hashes import HashFunction
+from peru_dnie.pipeline import HashingEngine
+from peru_dnie.verify import (
+    RSAPublicKey,
+    certificate_public_key,
+    load_certificate,
+    signature_files,
+    verify_files,
+)
+
+# 1024 bit test key
+MODULUS = int(
+    "dc0e2851c8d8f1c018b705329b68174e7a448f06a0c01ee96cf31a9540aa2f0a"
+    "8540cfbde395c06b5247df8f465a024dd95d4d5d67017f18e88f4dbfcb97931b"
+    "7b0eac1a0f66ee1b83bebe944451d66be9c7e726bf140c7c0aee9d2277769e04"
+    "7ec3d0bac7879ef3342fc4aaba802d8245f521df2534854db3edd38ede38fc0f",
+    16,
+)
+PRIVATE_EXPONENT = int(
+    "6d4b42cf4bf8242a0a9c6c227479408a23c4055d7f5dac7cb7360f0fee2c186d"
+    "1b3dd37036a6dc08f1b6ecdc564ec2323431590978ed8f58a9b8f31ebd59ad1f"
+    "df3948930766ce90da03161bd1f63895e8a3129877330cbead500e58156f29e6"
+    "34d8008f812e3c63e418a92c572a9edf5397dc7881b75d0accb499a199605aa1",
+    16,
+)
+PUBLIC_KEY = RSAPublicKey(MODULUS, 65537)
+
+NAME = der.sequence(
+    der.set_of(der.sequence(der.oid("2.5.4.3"), der.tlv(0x0C, b"RENIEC CA")))
+)
+CERTIFICATE = der.sequence(
+    der.sequence(
+        der.context(0, der.integer(2)),
+        der.integer(0x1234567890),
+        cms.algorithm_identifier("1.2.840.113549.1.1.11"),
+        NAME,
+        der.sequence(der.tlv(der.UTC_TIME, b"240101000000Z") * 2),
+        NAME,
+        der.sequence(
+            cms.algorithm_identifier(cms.RSA_ENCRYPTION),
+            der.tlv(
+                der.BIT_STRING,
+                b"\x00" + der.sequence(der.integer(MODULUS), der.integer(65537)),
+            ),
+        ),
+    ),
+    cms.algorithm_identifier("1.2.840.113549.1.1.11"),
+    der.tlv(der.BIT_STRING, b"\x00" + b"\x01" * 128),
+)
+
+
+def sign(hash_func: HashFunction, data: bytes) -> bytes:
+    digest_info = hash_func.der_encoding() + hash_func(data)
+    padding = b"\xff" * (PUBLIC_KEY.size - len(digest_info) - 3)
+    message = int.from_bytes(b"\x00\x01" + padding + b"\x00" + digest_info, "big")
+    signature = pow(message, PRIVATE_EXPONENT, MODULUS)
+    return signature.to_bytes(PUBLIC_KEY.size, byteorder="big")
+
+
+@pytest.mark.pointer(target=certificate_public_key)
+def test_certificate_public_key():
+    assert certificate_public_key(CERTIFICATE) == PUBLIC_KEY
+
+    not_rsa = CERTIFICATE.replace(der.oid(cms.RSA_ENCRYPTION), der.oid("1.2.3.4"))
+    with pytest.raises(ValueError):
+        certificate_public_key(not_rsa)
+
+
+@pytest.mark.pointer(target=load_certificate)
+def test_load_certificate(tmp_path):
+    der_file = tmp_path / "certificate.der"
+    der_file.write_bytes(CERTIFICATE)
+
+    pem_file = tmp_path / "certificate.pem"
+    pem_file.write_text(
+        "-----BEGIN CERTIFICATE-----\n"
+        + base64.encodebytes(CERTIFICATE).decode("ascii")
+        + "-----END CERTIFICATE-----\n"
+    )
+
+    assert load_certificate(der_file) == CERTIFICATE
+    assert load_certificate(pem_file) == CERTIFICATE
+
+
+@pytest.mark.pointer(target=RSAPublicKey.verify_digest)
+def test_verify_digest():
+    hash_func = HashFunction("sha512")
+    digest = hash_func(b"document")
+    signature = sign(hash_func, b"document")
+
+    assert PUBLIC_KEY.verify_digest(hash_func, digest, signature)
+    assert not PUBLIC_KEY.verify_digest(hash_func, hash_func(b"other"), signature)
+    assert not PUBLIC_KEY.verify_digest(hash_func, digest, signature[1:])
+    assert not PUBLIC_KEY.verify_digest(HashFunction("sha384"), digest, signature)
+
+
+@pytest.mark.pointer(target=verify_files)
+def test_verify_files(tmp_path):
+    hash_func = HashFunction("sha256")
+    signatures = tmp_path / "signatures"
+    signatures.mkdir()
+
+    inputs = []
+    for idx in range(5):
+        path = tmp_path / f"document{idx}.txt"
+        path.write_bytes(bytes([idx]) * 1000)
+        (signatures / (path.name + ".sig")).write_bytes(
+            sign(hash_func, path.read_bytes())
+        )
+        inputs.append(path)
+
+    # Tampered, unsigned and missing documents
+    inputs[1].write_bytes(b"tampered")
+    (signatures / (inputs[3].name + ".sig")).unlink()
+    inputs.append(tmp_path / "missing.txt")
+
+    jobs = signature_files(inputs, ".sig", signatures)
+    engine = HashingEngine(hash_func, workers=3)
+    results = {r.input_file: r for r in verify_files(PUBLIC_KEY, jobs, engine)}
+
+    assert len(results) == 6
+    assert [path for path in inputs if results[path].valid] == [
+        inputs[0],
+        inputs[2],
+        inputs[4],
+    ]
+    assert results[inputs[1]].reason is not None
+    assert results[inputs[3]].reason is not None
+    assert results[inputs[5]].reason is not None
+
+
+@pytest.mark.pointer(target=signature_files)
+def test_signature_files(tmp_path):
+    document = tmp_path / "document.txt"
+    signature = tmp_path / "document.txt.sig"
+
+    assert signature_files([document, signature], ".sig") == [(document, signature)]
+    assert signature_files([document], ".p7s", tmp_path / "out") == [
+        (document, tmp_path / "out" / "document.txt.p7s")
+    ]